@@ -0,0 +1,146 @@
+###################################################################
+# Batch xG pipeline over the whole Competitions tree, run from the
+# repository root:
+#
+#   python batch_xg.py --workers 8
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# Concurrency and file handling packages
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# External Packages
+from data_processing import DataProcessing, compact_shots, concat_shots
+from data_service import DEFAULT_PUBLISH_DIR, publish
+from match_data import MatchData
+from shot_store import ShotStore, PARTITION_KEYS, owning_folder_mask
+from xg_scorer import resolve_model
+
+###################################################################
+
+DEFAULT_OUTPUT_DIR = Path(__file__).parent / 'xG Summaries'
+
+# Grouping keys of each summary table
+SUMMARY_KEYS = {
+    'matches': PARTITION_KEYS[:4] + ['MatchId', 'Opponent', 'Team'],
+    'teams': PARTITION_KEYS[:4] + ['Team'],
+    'players': PARTITION_KEYS[:4] + ['Team', 'Player']
+}
+
+# Shot store and model of each worker process, built once by the pool initializer
+_worker = {}
+
+
+def _init_worker(store_dir, model_path):
+    """Open the shot store and load the xG model once per worker process (private method)."""
+    _worker['shot_store'] = ShotStore(store_dir=store_dir)
+    _worker['data_processor'] = DataProcessing(model_path)
+
+
+def _score_match(rel_path):
+    """Score and materialize one match folder in a worker process (private method)."""
+    return rel_path, _worker['shot_store'].score_match(rel_path, _worker['data_processor'], update_totals=False)
+
+
+def _tag_match(total_shots, rel_path):
+    """Add the partition values of a match folder to its scored shots (private method)."""
+    keys = rel_path.split('/')
+
+    # The folder names the opponent of its own team, so the other side's shots are against the folder's team
+    is_own = (total_shots['Team'] == keys[4]).to_numpy()
+    opponent = pd.Categorical(np.where(is_own, keys[-1].partition('_')[2], keys[4]))
+    return total_shots.assign(**dict(zip(PARTITION_KEYS[:4], keys[:4])), Folder=keys[4], Opponent=opponent)
+
+
+def run_batch(shot_store=None, model_path=None, workers=None, full=False, progress=print):
+    """Score every stale match in a process pool with a model, by default the current version, and return the scored shots of the whole tree."""
+    shot_store = shot_store or ShotStore()
+    model_path = model_path or resolve_model()
+    data_processor = DataProcessing(model_path)
+    model_version = data_processor.scorer.model_version
+
+    summary = shot_store.ingest()
+    for rel_path, error in summary['errors'].items():
+        progress(f"Warning: could not ingest {rel_path}: {error}")
+
+    # Matches already materialized for this model and these source files are the checkpoint of earlier runs
+    stale = set(shot_store.stale_matches(model_version, full=full))
+    frames = [_tag_match(shot_store.read_match_scored(rel_path), rel_path) for rel_path in shot_store.matches() if rel_path not in stale]
+    progress(f"Matches: {len(frames) + len(stale)} | Up to date: {len(frames)} | To score: {len(stale)}")
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    scored = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(shot_store.store_dir), str(model_path))) as executor:
+            futures = [executor.submit(_score_match, rel_path) for rel_path in sorted(stale)]
+            for done, future in enumerate(as_completed(futures), start=1):
+                rel_path, total_shots = future.result()
+                scored[rel_path] = total_shots
+                frames.append(_tag_match(total_shots, rel_path))
+                progress(f"[{done}/{len(futures)}] {rel_path} ({len(total_shots)} shots, {time.perf_counter() - start:.1f}s)")
+    finally:
+        # Workers leave the shared season totals to this process, so they are folded in once
+        shot_store.update_player_totals(scored=scored, model_version=model_version)
+
+    if not frames:
+        return pd.DataFrame()
+
+    # Both teams of a match may store it, so keep each shooting team's shots from their owning folder only
+    total_shots = compact_shots(concat_shots(frames))
+    return total_shots[owning_folder_mask(total_shots, 'Folder')].drop(columns='Folder').reset_index(drop=True)
+
+
+def write_summaries(total_shots, output_dir=DEFAULT_OUTPUT_DIR, data_processor=None):
+    """Write the per-match, per-team and per-player xG summary tables and return their paths."""
+    data_processor = data_processor or DataProcessing(resolve_model())
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = {}
+    for name, keys in SUMMARY_KEYS.items():
+        summary_df = data_processor.shot_leaders(total_shots, group_by=keys, sort_by=None).sort_values(keys)
+        paths[name] = output_dir / f'{name}.csv'
+        tmp_path = paths[name].with_suffix('.tmp')
+        summary_df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, paths[name])
+    return paths
+
+
+def main():
+    """Score the Competitions tree in parallel and write the xG summary tables."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score every match in the Competitions tree and write xG summaries.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core).")
+    parser.add_argument('--full', action='store_true', help="Rescore every match instead of resuming from the materialized xG.")
+    parser.add_argument('--model', default=None, help="Exported xG model file (default: the current model version).")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT_DIR), help="Directory of the summary tables.")
+    parser.add_argument('--publish-dir', default=str(DEFAULT_PUBLISH_DIR), help="Directory of the shared data versions read by the dashboard.")
+    parser.add_argument('--no-publish', action='store_true', help="Skip publishing the scored shots for the dashboard.")
+    args = parser.parse_args()
+
+    shot_store = ShotStore()
+    model_path = args.model or resolve_model()
+    total_shots = run_batch(shot_store=shot_store, model_path=model_path, workers=args.workers, full=args.full)
+    if total_shots.empty:
+        print("No shots found.")
+        return
+    data_processor = DataProcessing(model_path)
+    for name, path in write_summaries(total_shots, args.output, data_processor).items():
+        print(f"Wrote {name} summary to {path}")
+
+    # Running dashboards swap to the new version on their next query
+    if not args.no_publish:
+        manifest = publish(shot_store, data_processor, MatchData(), args.publish_dir)
+        print(f"Published data version {manifest['version']} to {args.publish_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+###################################################################
+# Benchmark of the vectorized DataProcessing.calc_xg against the
+# previous row-wise implementation, run from the repository root:
+#
+#   python benchmarks/bench_calc_xg.py --scales 1 10 100 1000
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# Timing and path packages
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# External Packages
+from data_processing import DataProcessing
+from xg_scorer import DEFAULT_MODEL_PATHS
+
+###################################################################
+
+def load_legacy_models():
+    """Unpickle the sklearn models used by the previous implementation."""
+    import pickle
+    import warnings
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return {key: pickle.load(open(path, 'rb')) for key, path in DEFAULT_MODEL_PATHS.items()}
+
+
+def legacy_calc_xg(loaded_models, events_df):
+    """Previous calc_xg with row-wise apply passes and sklearn scoring, kept as the benchmark baseline."""
+    events_df[['type', 'shotType', 'situation', 'outcome']] = events_df['Event'].str.split(' ', expand=True)
+    events_df.rename(columns={'X': 'x', 'Y': 'y'}, inplace=True)
+
+    events_df['shotRightFoot'] = events_df['shotType'].apply(lambda x: True if x == 'Right' else False)
+    events_df['shotLeftFoot'] = events_df['shotType'].apply(lambda x: True if x == 'Left' else False)
+    events_df['shotBodyType'] = events_df['shotType'].apply(lambda x: 'Head' if x == 'Head' else ('Foot' if x in ['Right', 'Left'] else 'OtherBodyPart'))
+    events_df['throwIn'] = events_df['situation'].apply(lambda x: True if x == 'ThrowIn' else False)
+    events_df['goalOwn'] = events_df['Event'].apply(lambda x: True if 'Own Goal' in x else False)
+    events_df['isGoal'] = events_df['outcome'].apply(lambda x: True if x == 'Goal' else False)
+
+    df = events_df.loc[events_df['type'] == 'Shot'].reset_index(drop=True)
+    df['isLeftFooted'] = np.where((df['shotRightFoot'] == False) & (df['shotLeftFoot'] == True), 1, 0)
+    df['isRightFooted'] = np.where((df['shotRightFoot'] == True) & (df['shotLeftFoot'] == False), 1, 0)
+    df['isHead'] = np.where(df['shotBodyType'] == 'Head', 1, 0)
+    df['isOtherBodyType'] = np.where(df['shotBodyType'] == 'OtherBodyPart', 1, 0)
+    df['isRegularPlay'] = np.where(df['situation'] == 'OpenPlay', 1, 0)
+    df['isThrowIn'] = np.where(df['throwIn'] == True, 1, 0)
+    df['isDirectFree'] = np.where(df['situation'] == 'DirectFreekick', 1, 0)
+    df['isFromCorner'] = np.where(df['situation'] == 'FromCorner', 1, 0)
+    df['isSetPiece'] = np.where(df['situation'] == 'SetPiece', 1, 0)
+    df['isOwnGoal'] = np.where(df['goalOwn'] == True, 1, 0)
+    df['isPenalty'] = np.where(df['situation'] == 'Penalty', 1, 0)
+    df['isGoal'] = np.where(df['isGoal'] == True, 1, 0)
+
+    df['distance_to_goal'] = np.sqrt(((100 - df['x'])**2) + ((df['y'] - (100/2))**2))
+    df['distance_to_center'] = abs(df['y'] - 100/2)
+    df['angle'] = np.absolute(np.degrees(np.arctan((abs((100/2) - df['y'])) / (100 - df['x']))))
+    df['isFoot'] = np.where(((df['isLeftFooted'] == 1) | (df['isRightFooted'] == 1)) & (df['isHead'] == 0), 1, 0)
+
+    features_op = ['distance_to_goal', 'angle', 'isFoot', 'isHead']
+    features_non_op = ['distance_to_goal', 'angle', 'isFoot', 'isHead', 'isDirectFree', 'isSetPiece', 'isFromCorner']
+    mask_op = df['isRegularPlay'] == 1
+    mask_non_op = (df['isRegularPlay'] == 0) & (df['isPenalty'] == 0)
+    df.loc[mask_op, 'xG'] = loaded_models['op'].predict_proba(df.loc[mask_op, features_op])[:, 1]
+    df.loc[mask_non_op, 'xG'] = loaded_models['non_op'].predict_proba(df.loc[mask_non_op, features_non_op])[:, 1]
+    df.loc[df['isPenalty'] == 1, 'xG'] = 0.79
+    return df
+
+
+def load_events(scale):
+    """Load every shot CSV in the Competitions tree and repeat it `scale` times."""
+    files = sorted((ROOT / 'Competitions').glob('**/Raw Data/* Shots.csv'))
+    events = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+    return pd.concat([events] * scale, ignore_index=True)
+
+
+def best_of(func, repeat):
+    """Return the best wall time of `repeat` calls and the last result."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    """Time both implementations at each scale and check that they agree on xG."""
+    parser = argparse.ArgumentParser(description="Benchmark DataProcessing.calc_xg against the row-wise baseline.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data_processor = DataProcessing()
+    legacy_models = load_legacy_models()
+    print(f"{'scale':>6} {'events':>9} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for scale in args.scales:
+        events = load_events(scale)
+        legacy_time, legacy = best_of(lambda: legacy_calc_xg(legacy_models, events.copy()), args.repeat)
+        new_time, new = best_of(lambda: data_processor.calc_xg(events), args.repeat)
+
+        # calc_xg stores xG as float32, so agreement is to its precision
+        if not np.allclose(legacy['xG'].to_numpy(), new['xG'].to_numpy(dtype=np.float64), rtol=0, atol=1e-6, equal_nan=True):
+            raise SystemExit(f"xG mismatch at scale {scale}")
+        print(f"{scale:>6} {len(events):>9} {legacy_time:>11.4f} {new_time:>15.4f} {legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
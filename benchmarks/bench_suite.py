@@ -0,0 +1,202 @@
+###################################################################
+# Benchmark suite of the data pipeline on synthetic league-scale
+# data: ingest, xG scoring, aggregation, league metadata lookups and
+# shot map rendering, run from the repository root:
+#
+#   python benchmarks/bench_suite.py --scales 10 100 1000
+#   python benchmarks/bench_suite.py --compare benchmarks/results/bench_suite_<commit>.json
+###################################################################
+# Timing, memory and path packages
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# External Packages
+from data_processing import DataProcessing, concat_shots
+from match_data import MatchData
+from shot_store import ShotStore
+from synthetic_data import generate, SEASON
+from xg_scorer import DEFAULT_SCORER_PATH
+
+###################################################################
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def peak_rss_mb():
+    """Return the peak resident memory of this process in MB, or None where neither resource nor psutil can measure it."""
+    try:
+        import resource
+    except ImportError:
+        # resource is POSIX-only; on Windows psutil reports the peak working set in bytes when it is installed
+        try:
+            import psutil
+        except ImportError:
+            return None
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+        return None if peak is None else peak / 2**20
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (2**20 if sys.platform == 'darwin' else 2**10)
+
+
+def run_stage(name, func, memory=True):
+    """Time one stage, then rerun it under tracemalloc for its peak memory when requested."""
+    start = time.perf_counter()
+    result = func()
+    stage = {'seconds': time.perf_counter() - start}
+
+    # tracemalloc slows allocation-heavy code, so the timed run is kept separate
+    if memory:
+        tracemalloc.start()
+        func()
+        stage['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    peak = f", peak {stage['peak_mb']:.1f} MB" if memory else ''
+    print(f"  {name:<18} {stage['seconds']:>9.3f} s{peak}")
+    return result, stage
+
+
+def bench_scale(scale, work_dir, memory=True):
+    """Generate one synthetic data set and time every stage of the pipeline on it."""
+    data_dir = Path(work_dir) / f'scale_{scale}'
+    stages = {}
+
+    counts, stages['generate'] = run_stage('generate', lambda: generate(data_dir, scale), memory=False)
+    print(f"  {counts['teams']} teams, {counts['matches']} matches, {counts['shots']} shots")
+
+    shot_store = ShotStore(source_dir=data_dir / 'Competitions', store_dir=data_dir / 'Shot Store')
+    _, stages['ingest'] = run_stage('ingest', lambda: shot_store.ingest(full=True), memory)
+
+    def read_all():
+        return concat_shots([shot_store.read(*keys, view="Shots For") for keys in shot_store.teams()])
+
+    events, stages['read'] = run_stage('read', read_all, memory)
+
+    data_processor = DataProcessing()
+    total_shots, stages['calc_xg'] = run_stage('calc_xg', lambda: data_processor.calc_xg(events), memory)
+    stages['calc_xg']['frame_mb'] = total_shots.memory_usage(deep=True).sum() / 2**20
+    print(f"  {'scored frame':<18} {stages['calc_xg']['frame_mb']:>9.1f} MB")
+    _, stages['shot_leaders'] = run_stage(
+        'shot_leaders', lambda: data_processor.shot_leaders(total_shots, group_by=('Player', 'Team')), memory)
+
+    json_path = data_dir / 'upsl_data.json'
+    snapshot_path = data_dir / 'upsl_data.snapshot'
+
+    def build_match_data():
+        snapshot_path.unlink(missing_ok=True)
+        return MatchData(json_path, snapshot_path)
+
+    def lookups():
+        match_data = MatchData(json_path, snapshot_path)
+        for conference in match_data.get_conference_names():
+            for team in match_data.get_team_names(conference):
+                match_data.get_player_data(conference, team)
+                match_data.get_match_data(conference, team, SEASON)
+        return match_data
+
+    _, stages['match_data_build'] = run_stage('match_data_build', build_match_data, memory)
+    _, stages['match_data_lookup'] = run_stage('match_data_lookup', lookups, memory)
+
+    # Plotting modules are imported outside the timed stage
+    from visuals import FootballVisuals
+    from mplsoccer import VerticalPitch
+    import matplotlib.pyplot as plt
+
+    def render():
+        visuals = FootballVisuals(model_path=DEFAULT_SCORER_PATH)
+        pitch = VerticalPitch(pitch_type='statsbomb', pitch_color='#1d2849', line_color='w', half=True, pad_top=20, pad_right=20)
+        fig, ax = pitch.draw(figsize=(8, 10))
+        visuals.createShotmap(total_shots, fig=fig, ax=ax, pitch=pitch, team='League', players='All Players', view='Shots For',
+                              competition='UPSL', season_year=SEASON, pitchcolor='#1d2849', shot_color='gray',
+                              titlecolor='w', team_color='w', fontfamily='DejaVu Sans')
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
+        plt.close(fig)
+        return buffer.getbuffer().nbytes
+
+    _, stages['render'] = run_stage('render', render, memory)
+    return {**counts, 'stages': stages}
+
+
+def git_commit():
+    """Return the short hash of the checked-out commit, or 'unknown' outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path):
+    """Print the time and memory ratio of every stage against an earlier results file."""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['commit']} ({baseline_path}):")
+    for scale, result in results['scales'].items():
+        previous = baseline['scales'].get(scale)
+        if previous is None:
+            continue
+        print(f"  scale {scale}")
+        for name, stage in result['stages'].items():
+            before = previous['stages'].get(name)
+            if before is None:
+                continue
+            line = f"    {name:<18} time x{stage['seconds'] / before['seconds']:.2f}"
+            if 'peak_mb' in stage and before.get('peak_mb'):
+                line += f", memory x{stage['peak_mb'] / before['peak_mb']:.2f}"
+            print(line)
+
+
+def main():
+    """Run the suite at each scale and save the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data at multiples of the shipped volume.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--work-dir', default=None, help="Directory for the generated data (default: a temporary directory).")
+    parser.add_argument('--output', default=None, help="Results file (default: benchmarks/results/bench_suite_<commit>.json).")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc reruns.")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scales': {}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in args.scales:
+            print(f"scale {scale}")
+            results['scales'][str(scale)] = bench_scale(scale, args.work_dir or tmp_dir, memory=not args.no_memory)
+
+    results['max_rss_mb'] = peak_rss_mb()
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f'bench_suite_{commit}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    max_rss = 'n/a' if results['max_rss_mb'] is None else f"{results['max_rss_mb']:.0f} MB"
+    print(f"Max RSS: {max_rss} | Saved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
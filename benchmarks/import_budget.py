@@ -0,0 +1,80 @@
+###################################################################
+# Import-time budget of the dashboard entry points, measured with
+# python -X importtime in a fresh interpreter, run from the
+# repository root:
+#
+#   python benchmarks/import_budget.py --top 15
+###################################################################
+# Profiling and path packages
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_PATH = Path(__file__).resolve().parent / 'import_budget.json'
+
+###################################################################
+
+def measure_imports(entry_point):
+    """Load an entry point without running it and return {module: (self us, cumulative us, nesting level)}."""
+    # run_name keeps the entry point's `if __name__ == "__main__"` block from running
+    code = f"import runpy; runpy.run_path({str(ROOT / entry_point)!r}, run_name='import_budget')"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not load {entry_point}:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us), level))
+    return modules
+
+
+def top_level_time(modules):
+    """Return the total import time in ms, summing only the imports that were not nested in another one."""
+    return sum(cumulative for _, cumulative, level in modules.values() if level == 0) / 1000
+
+
+def main():
+    """Report the import time of each entry point and fail when one exceeds its budget."""
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the dashboard entry points.")
+    parser.add_argument('--top', type=int, default=10, help="Slowest top-level modules to list per entry point.")
+    parser.add_argument('--budget', default=str(BUDGET_PATH), help="Budget file.")
+    args = parser.parse_args()
+
+    with open(args.budget, 'r') as f:
+        budget = json.load(f)
+
+    failures = []
+    for entry_point, limits in budget['entry_points'].items():
+        # Keep the fastest of several cold starts to dampen noise
+        runs = [measure_imports(entry_point) for _ in range(budget.get('repeat', 1))]
+        modules = min(runs, key=top_level_time)
+        total_ms = top_level_time(modules)
+
+        status = 'ok' if total_ms <= limits['budget_ms'] else 'OVER BUDGET'
+        print(f"{entry_point}: {total_ms:.0f} ms (budget {limits['budget_ms']} ms) {status}")
+        if status != 'ok':
+            failures.append(entry_point)
+
+        slowest = sorted(((cumulative, name) for name, (_, cumulative, level) in modules.items() if level == 0), reverse=True)
+        for cumulative, name in slowest[:args.top]:
+            print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+        loaded = sorted(name for name in limits.get('forbidden', []) if name in modules)
+        if loaded:
+            print(f"  loaded at import time but should be lazy: {', '.join(loaded)}")
+            failures.append(entry_point)
+
+    if failures:
+        raise SystemExit(f"Import budget exceeded: {', '.join(sorted(set(failures)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+###################################################################
+# Memory report of the league-wide scored shot frame in the compact
+# schema against the same frame in the wide dtypes it used to have,
+# run from the repository root:
+#
+#   python benchmarks/memory_report.py --sessions 20
+###################################################################
+# Data manipulation packages
+import numpy as np
+
+# Path packages
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# External Packages
+from data_processing import DataProcessing, CATEGORY_COLUMNS, FLAG_COLUMNS, FLOAT32_COLUMNS, INT16_COLUMNS, concat_shots, memory_report
+from shot_store import ShotStore
+from xg_scorer import DEFAULT_SCORER_PATH
+
+###################################################################
+
+def widen(total_shots):
+    """Cast a compact shot frame back to string names, int64 flags and float64 coordinates and scores."""
+    dtypes = {}
+    for column in total_shots.columns:
+        if column in CATEGORY_COLUMNS:
+            dtypes[column] = object
+        elif column in FLAG_COLUMNS or column in INT16_COLUMNS:
+            dtypes[column] = np.int64
+        elif column in FLOAT32_COLUMNS:
+            dtypes[column] = np.float64
+    return total_shots.astype(dtypes)
+
+
+def main():
+    """Print the per-column memory of the league-wide scored shots and the saving per session."""
+    parser = argparse.ArgumentParser(description="Report the memory of the scored shot frame in the compact and wide dtypes.")
+    parser.add_argument('--model', default=str(DEFAULT_SCORER_PATH), help="Exported xG model.")
+    parser.add_argument('--sessions', type=int, default=1, help="Concurrent sessions holding their own copy.")
+    args = parser.parse_args()
+
+    shot_store = ShotStore()
+    shot_store.ingest()
+    data_processor = DataProcessing(args.model)
+    total_shots = concat_shots([data_processor.load_xg(shot_store, *keys, view="Shots For") for keys in shot_store.teams()])
+
+    compact = memory_report(total_shots)
+    wide = memory_report(widen(total_shots))
+    report = compact.join(wide, rsuffix=' (wide)')
+    print(f"{len(total_shots)} shots\n")
+    print(report.to_string(float_format=lambda mb: f'{mb:.3f}'))
+
+    compact_mb, wide_mb = compact.loc['total', 'MB'], wide.loc['total', 'MB']
+    print(f"\nCompact {compact_mb:.2f} MB | Wide {wide_mb:.2f} MB | x{wide_mb / compact_mb:.1f} smaller"
+          f" | {args.sessions} sessions: {compact_mb * args.sessions:.1f} MB instead of {wide_mb * args.sessions:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
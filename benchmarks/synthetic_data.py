@@ -0,0 +1,143 @@
+###################################################################
+# Synthetic UPSL data in the layout of the Competitions tree and
+# upsl_data.json, scaled from the shipped 2024 Fall data (one team,
+# 10 matches, ~300 shots), run from the repository root:
+#
+#   python benchmarks/synthetic_data.py --scale 100 --output "/tmp/upsl x100"
+###################################################################
+# Data manipulation packages
+import numpy as np
+
+# File handling packages
+import argparse
+import csv
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+###################################################################
+
+# Matches per tracked team and teams per conference, as in the shipped data
+MATCHES_PER_TEAM = 10
+TEAMS_PER_CONFERENCE = 10
+ROSTER_SIZE = 20
+SEASON = '2024 Fall'
+FIRST_MATCHDAY = date(2024, 8, 17)
+
+# Event mix and counts of the shipped shot CSVs
+EVENT_WEIGHTS = {
+    'Shot Right OpenPlay Miss': 128, 'Shot Left OpenPlay Miss': 53, 'Shot Right OpenPlay Goal': 35,
+    'Shot Right Freekick Miss': 13, 'Shot Head Corner Miss': 12, 'Shot Right Corner Miss': 12,
+    'Shot Head OpenPlay Miss': 10, 'Shot Left OpenPlay Goal': 8, 'Shot Left Freekick Miss': 8,
+    'Shot Right ThrowIn Miss': 6, 'Shot Right Penalty Goal': 3, 'Shot Left ThrowIn Miss': 3,
+    'Shot Head OpenPlay Goal': 3, 'Shot Right Penalty Miss': 2, 'Shot Right Corner Goal': 2,
+    'Shot Left Corner Miss': 1, 'Shot Right Freekick Goal': 1, 'Shot Head ThrowIn Miss': 1,
+    'Shot Head Corner Goal': 1, 'Shot Head Freekick Miss': 1
+}
+SHOTS_PER_TEAM_MATCH = 15
+POSITIONS = ['GOALKEEPER', 'DEFENSE', 'MIDFIELD', 'FORWARD']
+CSV_HEADER = ['Team', 'Player', 'Event', 'Mins', 'Secs', 'X', 'Y', 'X2', 'Y2']
+
+
+def _team_names(scale):
+    """Return the conference of each synthetic team, TEAMS_PER_CONFERENCE per conference (private method)."""
+    conferences = {}
+    for i in range(scale):
+        conference = f'Synthetic Conference {i // TEAMS_PER_CONFERENCE + 1}'
+        conferences.setdefault(conference, []).append(f'Synthetic Team {i + 1}')
+    return conferences
+
+
+def _fixtures(teams):
+    """Return each team's (date, opponent, home) fixtures, pairing teams of one conference (private method)."""
+    fixtures = {team: [] for team in teams}
+    if len(teams) < 2:
+        return fixtures
+    for i, team in enumerate(teams):
+        for k in range(MATCHES_PER_TEAM):
+            opponent = teams[(i + k % (len(teams) - 1) + 1) % len(teams)]
+            fixtures[team].append((FIRST_MATCHDAY + timedelta(weeks=k), opponent, k % 2 == 0))
+    return fixtures
+
+
+def _write_shots(path, rng, side, roster, events, weights):
+    """Write one team's shots of a match in the raw CSV format (private method)."""
+    n = rng.poisson(SHOTS_PER_TEAM_MATCH)
+    seconds = np.sort(rng.integers(0, 90 * 60, n))
+    shooters = rng.choice(roster, n)
+    kinds = rng.choice(events, n, p=weights)
+    x = rng.integers(60, 100, n)
+    y = rng.integers(5, 96, n)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for i in range(n):
+            # Penalties are taken from the spot
+            px, py = (89, 50) if 'Penalty' in kinds[i] else (x[i], y[i])
+            writer.writerow([side, shooters[i], kinds[i], seconds[i] // 60, seconds[i] % 60, px, py, '-', '-'])
+    return n
+
+
+def generate(output_dir, scale, seed=0):
+    """Write a Competitions tree and upsl_data.json with `scale` times the shipped volume and return their counts."""
+    output_dir = Path(output_dir)
+    rng = np.random.default_rng(seed)
+    events = list(EVENT_WEIGHTS)
+    weights = np.array(list(EVENT_WEIGHTS.values()), dtype=np.float64)
+    weights /= weights.sum()
+
+    upsl_data = {'Division': {'Premier': {'Conference': {}}}}
+    counts = {'teams': 0, 'matches': 0, 'files': 0, 'shots': 0}
+    for conference, teams in _team_names(scale).items():
+        rosters = {team: [f'{team} Player {n + 1}' for n in range(ROSTER_SIZE)] for team in teams}
+        fixtures = _fixtures(teams)
+        conference_data = upsl_data['Division']['Premier']['Conference'].setdefault(conference, {'Teams': {}})
+
+        for team in teams:
+            conference_data['Teams'][team] = {
+                'Roster': [
+                    {'Player': player, 'Position': POSITIONS[min(n // 5, 3)], 'Appearances': str(rng.integers(0, MATCHES_PER_TEAM + 1))}
+                    for n, player in enumerate(rosters[team])
+                ],
+                f'Matches {SEASON}': [
+                    {
+                        'Date': day.strftime('%m/%d/%Y'),
+                        'Home Team': team if home else opponent,
+                        'Away Team': opponent if home else team,
+                        'Home Score': '', 'Away Score': '', 'Venue': ''
+                    }
+                    for day, opponent, home in fixtures[team]
+                ]
+            }
+
+            for day, opponent, home in fixtures[team]:
+                raw_dir = output_dir / 'Competitions' / 'UPSL' / 'Premier' / conference / SEASON / team / f'{day:%m%d%Y}_{opponent}' / 'Raw Data'
+                raw_dir.mkdir(parents=True, exist_ok=True)
+                counts['shots'] += _write_shots(raw_dir / f'{team} Shots.csv', rng, 'Home' if home else 'Away', rosters[team], events, weights)
+                counts['shots'] += _write_shots(raw_dir / f'{opponent} Shots.csv', rng, 'Away' if home else 'Home', rosters[opponent], events, weights)
+                counts['matches'] += 1
+                counts['files'] += 2
+            counts['teams'] += 1
+
+    tmp_path = output_dir / 'upsl_data.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(upsl_data, f)
+    os.replace(tmp_path, output_dir / 'upsl_data.json')
+    return counts
+
+
+def main():
+    """Write a synthetic data set for the benchmarks or for trying the dashboard at league scale."""
+    parser = argparse.ArgumentParser(description="Generate synthetic UPSL shot data at a multiple of the shipped volume.")
+    parser.add_argument('--scale', type=int, default=10, help="Multiple of the shipped volume (one tracked team per unit).")
+    parser.add_argument('--output', required=True, help="Directory receiving Competitions/ and upsl_data.json.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate(args.output, args.scale, args.seed)
+    print(f"Teams: {counts['teams']} | Matches: {counts['matches']} | Files: {counts['files']} | Shots: {counts['shots']}")
+
+
+if __name__ == "__main__":
+    main()
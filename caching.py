@@ -0,0 +1,420 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# Concurrency packages
+import threading
+from collections import OrderedDict
+
+# External Packages
+from data_processing import DataProcessing, concat_shots
+from instrumentation import count, timed
+from match_data import MatchData
+from match_timeline import match_timeline
+from player_comparison import PlayerComparison, player_metrics
+from shot_grids import DEFAULT_BINS, GRID_STATISTICS
+from simulation import conference_fixtures, simulate_season
+from xg_scorer import DEFAULT_SCORER_PATH
+
+###################################################################
+
+
+class LRUCache:
+    def __init__(self, maxsize=256):
+        """Initialize the LRUCache class with the maximum number of entries to keep."""
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return a cached value and mark it as most recently used."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries beyond maxsize."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        """Drop every entry, or only those whose key matches the predicate, and return how many were dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def values(self):
+        """Return a snapshot of the cached values without touching their recency."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def stats(self):
+        """Return the entry count and the hit, miss and eviction counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+# Process-wide instances shared by every Streamlit session and page
+_singletons = {}
+_singletons_lock = threading.Lock()
+
+# Scored shots per match file, keyed by (file sha256, match id, shooting team, model version)
+xg_cache = LRUCache(maxsize=1024)
+
+# Shot grids per match file, keyed by (file sha256, match id, shooting team, model version, bins)
+grid_cache = LRUCache(maxsize=1024)
+
+# Cumulative xG timelines per match, keyed by the match's shot files and model version
+timeline_cache = LRUCache(maxsize=512)
+
+# League-wide player percentiles and neighbour indexes, keyed by scope, season totals, rosters and model version
+comparison_cache = LRUCache(maxsize=8)
+
+# Simulated season projections, keyed by selection, fixtures, shot files, model version, simulations and seed
+projection_cache = LRUCache(maxsize=32)
+
+# Encoded shot map PNGs, keyed by selection, model version and plotted shots
+render_cache = LRUCache(maxsize=256)
+
+
+def _get_singleton(key, factory):
+    """Return the shared instance for a key, building it once per process (private method)."""
+    with _singletons_lock:
+        if key not in _singletons:
+            _singletons[key] = factory()
+        return _singletons[key]
+
+
+def get_match_data():
+    """Return the shared MatchData instance, rebuilt when upsl_data.json has changed."""
+    match_data = _get_singleton('match_data', MatchData)
+    if match_data.is_stale():
+        with _singletons_lock:
+            if _singletons.get('match_data') is match_data:
+                del _singletons['match_data']
+        match_data = _get_singleton('match_data', MatchData)
+    return match_data
+
+
+def get_data_processor(model_path=DEFAULT_SCORER_PATH):
+    """Return the shared DataProcessing instance for an exported xG model."""
+    return _get_singleton(('data_processor', str(model_path)), lambda: DataProcessing(model_path))
+
+
+def _open_shot_store():
+    """Build the ShotStore and bring it up to date with the Competitions tree (private method)."""
+    # pandas already loads pyarrow itself; deferring the store skips its dataset, parquet and filesystem modules and shot_reader
+    from shot_store import ShotStore
+
+    shot_store = ShotStore()
+    shot_store.ingest()
+    return shot_store
+
+
+def get_shot_store():
+    """Return the shared ShotStore instance, incrementally ingested once per process."""
+    return _get_singleton('shot_store', _open_shot_store)
+
+
+def _open_data_service():
+    """Build the DataService reading the versions published by the ingest pipeline (private method)."""
+    # Deferred for the same reason, since data_service imports shot_store
+    from data_service import DataService
+
+    return DataService()
+
+
+def get_data_service():
+    """Return the shared DataService instance, attached to the current published version."""
+    return _get_singleton('data_service', _open_data_service)
+
+
+def _published_shots(shot_store, model_version, *scope):
+    """Return the published version when it holds a scope's current shot files scored with a model version, else None (private method)."""
+    published = get_data_service().current()
+    if published is None or published.model_version != model_version or published.match_sources(*scope) != shot_store.match_sources(*scope):
+        count('data_service.misses')
+        return None
+    count('data_service.hits')
+    return published
+
+
+def _published_league():
+    """Return the published version when its league tables match upsl_data.json, else None (private method)."""
+    published = get_data_service().current()
+    return published if published is not None and published.league == get_match_data().signature else None
+
+
+def get_team_matches(conference, team, season):
+    """Return a team's matches of a season from the published league tables, or from the league indexes when they are newer."""
+    published = _published_league()
+    if published is not None:
+        return published.team_matches(conference, team, season)
+    return get_match_data().get_match_data(conference_name=conference, team_name=team, season=season)
+
+
+def get_player_data(conference, team):
+    """Return a team's roster with Player, Position, and Appearances from the published league tables, or from the league indexes."""
+    published = _published_league()
+    if published is not None:
+        return published.team_roster(conference, team)
+    return get_match_data().get_player_data(conference_name=conference, team_name=team)
+
+
+def get_team_roster(conference, team):
+    """Return the player names of a team's roster."""
+    player_data = get_player_data(conference, team)
+    return player_data["Player"].tolist() if not player_data.empty else []
+
+
+@timed('get_scored_shots')
+def get_scored_shots(competition, division, conference, season, team, match_ids=None, view="Shots For", model_path=DEFAULT_SCORER_PATH):
+    """Return the scored shots of a team's matches, from the shared published version or else loading only files missing from the xG cache."""
+    shot_store = get_shot_store()
+    data_processor = get_data_processor(model_path)
+    model_version = data_processor.scorer.model_version
+
+    # A published version holding every current file of the team is sliced without copying the league's shots into this process
+    published = _published_shots(shot_store, model_version, competition, division, conference, season, team)
+    if published is not None:
+        return published.scored_shots(competition, division, conference, season, team, match_ids=match_ids, view=view)
+
+    files = shot_store.match_files(competition, division, conference, season, team, match_ids=match_ids, view=view)
+    frames = {}
+    missing = []
+    for file in files:
+        key = (file['sha256'], file['MatchId'], file['Team'], model_version)
+        frame = xg_cache.get(key)
+        if frame is None:
+            missing.append(file)
+        else:
+            frames[(file['MatchId'], file['Team'])] = frame
+
+    count('xg_cache.hits', len(files) - len(missing))
+    count('xg_cache.misses', len(missing))
+
+    if missing:
+        # Load materialized xG for the missing files, scoring stale matches in one pass, and cache each file separately
+        total_shots = data_processor.load_xg(shot_store, competition, division, conference, season, team,
+                                             match_ids=[file['MatchId'] for file in missing], view=view)
+        scored = dict(iter(total_shots.groupby(['MatchId', 'Team'], sort=False, observed=True)))
+        for file in missing:
+            frame = scored.get((file['MatchId'], file['Team']), total_shots.iloc[0:0]).reset_index(drop=True)
+            xg_cache.put((file['sha256'], file['MatchId'], file['Team'], model_version), frame)
+            frames[(file['MatchId'], file['Team'])] = frame
+
+    if not frames:
+        return pd.DataFrame()
+    return concat_shots([frames[(file['MatchId'], file['Team'])] for file in files])
+
+
+@timed('get_player_totals')
+def get_player_totals(competition, division, conference=None, season=None, team=None, model_path=DEFAULT_SCORER_PATH):
+    """Return the maintained season totals per shooting team and player, folding in any new or corrected matches first."""
+    shot_store = get_shot_store()
+    data_processor = get_data_processor(model_path)
+
+    # Totals published for exactly the current matches in scope are read from the shared version
+    published = _published_shots(shot_store, data_processor.scorer.model_version, competition, division, conference, season)
+    if published is not None:
+        return published.player_totals(competition, division, conference, season, team)
+
+    count('player_totals.refreshed', shot_store.refresh_player_totals(data_processor, competition, division, conference, season))
+    return shot_store.player_totals(competition, division, conference, season, team)
+
+
+def _sum_grids(shot_store, data_processor, files, player, bins):
+    """Sum the cached per-match grids of shot files, binning only the matches missing from the grid cache (private method)."""
+    model_version = data_processor.scorer.model_version
+    total = np.zeros((len(GRID_STATISTICS), bins[1], bins[0]))
+    hits = 0
+    for file in files:
+        key = (file['sha256'], file['MatchId'], file['Team'], model_version, tuple(bins))
+        entry = grid_cache.get(key)
+        if entry is None:
+            # Both sides of a match are binned together, so cache every shooting team of the folder at once
+            labels, grids = shot_store.match_grids(file['rel_path'], data_processor, bins)
+            for other in shot_store.match_files(*file['rel_path'].split('/')[:-1], match_ids=[file['MatchId']], view=None):
+                mask = (labels['Team'] == other['Team']).to_numpy()
+                other_entry = (labels.loc[mask, 'Player'].to_numpy(), grids[mask])
+                grid_cache.put((other['sha256'], other['MatchId'], other['Team'], model_version, tuple(bins)), other_entry)
+                if other['Team'] == file['Team']:
+                    entry = other_entry
+        else:
+            hits += 1
+
+        players, grids = entry
+        total += grids.sum(axis=0) if player == "All Players" else grids[players == player].sum(axis=0)
+
+    count('grid_cache.hits', hits)
+    count('grid_cache.misses', len(files) - hits)
+    return total
+
+
+@timed('get_shot_grid')
+def get_shot_grid(competition, division, conference, season, team, match_ids=None, view="Shots For", player="All Players",
+                  bins=DEFAULT_BINS, model_path=DEFAULT_SCORER_PATH):
+    """Return the shots, goals and xG grid of a team's or player's matches as the sum of the cached per-match grids."""
+    shot_store = get_shot_store()
+    files = shot_store.match_files(competition, division, conference, season, team, match_ids=match_ids, view=view)
+    return _sum_grids(shot_store, get_data_processor(model_path), files, player, bins)
+
+
+@timed('get_league_grid')
+def get_league_grid(competition, division, conference=None, season=None, bins=DEFAULT_BINS, model_path=DEFAULT_SCORER_PATH):
+    """Return the shots, goals and xG grid of every team in a league scope as the sum of the cached per-match grids."""
+    from shot_store import folder_priority
+    shot_store = get_shot_store()
+
+    # Both teams of a match may store it, so take each side from the folder owning it
+    chosen = {}
+    for keys in shot_store.teams(competition, division, conference, season):
+        for file in shot_store.match_files(*keys, view=None):
+            match_key = (keys[:4], file['MatchId'], file['Team'])
+            previous = chosen.get(match_key)
+            if previous is None or folder_priority(keys[4], file['Team']) < folder_priority(previous[0], file['Team']):
+                chosen[match_key] = (keys[4], file)
+    return _sum_grids(shot_store, get_data_processor(model_path), [file for _, file in chosen.values()], "All Players", bins)
+
+
+@timed('get_match_timelines')
+def get_match_timelines(competition, division, conference, season, team, match_ids=None, model_path=DEFAULT_SCORER_PATH):
+    """Return the stacked cumulative xG timelines of a team's matches, building only those missing from the timeline cache."""
+    shot_store = get_shot_store()
+    model_version = get_data_processor(model_path).scorer.model_version
+
+    # Both shot files of a match key its timeline, so a corrected file for either side rebuilds it
+    files = {}
+    for file in shot_store.match_files(competition, division, conference, season, team, match_ids=match_ids, view=None):
+        files.setdefault(file['MatchId'], []).append(file)
+
+    timelines = []
+    missing = []
+    for match_id, match_files in files.items():
+        key = (tuple(sorted((file['Team'], file['sha256']) for file in match_files)), match_id, model_version)
+        timeline = timeline_cache.get(key)
+        if timeline is None:
+            missing.append((match_id, key))
+        else:
+            timelines.append(timeline)
+    count('timeline_cache.hits', len(files) - len(missing))
+    count('timeline_cache.misses', len(missing))
+
+    if missing:
+        # Both sides' scored shots come from the xG cache or the materialized tables, never rescored here
+        total_shots = get_scored_shots(competition, division, conference, season, team,
+                                       match_ids=[match_id for match_id, _ in missing], view=None, model_path=model_path)
+        by_match = dict(iter(total_shots.groupby('MatchId', observed=True, sort=False))) if not total_shots.empty else {}
+        for match_id, key in missing:
+            match_shots = by_match.get(match_id)
+            if match_shots is None:
+                continue
+            timeline = match_timeline(match_shots, teams=[file['Team'] for file in files[match_id]])
+            timeline_cache.put(key, timeline)
+            timelines.append(timeline)
+
+    if not timelines:
+        return pd.DataFrame()
+    return concat_shots(timelines)
+
+
+@timed('get_player_comparison')
+def get_player_comparison(competition, division, model_path=DEFAULT_SCORER_PATH):
+    """Return the ranked and indexed player comparison of a division, rebuilt only when its season totals or rosters change."""
+    shot_store = get_shot_store()
+    match_data = get_match_data()
+    data_processor = get_data_processor(model_path)
+
+    # Fold in new or corrected matches first; the totals are only rewritten when something changed
+    count('player_totals.refreshed', shot_store.refresh_player_totals(data_processor, competition, division))
+    key = (competition, division, shot_store.totals_version(), tuple(sorted((match_data.signature or {}).items())),
+           data_processor.scorer.model_version)
+    comparison = comparison_cache.get(key)
+    if comparison is not None:
+        count('comparison_cache.hits')
+        return comparison
+    count('comparison_cache.misses')
+
+    metrics = player_metrics(shot_store.player_totals(competition, division), match_data.get_league_rosters(division))
+    comparison = PlayerComparison(metrics)
+    comparison_cache.put(key, comparison)
+    return comparison
+
+
+@timed('get_season_projection')
+def get_season_projection(competition, division, conference, season, n_sims=100000, seed=0, model_path=DEFAULT_SCORER_PATH):
+    """Return the simulated match and table projections of a conference season, reused while its fixtures and shots are unchanged."""
+    shot_store = get_shot_store()
+    match_data = get_match_data()
+    data_processor = get_data_processor(model_path)
+
+    # Unseeded projections are random by request, so only seeded ones are cached
+    key = None
+    if seed is not None:
+        files = tuple(sorted(file['sha256'] or '' for keys in shot_store.teams(competition, division, conference, season)
+                             for file in shot_store.match_files(*keys, view=None)))
+        fixtures = tuple(tuple(fixture.values()) for fixture in match_data.get_fixtures(conference, season))
+        key = (competition, division, conference, season, fixtures, files, data_processor.scorer.model_version, n_sims, seed)
+        projection = projection_cache.get(key)
+        if projection is not None:
+            count('projection_cache.hits')
+            return projection
+        count('projection_cache.misses')
+
+    fixtures = conference_fixtures(match_data, shot_store, data_processor, competition, division, conference, season)
+    projection = simulate_season(fixtures, n_sims=n_sims, seed=seed) if not fixtures.empty else None
+    if key is not None:
+        projection_cache.put(key, projection)
+    return projection
+
+
+def invalidate_xg(model_version=None):
+    """Drop cached xG frames, optionally only those scored with a given model version."""
+    return xg_cache.invalidate(None if model_version is None else lambda key: key[-1] == model_version)
+
+
+def invalidate_all():
+    """Drop the cached xG frames, grids, timelines, comparisons, projections and renders and the shared models, league metadata and shot store."""
+    with _singletons_lock:
+        _singletons.clear()
+    render_cache.invalidate()
+    grid_cache.invalidate()
+    timeline_cache.invalidate()
+    comparison_cache.invalidate()
+    projection_cache.invalidate()
+    return invalidate_xg()
+
+
+def xg_cache_memory():
+    """Return the deep memory use in MB of the scored shot frames held by the xG cache."""
+    return sum(int(frame.memory_usage(deep=True).sum()) for frame in xg_cache.values()) / 2**20
+
+
+def cache_stats():
+    """Return the xG, grid, timeline, comparison, projection and render cache counters, the attached published version and the names of the loaded shared instances."""
+    with _singletons_lock:
+        loaded = [key if isinstance(key, str) else key[0] for key in _singletons]
+        data_service = _singletons.get('data_service')
+    return {'xg_cache': {**xg_cache.stats(), 'MB': round(xg_cache_memory(), 2)}, 'grid_cache': grid_cache.stats(),
+            'timeline_cache': timeline_cache.stats(), 'comparison_cache': comparison_cache.stats(), 'projection_cache': projection_cache.stats(), 'render_cache': render_cache.stats(),
+            'data_service': data_service.stats() if data_service is not None else {'version': None, 'model_version': None, 'MB': 0.0}, 'singletons': loaded}
@@ -1,75 +1,268 @@
 import pandas as pd
 import numpy as np
-import pickle
-import sklearn
+from xg_scorer import XGScorer, DEFAULT_SCORER_PATH
+from instrumentation import count, timed
+
+# Summed columns of DataProcessing.shot_totals
+SHOT_TOTAL_COLUMNS = ['total_shots', 'non_penalty_shots', 'openplay_shots', 'goals', 'xG', 'non_penalty_xG']
+
+# Compact dtypes of shot frames, applied from the CSV read through scoring and aggregation
+CATEGORY_COLUMNS = ['H_A', 'Player', 'Event', 'Team', 'MatchId', 'Opponent', 'type', 'shotType', 'situation', 'outcome', 'shotBodyType']
+FLAG_COLUMNS = ['isLeftFooted', 'isRightFooted', 'isHead', 'isOtherBodyType', 'isRegularPlay', 'isThrowIn', 'isDirectFree',
+                'isFromCorner', 'isSetPiece', 'isOwnGoal', 'isPenalty', 'isGoal', 'isFoot']
+FLOAT32_COLUMNS = ['X', 'Y', 'x', 'y', 'X2', 'Y2', 'distance_to_goal', 'distance_to_center', 'angle', 'distance_of_pass', 'xG', 'xA']
+INT16_COLUMNS = ['Mins', 'Secs']
+
+
+def compact_shots(df):
+    """Cast a shot frame to the compact schema: categorical names and event parts, int8 flags, int16 clock and float32 coordinates and scores."""
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if column in CATEGORY_COLUMNS and not isinstance(dtype, pd.CategoricalDtype):
+            dtypes[column] = 'category'
+        elif column in FLAG_COLUMNS and dtype != np.int8:
+            dtypes[column] = np.int8
+        elif column in FLOAT32_COLUMNS and dtype != np.float32:
+            dtypes[column] = np.float32
+        elif column in INT16_COLUMNS and dtype != np.int16:
+            dtypes[column] = np.int16
+    return df.astype(dtypes) if dtypes else df
+
+
+def concat_shots(frames):
+    """Concatenate shot frames, unifying the categories of their categorical columns so the result stays compact."""
+    frames = [frame for frame in frames if len(frame.columns)]
+    if not frames:
+        return pd.DataFrame()
+
+    # pd.concat falls back to strings when categories differ, so give every frame the union of them first
+    unified = {}
+    for column in CATEGORY_COLUMNS:
+        dtypes = [frame[column].dtype for frame in frames if column in frame]
+        if len(dtypes) == len(frames) and all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            categories = dtypes[0].categories
+            for dtype in dtypes[1:]:
+                categories = categories.union(dtype.categories)
+            unified[column] = pd.CategoricalDtype(categories)
+    return pd.concat([frame.astype(unified) for frame in frames], ignore_index=True)
+
+
+def memory_report(df):
+    """Return the dtype and deep memory use of every column of a frame, largest first, with the total as the last row."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'MB': usage / 2**20}).sort_values('MB', ascending=False)
+    report.loc['total'] = ['', usage.sum() / 2**20]
+    return report.rename_axis('column')
 
 class DataProcessing:
-    def __init__(self, model_paths):
-        """Initialize the DataProcessing class with model paths."""
-        self.loaded_models = self._load_models(model_paths)
+    def __init__(self, model_path=DEFAULT_SCORER_PATH):
+        """Initialize the DataProcessing class with the exported xG model path."""
+        self.scorer = XGScorer(model_path)
+
+    def decode_events(self, events):
+        """Decode each distinct 'Event' string once into its parts and shot flags."""
+        codes, names = pd.factorize(events)
+        names = pd.Series(names, dtype=object)
+
+        # One row per distinct event, looked up by the integer codes
+        lookup = names.str.split(' ', n=3, expand=True).reindex(columns=range(4))
+        lookup.columns = ['type', 'shotType', 'situation', 'outcome']
+        lookup['shotRightFoot'] = lookup['shotType'] == 'Right'
+        lookup['shotLeftFoot'] = lookup['shotType'] == 'Left'
+        lookup['shotBodyType'] = np.where(lookup['shotType'] == 'Head', 'Head',
+                                          np.where(lookup['shotType'].isin(['Right', 'Left']), 'Foot', 'OtherBodyPart'))
+        lookup['throwIn'] = lookup['situation'] == 'ThrowIn'
+        lookup['goalOwn'] = names.str.contains('Own Goal', regex=False)
+        lookup['isGoal'] = lookup['outcome'] == 'Goal'
+        return codes, lookup
 
-    def _load_models(self, model_paths):
-        """Load machine learning models from disk."""
-        models = {}
-        for key, path in model_paths.items():
-            models[key] = pickle.load(open(path, 'rb'))
-        return models
+    def decode_coordinates(self, values):
+        """Parse each distinct coordinate string once, mapping the '-' placeholder to NaN."""
+        # Coordinates from shot_reader are already numeric with NaN for the placeholder
+        if pd.api.types.is_numeric_dtype(values):
+            return np.asarray(values, dtype=np.float64)
+
+        codes, names = pd.factorize(values)
+        parsed = pd.to_numeric(pd.Series(names, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+        # Missing values have code -1, which picks the trailing NaN
+        return np.append(parsed, np.nan)[codes]
 
     def data_preparation(self, df):
         """Prepare the data by creating multifeature attributes."""
-        df['isLeftFooted'] = np.where((df['shotRightFoot'] == False) & (df['shotLeftFoot'] == True), 1, 0)
-        df['isRightFooted'] = np.where((df['shotRightFoot'] == True) & (df['shotLeftFoot'] == False), 1, 0)
-        df['isHead'] = np.where(df['shotBodyType'] == 'Head', 1, 0)
-        df['isOtherBodyType'] = np.where(df['shotBodyType'] == 'OtherBodyPart', 1, 0)
-        df['isRegularPlay'] = np.where(df['situation'] == 'OpenPlay', 1, 0)
-        df['isThrowIn'] = np.where(df['throwIn'] == True, 1, 0)
-        df['isDirectFree'] = np.where(df['situation'] == 'DirectFreekick', 1, 0)
-        df['isFromCorner'] = np.where(df['situation'] == 'FromCorner', 1, 0)
-        df['isSetPiece'] = np.where(df['situation'] == 'SetPiece', 1, 0)
-        df['isOwnGoal'] = np.where(df['goalOwn'] == True, 1, 0)
-        df['isPenalty'] = np.where(df['situation'] == 'Penalty', 1, 0)
-        df['isGoal'] = np.where(df['isGoal'] == True, 1, 0)
+        shot_right = np.asarray(df['shotRightFoot'], dtype=bool)
+        shot_left = np.asarray(df['shotLeftFoot'], dtype=bool)
+        body_type = df['shotBodyType']
+        situation = df['situation']
 
-    def calc_xg(self, events_df):
-        """Calculate expected goals (xG) based on event data."""
-        # Splitting the 'Event' column into new columns
-        events_df[['type', 'shotType', 'situation', 'outcome']] = events_df['Event'].str.split(' ', expand=True)
+        features = {
+            'isLeftFooted': ~shot_right & shot_left,
+            'isRightFooted': shot_right & ~shot_left,
+            'isHead': np.asarray(body_type == 'Head'),
+            'isOtherBodyType': np.asarray(body_type == 'OtherBodyPart'),
+            'isRegularPlay': np.asarray(situation == 'OpenPlay'),
+            'isThrowIn': np.asarray(df['throwIn'], dtype=bool),
+            'isDirectFree': np.asarray(situation == 'DirectFreekick'),
+            'isFromCorner': np.asarray(situation == 'FromCorner'),
+            'isSetPiece': np.asarray(situation == 'SetPiece'),
+            'isOwnGoal': np.asarray(df['goalOwn'], dtype=bool),
+            'isPenalty': np.asarray(situation == 'Penalty'),
+            'isGoal': np.asarray(df['isGoal'], dtype=bool),
+        }
+        return {name: values.astype(np.int8) for name, values in features.items()}
 
-        # Rename the 'Event' column to 'type'
-        events_df.rename(columns={'X': 'x', 'Y': 'y'}, inplace=True)
+    def shot_features(self, events_df):
+        """Return the shot rows of event data with their decoded parts and the model features used for scoring and training."""
+        # Decode the events and keep only the shots before any feature work
+        codes, lookup = self.decode_events(events_df['Event'])
+        is_shot = np.append((lookup['type'] == 'Shot').to_numpy(dtype=bool), False)[codes]
+        codes = codes[is_shot]
 
-        # Creating new columns based on the split 'type' data
-        events_df['shotRightFoot'] = events_df['shotType'].apply(lambda x: True if x == 'Right' else False)
-        events_df['shotLeftFoot'] = events_df['shotType'].apply(lambda x: True if x == 'Left' else False)
-        events_df['shotBodyType'] = events_df['shotType'].apply(lambda x: 'Head' if x == 'Head' else ('Foot' if x in ['Right', 'Left'] else 'OtherBodyPart'))
-        events_df['throwIn'] = events_df['situation'].apply(lambda x: True if x == 'ThrowIn' else False)
-        events_df['goalOwn'] = events_df['Event'].apply(lambda x: True if 'Own Goal' in x else False)
-        events_df['isGoal'] = events_df['outcome'].apply(lambda x: True if x == 'Goal' else False)
+        # Copy the shot rows so the caller's DataFrame is left untouched
+        total_shots = events_df.loc[is_shot].rename(columns={'X': 'x', 'Y': 'y'}).reset_index(drop=True)
 
-        total_shots = events_df.loc[events_df['type'] == 'Shot'].reset_index(drop=True)
+        # Expand the decoded parts to the shot rows as categoricals and flags
+        decoded = {}
+        for name, values in lookup.items():
+            if values.dtype == bool:
+                decoded[name] = values.to_numpy()[codes]
+            else:
+                part_codes, part_names = pd.factorize(values)
+                decoded[name] = pd.Categorical.from_codes(part_codes[codes], categories=part_names)
 
         # Prepare data
-        self.data_preparation(total_shots)
+        features = self.data_preparation(decoded)
+
+        # Shot geometry on the 100 x 100 event pitch
+        x = total_shots['x'].to_numpy(dtype=np.float64)
+        y = total_shots['y'].to_numpy(dtype=np.float64)
+        dx = 100 - x
+        dy = np.abs(y - (100/2))
+        features['distance_to_goal'] = np.sqrt(dx**2 + dy**2)
+        features['distance_to_center'] = dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features['angle'] = np.absolute(np.degrees(np.arctan(dy / dx)))
+        features['isFoot'] = (((features['isLeftFooted'] == 1) | (features['isRightFooted'] == 1)) & (features['isHead'] == 0)).astype(np.int8)
+        return total_shots, decoded, features
+
+    @timed('calc_xg')
+    def calc_xg(self, events_df):
+        """Calculate expected goals (xG) of each shot and the xA of the pass assisting it in one pass over the event data."""
+        total_shots, decoded, features = self.shot_features(events_df)
+        x = total_shots['x'].to_numpy(dtype=np.float64)
+        y = total_shots['y'].to_numpy(dtype=np.float64)
+
+        # Score open play, set-piece and penalty shots in one pass
+        features['xG'] = self.scorer.score(features, features['isRegularPlay'] == 1, features['isPenalty'] == 1)
+
+        # The assisting pass runs from (X2, Y2) to the shot; shots logged with '-' had no recorded pass
+        if 'X2' in total_shots.columns and 'Y2' in total_shots.columns:
+            x2 = self.decode_coordinates(total_shots['X2'])
+            y2 = self.decode_coordinates(total_shots['Y2'])
+        else:
+            x2 = y2 = np.full(len(total_shots), np.nan)
+        has_pass = np.isfinite(x2) & np.isfinite(y2)
+        features['distance_of_pass'] = np.sqrt((x - x2)**2 + (y - y2)**2)
+
+        # xA belongs to the passer, who the shot rows do not name, so it stays a per-shot column and is never summed per player.
+        # Only the shot event is logged: the pass takes the situation of the shot, is scored as footed since its body part
+        # is unknown (the shooter's isFoot/isHead describe the shot), and is never a through ball since no event tags one
+        situation = decoded['situation']
+        pass_features = {
+            'distance_of_pass': features['distance_of_pass'],
+            'isOpenPlay': features['isRegularPlay'],
+            'isFoot': np.ones(len(total_shots), dtype=np.int8),
+            'isHead': np.zeros(len(total_shots), dtype=np.int8),
+            'isFreeKick': np.asarray(situation.isin(['Freekick', 'DirectFreekick'])),
+            'isCorner': np.asarray(situation.isin(['Corner', 'FromCorner'])),
+            'isThroughBall': np.zeros(len(total_shots), dtype=np.int8)
+        }
+        features['xA'] = self.scorer.score_xa(pass_features, has_pass)
+
+        count('calc_xg.shots', len(total_shots))
+
+        # Keep the decoded event parts but not their boolean flags, which the int8 features duplicate
+        parts = {name: values for name, values in decoded.items() if isinstance(values, pd.Categorical)}
+        parts.update(features)
+
+        # Raw CSV frames still hold the '-' placeholder, so the decoded pass origin replaces it before the float32 cast
+        if 'X2' in total_shots.columns and 'Y2' in total_shots.columns:
+            parts.update(X2=x2, Y2=y2)
+        return compact_shots(total_shots.assign(**parts))
+
+    @timed('load_xg')
+    def load_xg(self, shot_store, competition, division, conference, season, team, match_ids=None, view="Shots For"):
+        """Return scored shots from the materialized xG, scoring and materializing only stale or missing matches."""
+        model_version = self.scorer.model_version
+        scored, stale = shot_store.read_scored(competition, division, conference, season, team, model_version,
+                                               match_ids=match_ids, view=view)
+        if not stale:
+            return scored
+
+        # Score both sides of each stale match so its materialized table is complete
+        shot_events = shot_store.read(competition, division, conference, season, team, match_ids=stale, view=None)
+        total_shots = self.calc_xg(shot_events.drop(columns=['Opponent']))
+        shot_store.write_scored(competition, division, conference, season, team, total_shots, model_version)
+
+        if view is not None:
+            total_shots = total_shots[(total_shots['Team'] == team) == (view == "Shots For")]
+        return concat_shots([scored, total_shots])
+
+    @staticmethod
+    def shot_totals(total_shots, group_by=('Player',)):
+        """Sum shots, goals and xG of scored shots per group using only built-in numeric reductions."""
+        # Sum only the key and value columns, widened so float32 scores and int8 flags add up without loss or overflow
+        is_penalty = total_shots['isPenalty'].to_numpy() == 1
+        xg = total_shots['xG'].to_numpy(dtype=np.float64)
+        shots = pd.DataFrame({column: total_shots[column] for column in group_by}).assign(
+            isNonPenalty=(~is_penalty).astype(np.int64),
+            isRegularPlay=total_shots['isRegularPlay'].to_numpy(dtype=np.int64),
+            isGoal=total_shots['isGoal'].to_numpy(dtype=np.int64),
+            xG=xg,
+            non_penalty_xG=np.where(is_penalty, 0.0, xg)
+        )
+
+        return (
+            shots.groupby(list(group_by), observed=True, sort=False)
+            .agg(
+                total_shots=("xG", "size"),
+                non_penalty_shots=("isNonPenalty", "sum"),
+                openplay_shots=("isRegularPlay", "sum"),
+                goals=("isGoal", "sum"),
+                xG=("xG", "sum"),
+                non_penalty_xG=("non_penalty_xG", "sum"),
+            )
+            .reset_index()
+        )
 
-        total_shots['distance_to_goal'] = np.sqrt(((100 - total_shots['x'])**2) + ((total_shots['y'] - (100/2))**2))
-        total_shots['distance_to_center'] = abs(total_shots['y'] - 100/2)
-        total_shots['angle'] = np.absolute(np.degrees(np.arctan((abs((100/2) - total_shots['y'])) / (100 - total_shots['x']))))
-        total_shots['isFoot'] = np.where(((total_shots['isLeftFooted'] == 1) | (total_shots['isRightFooted'] == 1)) & (total_shots['isHead'] == 0), 1, 0)
+    def rank_leaders(self, summary_df, sort_by='xG', top_n=None):
+        """Add the per-shot rates to summed shot totals, then sort and keep the top players."""
+        summary_df = summary_df.copy()
 
-        features_op = ['distance_to_goal', 'angle', 'isFoot', 'isHead']
-        features_non_op = ['distance_to_goal', 'angle', 'isFoot', 'isHead', 'isDirectFree', 'isSetPiece', 'isFromCorner']
+        # Per-shot rates, 0 where a player has no shots of that kind
+        def per_shot(numerator, denominator):
+            numerator = summary_df[numerator].to_numpy(dtype=np.float64)
+            denominator = summary_df[denominator].to_numpy(dtype=np.float64)
+            return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
 
-        # Open play shots
-        total_shots_op = total_shots.loc[total_shots['isRegularPlay'] == 1]
-        shots_df_op = total_shots_op[features_op]
-        total_shots.loc[total_shots['isRegularPlay'] == 1, 'xG'] = self.loaded_models['op'].predict_proba(shots_df_op)[:, 1]
+        summary_df.insert(summary_df.columns.get_loc("goals") + 1, "goals_per_shot", per_shot("goals", "total_shots"))
+        summary_df.insert(summary_df.columns.get_loc("xG") + 1, "xG_per_shot", per_shot("xG", "total_shots"))
+        summary_df["non_penalty_xG_per_shot"] = per_shot("non_penalty_xG", "non_penalty_shots")
+        summary_df["goals_minus_xG"] = summary_df["goals"] - summary_df["xG"]
 
-        # Set-piece shots (excluding penalties)
-        total_shots_non_op = total_shots.loc[(total_shots['isRegularPlay'] == 0) & (total_shots['isPenalty'] == 0)]
-        shots_df_non_op = total_shots_non_op[features_non_op]
-        total_shots.loc[(total_shots['isRegularPlay'] == 0) & (total_shots['isPenalty'] == 0), 'xG'] = self.loaded_models['non_op'].predict_proba(shots_df_non_op)[:, 1]
+        if sort_by is not None:
+            summary_df = summary_df.sort_values(sort_by, ascending=False, kind='stable')
+        if top_n is not None:
+            summary_df = summary_df.head(top_n)
+        return summary_df.reset_index(drop=True)
 
-        # Penalty shots
-        total_shots.loc[total_shots['isPenalty'] == 1, 'xG'] = 0.79
+    @timed('shot_leaders')
+    def shot_leaders(self, total_shots, group_by=('Player',), sort_by='xG', top_n=None):
+        """Aggregate scored shots per player in one groupby using only built-in numeric reductions."""
+        return self.rank_leaders(self.shot_totals(total_shots, group_by), sort_by=sort_by, top_n=top_n)
 
-        return total_shots
\ No newline at end of file
+    @timed('leaders_from_totals')
+    def leaders_from_totals(self, player_totals, group_by=('Player',), sort_by='xG', top_n=None):
+        """Rank players from maintained season totals, summing them over the groups that are not kept."""
+        summary_df = player_totals.groupby(list(group_by), observed=True, sort=False)[SHOT_TOTAL_COLUMNS].sum().reset_index()
+        return self.rank_leaders(summary_df, sort_by=sort_by, top_n=top_n)
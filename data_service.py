@@ -0,0 +1,310 @@
+###################################################################
+# Shared read-only data layer: the ingest pipeline publishes the
+# scored shots, season totals and league metadata as versioned Arrow
+# IPC files, and every session and worker process memory-maps the
+# current version instead of loading its own copy. Publish from the
+# repository root with:
+#
+#   python data_service.py
+###################################################################
+# Data manipulation packages
+import pandas as pd
+
+# File handling packages
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Columnar storage packages
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# External Packages
+from data_processing import SHOT_TOTAL_COLUMNS, concat_shots
+from instrumentation import count, timed
+from shot_store import PARTITION_KEYS, TOTALS_KEYS
+
+###################################################################
+
+# Kept beside the shot store rather than in it, since a store rebuild wipes the store directory while sessions still map these files
+DEFAULT_PUBLISH_DIR = Path(__file__).parent / 'Published Data'
+
+# Layout of a published version; bumping it publishes a new version even when the data is unchanged
+PUBLISH_FORMAT = '2'
+
+# Pointer to the current version, swapped atomically by every publish
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# Uncompressed IPC files of a version, so readers map them instead of decoding them
+TABLE_FILES = {
+    'scored': 'scored_shots.arrow',
+    'totals': 'player_totals.arrow',
+    'rosters': 'rosters.arrow',
+    'matches': 'team_matches.arrow',
+}
+
+# Partition columns added to the published scored shots; folder is the team folder that stored the match
+SCORED_KEYS = PARTITION_KEYS[:4] + ['folder']
+
+# Columns of the league tables
+ROSTER_COLUMNS = ['Conference', 'Team', 'Player', 'Position', 'Appearances']
+MATCH_COLUMNS = ['Conference', 'Team', 'Season', 'MatchId', 'Opponent', 'H_A', 'Home Team', 'Away Team', 'Home Score', 'Away Score']
+
+# Versions kept on disk, so readers still attached to the previous one are not cut off
+KEEP_VERSIONS = 2
+
+
+def _in_scope(rel_path, wanted):
+    """Check whether a match folder belongs to a scope of partition values, None matching any (private method)."""
+    return all(value is None or value == key for value, key in zip(wanted, rel_path.split('/')))
+
+
+def _write_table(frame, path):
+    """Write a frame as a single-batch, uncompressed Arrow IPC file (private method)."""
+    table = pa.Table.from_pandas(frame, preserve_index=False).combine_chunks()
+    with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _map_table(path):
+    """Memory-map an Arrow IPC file read-only; the table's buffers point into the mapping, so nothing is copied (private method)."""
+    return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+
+def _scored_table(shot_store, sources):
+    """Stack the materialized xG of every stored match folder and return it with each folder's row range (private method)."""
+    frames = []
+    ranges = {}
+    offset = 0
+    for rel_path in sources:
+        total_shots = shot_store.read_match_scored(rel_path)
+        frames.append(total_shots.assign(**dict(zip(SCORED_KEYS, rel_path.split('/')))))
+        ranges[rel_path] = [offset, len(total_shots)]
+        offset += len(total_shots)
+
+    total_shots = concat_shots(frames)
+    if not total_shots.empty:
+        total_shots[SCORED_KEYS] = total_shots[SCORED_KEYS].astype('category')
+    return total_shots, ranges
+
+
+def _league_tables(match_data):
+    """Flatten the league rosters and every team's season matches into two tables (private method)."""
+    rows = [
+        {'Conference': conference_name, 'Team': team_name, 'Season': season, **match}
+        for conference_name in match_data.get_conference_names()
+        for team_name in match_data.get_team_names(conference_name)
+        for season in match_data.get_seasons(conference_name)
+        for match in match_data.get_match_data(conference_name, team_name, season)
+    ]
+    # The filtered key columns repeat on every row, so they are dictionary encoded
+    rosters = match_data.get_league_rosters()[ROSTER_COLUMNS].astype({'Conference': 'category', 'Team': 'category'})
+    matches = pd.DataFrame(rows, columns=MATCH_COLUMNS).astype({'Conference': 'category', 'Team': 'category', 'Season': 'category'})
+    return rosters, matches
+
+
+@timed('data_service.publish')
+def publish(shot_store, data_processor, match_data, publish_dir=DEFAULT_PUBLISH_DIR, keep=KEEP_VERSIONS):
+    """Publish the scored shots, season totals and league metadata as a new version and swap it in, returning its manifest."""
+    publish_dir = Path(publish_dir)
+    model_version = data_processor.scorer.model_version
+
+    # Every match is scored and folded into the totals for this model before anything is written
+    shot_store.materialize(data_processor)
+    for competition, division in sorted({keys[:2] for keys in shot_store.teams()}):
+        shot_store.refresh_player_totals(data_processor, competition, division)
+
+    # Identical inputs give an identical version, so an unchanged tree is not written again
+    sources = shot_store.match_sources()
+    digest = hashlib.sha256(json.dumps([PUBLISH_FORMAT, model_version, sources, match_data.signature], sort_keys=True).encode())
+    version = digest.hexdigest()[:12]
+    version_dir = publish_dir / version
+
+    if not (version_dir / MANIFEST_FILE).exists():
+        tmp_dir = publish_dir / f'{version}.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        scored, ranges = _scored_table(shot_store, sources)
+        totals = [shot_store.player_totals(competition, division) for competition, division in sorted({keys[:2] for keys in shot_store.teams()})]
+        totals = pd.concat(totals, ignore_index=True) if totals else pd.DataFrame(columns=TOTALS_KEYS + SHOT_TOTAL_COLUMNS)
+        rosters, matches = _league_tables(match_data)
+        for name, frame in [('scored', scored), ('totals', totals), ('rosters', rosters), ('matches', matches)]:
+            _write_table(frame, tmp_dir / TABLE_FILES[name])
+
+        manifest = {
+            'version': version,
+            'format': PUBLISH_FORMAT,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'model_version': model_version,
+            'league': match_data.signature,
+            'sources': sources,
+            'ranges': ranges,
+            'rows': {'scored': len(scored), 'totals': len(totals), 'rosters': len(rosters), 'matches': len(matches)},
+        }
+        with open(tmp_dir / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        shutil.rmtree(version_dir, ignore_errors=True)
+        os.replace(tmp_dir, version_dir)
+        count('data_service.published')
+
+    # Readers see either the old or the new pointer, never a partly written version, and are left alone when it is unchanged
+    current_path = publish_dir / CURRENT_FILE
+    if not current_path.exists() or current_path.read_text().strip() != version:
+        tmp_path = current_path.with_suffix('.tmp')
+        tmp_path.write_text(version)
+        os.replace(tmp_path, current_path)
+
+    # Older versions are dropped; a process still mapping one keeps its files until it re-attaches
+    versions = sorted((path for path in publish_dir.iterdir() if path.is_dir() and path.name != version and not path.name.endswith('.tmp')),
+                      key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    for path in versions[max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    with open(version_dir / MANIFEST_FILE, 'r') as f:
+        return json.load(f)
+
+
+class PublishedData:
+    def __init__(self, version_dir):
+        """Initialize the PublishedData class by memory-mapping the tables of one published version."""
+        self.version_dir = Path(version_dir)
+        with open(self.version_dir / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+        self.version = manifest['version']
+        self.model_version = manifest['model_version']
+        self.league = manifest['league']
+        self.sources = manifest['sources']
+        self._ranges = manifest['ranges']
+        self.tables = {name: _map_table(self.version_dir / file_name) for name, file_name in TABLE_FILES.items()}
+
+        # {(competition, division, conference, season, team folder): {match id: rel path}} of the published matches
+        self._matches = {}
+        for rel_path in self._ranges:
+            keys = rel_path.split('/')
+            self._matches.setdefault(tuple(keys[:-1]), {})[keys[-1].partition('_')[0]] = rel_path
+
+    def mapped_bytes(self):
+        """Return the size of the memory-mapped tables, shared by every process attached to this version."""
+        return sum(table.nbytes for table in self.tables.values())
+
+    def match_sources(self, competition=None, division=None, conference=None, season=None, team=None):
+        """Return {rel path: {file name: sha256}} of the published match folders in scope, to compare with the shot store's."""
+        wanted = [competition, division, conference, season, team]
+        return {rel_path: files for rel_path, files in self.sources.items() if _in_scope(rel_path, wanted)}
+
+    def _filter(self, name, conditions):
+        """Select the rows of a mapped table whose columns equal the given values, None matching any (private method)."""
+        table = self.tables[name]
+        mask = None
+        for column, value in conditions.items():
+            if value is not None:
+                equal = pc.equal(table[column], value)
+                mask = equal if mask is None else pc.and_(mask, equal)
+        return table if mask is None else table.filter(mask)
+
+    @timed('data_service.scored_shots')
+    def scored_shots(self, competition, division, conference, season, team, match_ids=None, view="Shots For"):
+        """Return the published scored shots of a team's matches, slicing each match straight out of the mapped table."""
+        matches = self._matches.get((competition, division, conference, season, team), {})
+        match_ids = None if match_ids is None else set(match_ids)
+        slices = [self.tables['scored'].slice(*self._ranges[rel_path]) for match_id, rel_path in matches.items()
+                  if match_ids is None or match_id in match_ids]
+        if not slices:
+            return pd.DataFrame()
+
+        table = pa.concat_tables(slices)
+        if view is not None:
+            is_team = pc.equal(table['Team'], team)
+            table = table.filter(is_team if view == "Shots For" else pc.invert(is_team))
+        count('data_service.rows_read', table.num_rows)
+        return table.drop_columns(SCORED_KEYS).to_pandas()
+
+    def player_totals(self, competition, division, conference=None, season=None, team=None):
+        """Return the published season totals per shooting team and player, optionally filtered."""
+        conditions = {'competition': competition, 'division': division, 'conference': conference, 'season': season, 'Team': team}
+        # Versions published while xA was still summed per shooter carry it as an extra column
+        return self._filter('totals', conditions).select(TOTALS_KEYS + SHOT_TOTAL_COLUMNS).to_pandas()
+
+    def team_matches(self, conference_name, team_name, season):
+        """Return a team's matches of a season in the same records as MatchData.get_match_data."""
+        matches = self._filter('matches', {'Conference': conference_name, 'Team': team_name, 'Season': season})
+        return matches.drop_columns(['Conference', 'Team', 'Season']).to_pylist()
+
+    def team_roster(self, conference_name, team_name):
+        """Return a team's roster as a DataFrame with Player, Position, and Appearances, like MatchData.get_player_data."""
+        roster = self._filter('rosters', {'Conference': conference_name, 'Team': team_name})
+        return roster.drop_columns(['Conference', 'Team']).to_pandas() if roster.num_rows else pd.DataFrame()
+
+
+class DataService:
+    def __init__(self, publish_dir=DEFAULT_PUBLISH_DIR):
+        """Initialize the DataService class with the directory the ingest pipeline publishes versions to."""
+        self.publish_dir = Path(publish_dir)
+        self.current_path = self.publish_dir / CURRENT_FILE
+        self._attached = (None, None)
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Return the current published version, re-attaching only after a publish has swapped the pointer, or None before the first."""
+        try:
+            stat = self.current_path.stat()
+        except FileNotFoundError:
+            return None
+        token = (stat.st_mtime_ns, stat.st_ino)
+        if self._attached[0] != token:
+            with self._lock:
+                if self._attached[0] != token:
+                    self._attached = (token, self._attach())
+        return self._attached[1]
+
+    @timed('data_service.attach')
+    def _attach(self):
+        """Map the version the pointer names; queries already holding the previous version finish on it (private method)."""
+        try:
+            published = PublishedData(self.publish_dir / self.current_path.read_text().strip())
+        except (OSError, KeyError, json.JSONDecodeError, pa.ArrowException) as e:
+            print(f"Warning: could not attach published data in {self.publish_dir}: {e}")
+            return None
+        count('data_service.attached')
+        return published
+
+    def stats(self):
+        """Return the attached version, its model version and the size of its mapped tables, without re-attaching."""
+        published = self._attached[1]
+        if published is None:
+            return {'version': None, 'model_version': None, 'MB': 0.0}
+        return {'version': published.version, 'model_version': published.model_version, 'MB': round(published.mapped_bytes() / 2**20, 2)}
+
+
+def main():
+    """Ingest the Competitions tree, score stale matches and publish a new shared data version."""
+    import argparse
+    from data_processing import DataProcessing
+    from match_data import MatchData
+    from shot_store import ShotStore
+    from xg_scorer import resolve_model
+
+    parser = argparse.ArgumentParser(description="Publish the scored shots and league metadata as memory-mapped Arrow files.")
+    parser.add_argument('--model', default=None, help="Exported xG model file (default: the current model version).")
+    parser.add_argument('--output-dir', default=str(DEFAULT_PUBLISH_DIR), help="Directory of the published versions.")
+    parser.add_argument('--keep', type=int, default=KEEP_VERSIONS, help="Published versions kept on disk.")
+    args = parser.parse_args()
+
+    shot_store = ShotStore()
+    summary = shot_store.ingest()
+    for rel_path, error in summary['errors'].items():
+        print(f"Warning: could not ingest {rel_path}: {error}")
+
+    manifest = publish(shot_store, DataProcessing(args.model or resolve_model()), MatchData(), args.output_dir, keep=args.keep)
+    rows = ' | '.join(f"{name}: {rows}" for name, rows in manifest['rows'].items())
+    print(f"Published data version {manifest['version']} (xG model {manifest['model_version']}) | {rows}")
+
+
+if __name__ == "__main__":
+    main()
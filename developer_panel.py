@@ -0,0 +1,72 @@
+###################################################################
+# Data visualization packages
+import streamlit as st
+
+# Data manipulation packages
+import pandas as pd
+
+# System packages
+import os
+
+# External Packages
+from caching import cache_stats
+from instrumentation import configure_logging, start_trace, finish_trace, record_error, stage_totals
+
+###################################################################
+
+def developer_mode():
+    """Check whether the developer panel is enabled with UPSL_DEV=1 or the ?dev=1 query parameter."""
+    return os.environ.get('UPSL_DEV') == '1' or st.query_params.get('dev') == '1'
+
+def begin_page(page):
+    """Start tracing a page rerun, profiling it when requested from the developer panel."""
+    configure_logging()
+    profile = developer_mode() and st.session_state.get('dev_profile', False)
+    return start_trace(page, profile=profile)
+
+def show_error(error):
+    """Record a page failure and show a generic message, with the exception itself only in the developer panel."""
+    record_error(error)
+    st.error("Something went wrong while loading this page. Please try again later.")
+    if developer_mode():
+        st.exception(error)
+
+def end_page(trace):
+    """Finish the page rerun and show its stage breakdown in the developer panel."""
+    record = finish_trace(trace)
+    if not developer_mode():
+        return
+
+    with st.sidebar.expander("Developer", expanded=True):
+        st.checkbox("Profile next rerun (cProfile)", key='dev_profile')
+        st.caption(f"Rerun {record['request_id']}: {record['seconds'] * 1000:.0f} ms")
+
+        # Nested stages are indented under the stage that called them
+        stages = pd.DataFrame(record['stages'], columns=['stage', 'depth', 'seconds'])
+        stages['stage'] = stages['depth'].map(lambda depth: '\u2003' * depth) + stages['stage']
+        stages['ms'] = (stages['seconds'] * 1000).round(1)
+        st.dataframe(stages[['stage', 'ms']], hide_index=True)
+
+        if record['counters']:
+            st.dataframe(pd.DataFrame(list(record['counters'].items()), columns=['counter', 'value']), hide_index=True)
+        if record['error']:
+            st.error(record['error'])
+        if trace.profile:
+            st.code(trace.profile)
+
+        # Scored shot frames held for every session of this process
+        xg_stats = cache_stats()['xg_cache']
+        st.caption(f"xG cache: {xg_stats['entries']} match files, {xg_stats['MB']:.1f} MB")
+
+        # Published version mapped read-only and shared with every process on the host
+        published = cache_stats()['data_service']
+        if published['version']:
+            st.caption(f"Published data: {published['version']} (xG model {published['model_version']}), {published['MB']:.1f} MB mapped")
+
+        # Totals since the process started, across every session
+        totals = pd.DataFrame.from_dict(stage_totals(), orient='index').rename_axis('stage').reset_index()
+        if not totals.empty:
+            totals['mean_ms'] = (totals['seconds'] / totals['calls'] * 1000).round(1)
+            totals['max_ms'] = (totals['max_seconds'] * 1000).round(1)
+            st.caption("Process totals")
+            st.dataframe(totals[['stage', 'calls', 'mean_ms', 'max_ms']], hide_index=True)
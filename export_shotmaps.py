@@ -0,0 +1,198 @@
+###################################################################
+# Batch export of the team and player shot maps of every stored
+# team to PNG and PDF, run from the repository root:
+#
+#   python export_shotmaps.py --workers 8 --formats png pdf
+###################################################################
+# Concurrency and file handling packages
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+# External Packages
+from data_processing import DataProcessing
+from match_data import MatchData
+from shot_store import ShotStore
+from xg_scorer import resolve_model
+
+###################################################################
+
+DEFAULT_OUTPUT_DIR = Path(__file__).parent / 'Shot Map Exports'
+INDEX_FILE = 'index.json'
+VIEWS = ["Shots For", "Shots Against"]
+
+# Bumped when the look of the exported maps changes, so every map is rendered again
+EXPORT_VERSION = 1
+
+# Same styling as the dashboard
+STYLE = {'pitchcolor': '#1d2849', 'shot_color': 'gray', 'titlecolor': 'w', 'team_color': 'w', 'fontfamily': 'Segoe UI'}
+
+# Worker state built once per process by the pool initializer
+_worker = {}
+
+
+def _init_worker(store_dir, model_path):
+    """Select the headless backend and load the store, model and plotting modules once per worker (private method)."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from visuals import FootballVisuals
+
+    _worker['shot_store'] = ShotStore(store_dir=store_dir)
+    _worker['data_processor'] = DataProcessing(model_path)
+    _worker['visuals'] = FootballVisuals(model_path=model_path)
+    _worker['shots'] = {}
+
+
+def _team_shots(keys, view):
+    """Return the scored shots of a team and view, loaded once per worker (private method)."""
+    if (keys, view) not in _worker['shots']:
+        _worker['shots'][(keys, view)] = _worker['data_processor'].load_xg(_worker['shot_store'], *keys, view=view)
+    return _worker['shots'][(keys, view)]
+
+
+def _render(job):
+    """Render one shot map to every requested format in a worker process (private method)."""
+    import matplotlib.pyplot as plt
+    from mplsoccer import VerticalPitch
+
+    total_shots = _team_shots(job['keys'], job['view'])
+    pitch = VerticalPitch(pitch_type='statsbomb', pitch_color=STYLE['pitchcolor'], line_color='w', half=True, pad_top=20, pad_right=20)
+    fig, ax = pitch.draw(figsize=(8, 10))
+    try:
+        _worker['visuals'].createShotmap(total_shots, fig=fig, ax=ax, pitch=pitch, team=job['keys'][4], players=job['player'],
+                                         view=job['view'], competition=job['keys'][0], season_year=job['keys'][3], **STYLE)
+        for path in job['files']:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(path).with_name(Path(path).name + '.tmp')
+            fig.savefig(tmp_path, format=Path(path).suffix[1:], dpi=200, bbox_inches='tight')
+            os.replace(tmp_path, path)
+    finally:
+        plt.close(fig)
+    return job
+
+
+def _output_stem(output_dir, keys, view, player):
+    """Return the output path without extension of one shot map (private method)."""
+    parts = [quote(value, safe=' ') for value in list(keys) + [view, player]]
+    return Path(output_dir).joinpath(*parts)
+
+
+def plan_exports(shot_store, match_data, data_processor, output_dir=DEFAULT_OUTPUT_DIR, formats=('png', 'pdf'), conference=None, season=None):
+    """List one job per team, view and player with shots, fingerprinted by its inputs."""
+    jobs = []
+    for keys in shot_store.teams(conference=conference, season=season):
+        roster = match_data.get_team_roster(conference_name=keys[2], team_name=keys[4])
+        for view in VIEWS:
+            files = shot_store.match_files(*keys, view=view)
+            if not files:
+                continue
+
+            # The map changes only when a match file, the model or the export look changes
+            digest = hashlib.sha256(json.dumps([EXPORT_VERSION, STYLE, data_processor.scorer.model_version,
+                                                sorted(file['sha256'] or '' for file in files)]).encode()).hexdigest()
+
+            # Players only have maps of their own team's shots
+            players = ["All Players"]
+            if view == "Shots For":
+                shooters = set(shot_store.read(*keys, view=view)['Player'])
+                players += [player for player in roster if player in shooters]
+
+            for player in players:
+                stem = _output_stem(output_dir, keys, view, player)
+                jobs.append({
+                    'id': '/'.join(list(keys) + [view, player]),
+                    'keys': tuple(keys),
+                    'view': view,
+                    'player': player,
+                    'fingerprint': f'{digest}:{player}',
+                    # Player names may contain dots, which with_suffix would take for an extension and cut off
+                    'files': [str(stem.with_name(f'{stem.name}.{fmt}')) for fmt in formats]
+                })
+    return jobs
+
+
+def _load_index(output_dir):
+    """Load the export index of an earlier run (private method)."""
+    try:
+        with open(Path(output_dir) / INDEX_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(output_dir, index):
+    """Write the export index atomically (private method)."""
+    path = Path(output_dir) / INDEX_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def export_shotmaps(output_dir=DEFAULT_OUTPUT_DIR, model_path=None, formats=('png', 'pdf'), workers=None,
+                    full=False, conference=None, season=None, progress=print):
+    """Render every changed team and player shot map in a process pool, by default with the current model version, and return the export index."""
+    model_path = model_path or resolve_model()
+    shot_store = ShotStore()
+    data_processor = DataProcessing(model_path)
+    shot_store.ingest()
+
+    # Score stale matches here once, so the workers only read materialized xG
+    shot_store.materialize(data_processor)
+
+    jobs = plan_exports(shot_store, MatchData(), data_processor, output_dir, formats, conference, season)
+    index = {} if full else _load_index(output_dir)
+    pending = [job for job in jobs if full or index.get(job['id'], {}).get('fingerprint') != job['fingerprint']
+               or not all(Path(path).exists() for path in job['files'])]
+    progress(f"Shot maps: {len(jobs)} | Unchanged: {len(jobs) - len(pending)} | To render: {len(pending)}")
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker,
+                                 initargs=(str(shot_store.store_dir), str(model_path))) as executor:
+            futures = [executor.submit(_render, job) for job in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                job = future.result()
+                index[job['id']] = {
+                    'competition': job['keys'][0], 'division': job['keys'][1], 'conference': job['keys'][2],
+                    'season': job['keys'][3], 'team': job['keys'][4], 'view': job['view'], 'player': job['player'],
+                    'fingerprint': job['fingerprint'],
+                    'files': [os.path.relpath(path, output_dir) for path in job['files']],
+                    'rendered_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+                }
+                progress(f"[{done}/{len(futures)}] {job['id']} ({time.perf_counter() - start:.1f}s)")
+    finally:
+        # Keep what was rendered even if the run is interrupted, and forget maps that no longer exist
+        planned = {job['id'] for job in jobs}
+        index = {key: entry for key, entry in index.items() if key in planned}
+        _save_index(output_dir, index)
+    return index
+
+
+def main():
+    """Export the team and player shot maps of every stored team."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the team and player shot maps of every stored team.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core).")
+    parser.add_argument('--formats', nargs='+', default=['png', 'pdf'], choices=['png', 'pdf', 'svg'])
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT_DIR), help="Directory of the exported maps and index.json.")
+    parser.add_argument('--conference', default=None, help="Only export this conference.")
+    parser.add_argument('--season', default=None, help="Only export this season.")
+    parser.add_argument('--full', action='store_true', help="Render every map even if its inputs have not changed.")
+    parser.add_argument('--model', default=None, help="Exported xG model file (default: the current model version).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = export_shotmaps(args.output, args.model, tuple(args.formats), args.workers, args.full, args.conference, args.season)
+    print(f"Exported index of {len(index)} shot maps to {Path(args.output) / INDEX_FILE} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
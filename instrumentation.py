@@ -0,0 +1,172 @@
+###################################################################
+# Timing and logging packages
+import contextvars
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+###################################################################
+
+logger = logging.getLogger('upsl')
+
+# Trace of the page rerun running in the current thread, if any
+_current_trace = contextvars.ContextVar('upsl_trace', default=None)
+
+# Process-wide totals per stage across every rerun and session
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self, page, profile=False):
+        """Initialize the Trace class for one rerun of a page."""
+        self.page = page
+        self.request_id = uuid.uuid4().hex[:12]
+        self.stages = []
+        self.counters = {}
+        self.error = None
+        self.profile = None
+        self._depth = 0
+        self._profiler = None
+        self._start = time.perf_counter()
+        self.seconds = None
+
+        # cProfile only sees the thread that runs the page
+        if profile:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._profiler = profiler
+            except ValueError:
+                # Another rerun of this process is being profiled, so this one runs without
+                pass
+
+    def finish(self):
+        """Stop the clock and the profiler and return the rerun as a log record."""
+        self.seconds = time.perf_counter() - self._start
+
+        # Disabled before anything else, so a failing report never leaves the profiler running
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            import io
+            import pstats
+
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(30)
+            self.profile = stream.getvalue()
+        return self.record()
+
+    def record(self):
+        """Return the rerun as a JSON-serializable dict."""
+        return {
+            'event': 'page_rerun',
+            'page': self.page,
+            'request_id': self.request_id,
+            'seconds': round(self.seconds, 6) if self.seconds is not None else None,
+            'stages': [{**stage, 'seconds': round(stage['seconds'], 6)} for stage in self.stages],
+            'counters': dict(self.counters),
+            'error': self.error,
+            'profiled': self.profile is not None
+        }
+
+
+def configure_logging(level=logging.INFO):
+    """Write the 'upsl' JSON log lines to stderr, once per process."""
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+
+def start_trace(page, profile=False):
+    """Start tracing a page rerun in the current thread and return its Trace."""
+    trace = Trace(page, profile=profile)
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace):
+    """Finish a page rerun and write it as one JSON log line."""
+    record = trace.finish()
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+    logger.info(json.dumps(record, default=str))
+    return record
+
+
+def current_trace():
+    """Return the Trace of the rerun running in the current thread, or None."""
+    return _current_trace.get()
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage, recording it in the current rerun and the process-wide totals."""
+    trace = _current_trace.get()
+    entry = None
+    if trace is not None:
+        entry = {'stage': name, 'depth': trace._depth, 'seconds': 0.0}
+        trace.stages.append(entry)
+        trace._depth += 1
+
+    start = time.perf_counter()
+    try:
+        yield entry
+    finally:
+        seconds = time.perf_counter() - start
+        if trace is not None:
+            entry['seconds'] = seconds
+            trace._depth -= 1
+        with _totals_lock:
+            totals = _totals.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            totals['calls'] += 1
+            totals['seconds'] += seconds
+            totals['max_seconds'] = max(totals['max_seconds'], seconds)
+
+
+def timed(name):
+    """Decorate a function so every call is recorded as a stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Add to a counter of the current rerun, such as cache hits or rows read."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + value
+
+
+def record_error(error):
+    """Record an exception on the current rerun and log it with its traceback."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.error = f'{type(error).__name__}: {error}'
+    logger.error(json.dumps({
+        'event': 'page_error',
+        'page': trace.page if trace is not None else None,
+        'request_id': trace.request_id if trace is not None else None,
+        'error': f'{type(error).__name__}: {error}',
+        'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+    }))
+
+
+def stage_totals():
+    """Return the call count, total and maximum time of every stage since the process started."""
+    with _totals_lock:
+        return {name: dict(totals) for name, totals in _totals.items()}
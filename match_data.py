@@ -1,96 +1,264 @@
 import pandas as pd
 import json
+import os
+import pickle
+import struct
+import threading
 from pathlib import Path
+from instrumentation import timed
+
+# Snapshot file layout: magic, header length, pickled header, pickled conference blobs
+SNAPSHOT_MAGIC = b'UPSLIDX2'
+SNAPSHOT_HEADER = struct.Struct('<8sQ')
 
 class MatchData:
-    def __init__(self):
-        """Initialize the MatchData class with UPSL data and match definitions."""
-        self.upsl_data = self._load_upsl_data()
+    def __init__(self, json_path=None, snapshot_path=None):
+        """Initialize the MatchData class with the UPSL league indexes."""
+        self.json_path = Path(json_path) if json_path else Path(__file__).parent / 'upsl_data.json'
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else self.json_path.with_suffix('.snapshot')
+        self._conferences = {}
+        self._player_teams = None
+        self._lock = threading.Lock()
+        self._header, self._header_bytes = self._load_snapshot_header()
+
+    @property
+    def upsl_data(self):
+        """The raw UPSL data parsed from the JSON file."""
+        return self._load_upsl_data()
 
+    @timed('match_data.parse_json')
     def _load_upsl_data(self):
         """Load the UPSL data from the JSON file (private method)."""
-        json_path = Path(__file__).parent / 'upsl_data.json'
         try:
-            with open(json_path, 'r') as f:
+            with open(self.json_path, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
-            print(f"Warning: UPSL data file not found at {json_path}")
+            print(f"Warning: UPSL data file not found at {self.json_path}")
             return {}
 
+    def _source_signature(self):
+        """Return the size and mtime of the JSON file used to detect a stale snapshot (private method)."""
+        try:
+            stat = self.json_path.stat()
+        except FileNotFoundError:
+            return None
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _load_snapshot_header(self):
+        """Read the snapshot header and its raw bytes, rebuilding the snapshot when the JSON file has changed (private method)."""
+        signature = self._source_signature()
+        if signature is None:
+            print(f"Warning: UPSL data file not found at {self.json_path}")
+            self._player_teams = {}
+            return {'source': None, 'conferences': {}, 'players': None}, None
+
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                magic, header_length = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+                if magic == SNAPSHOT_MAGIC:
+                    header_bytes = f.read(header_length)
+                    header = pickle.loads(header_bytes)
+                    if header['source'] == signature:
+                        return header, header_bytes
+        except (FileNotFoundError, struct.error, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+        return self._build_snapshot(signature)
+
+    @property
+    def signature(self):
+        """The size and mtime of the JSON file the indexes were built from."""
+        return self._header['source']
+
+    def is_stale(self):
+        """Check whether the JSON file has changed since the indexes were built."""
+        return self._source_signature() != self._header['source']
+
+    def _build_indexes(self, upsl_data):
+        """Index the UPSL data by conference, team, season and player (private method)."""
+        conferences = {}
+        player_teams = {}
+        for division_name, division in upsl_data.get("Division", {}).items():
+            for conference_name, conference in division.get("Conference", {}).items():
+                index = conferences.setdefault(conference_name, {'division': division_name, 'teams': [], 'rosters': {}, 'matches': {}})
+                for team_name, team in conference.get("Teams", {}).items():
+                    index['teams'].append(team_name)
+                    index['rosters'][team_name] = [
+                        {"Player": player["Player"], "Position": player["Position"], "Appearances": player["Appearances"]}
+                        for player in team.get("Roster", [])
+                    ]
+                    for player in team.get("Roster", []):
+                        player_teams.setdefault(player["Player"], []).append((conference_name, team_name))
+
+                    # Match ids are the dates formatted as MMDDYYYY
+                    index['matches'][team_name] = {}
+                    for key, matches in team.items():
+                        if not key.startswith("Matches "):
+                            continue
+                        index['matches'][team_name][key[len("Matches "):]] = [
+                            {
+                                "MatchId": str(match["Date"].replace("/", "")),
+                                "Opponent": match["Away Team"] if match["Home Team"] == team_name else match["Home Team"],
+                                "H_A": "Home" if match["Home Team"] == team_name else "Away",
+                                "Home Team": match["Home Team"],
+                                "Away Team": match["Away Team"],
+                                "Home Score": match.get("Home Score", ""),
+                                "Away Score": match.get("Away Score", "")
+                            }
+                            for match in matches
+                        ]
+        return conferences, player_teams
+
+    @timed('match_data.build_snapshot')
+    def _build_snapshot(self, signature):
+        """Parse the JSON once and write the indexes as a binary snapshot with one blob per conference (private method)."""
+        conferences, player_teams = self._build_indexes(self._load_upsl_data())
+
+        blobs = []
+        position = 0
+
+        def add_blob(index):
+            nonlocal position
+            blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+            blobs.append(blob)
+            position += len(blob)
+            return (position - len(blob), len(blob))
+
+        offsets = {conference_name: add_blob(index) for conference_name, index in conferences.items()}
+        header = {'source': signature, 'conferences': offsets, 'players': add_blob(player_teams)}
+        header_bytes = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Keep the parsed indexes so this instance does not read them back
+        self._conferences = conferences
+        self._player_teams = player_teams
+        try:
+            tmp_path = self.snapshot_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(header_bytes)))
+                f.write(header_bytes)
+                for blob in blobs:
+                    f.write(blob)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"Warning: could not write UPSL snapshot to {self.snapshot_path}: {e}")
+        return header, header_bytes
+
+    def _get_conference(self, conference_name):
+        """Return the index of one conference, loading only its blob from the snapshot (private method)."""
+        index = self._conferences.get(conference_name)
+        if index is not None:
+            return index
+        if conference_name not in self._header['conferences']:
+            return {'division': None, 'teams': [], 'rosters': {}, 'matches': {}}
+
+        with self._lock:
+            if conference_name not in self._conferences:
+                self._read_index(conference_name)
+            return self._conferences.get(conference_name, {'division': None, 'teams': [], 'rosters': {}, 'matches': {}})
+
+    def _get_player_teams(self):
+        """Return the player to (conference, team) index, loading it from the snapshot on first use (private method)."""
+        if self._player_teams is None:
+            with self._lock:
+                if self._player_teams is None:
+                    self._read_index(None)
+        return self._player_teams
+
+    def _read_index(self, conference_name):
+        """Load one conference's index, or the player index when no conference is named, reloading the header when the snapshot was rebuilt (private method)."""
+        for _ in range(2):
+            offsets = self._header['players'] if conference_name is None else self._header['conferences'].get(conference_name)
+            if offsets is None:
+                return
+            index = self._read_blob(*offsets)
+            if index is not None:
+                if conference_name is None:
+                    self._player_teams = index
+                else:
+                    self._conferences[conference_name] = index
+                return
+
+            # Another process rebuilt the snapshot, so the cached offsets are wrong and the loaded indexes are dropped with them
+            self._conferences = {}
+            self._player_teams = None
+            self._header, self._header_bytes = self._load_snapshot_header()
+            if (self._player_teams if conference_name is None else self._conferences.get(conference_name)) is not None:
+                return
+
+        # Rebuilt again while reading, so the indexes are parsed from the JSON file instead
+        self._header, self._header_bytes = self._build_snapshot(self._source_signature())
+
+    @timed('match_data.read_blob')
+    def _read_blob(self, offset, length):
+        """Read one pickled index blob from the snapshot, or return None when its header no longer matches the one read earlier (private method)."""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                magic, header_length = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+                if magic != SNAPSHOT_MAGIC or f.read(header_length) != self._header_bytes:
+                    return None
+                f.seek(offset, os.SEEK_CUR)
+                return pickle.loads(f.read(length))
+        except (FileNotFoundError, struct.error):
+            return None
+
     def get_conference_names(self):
         """Extract all conference names from the UPSL data structure."""
-        conferences = []
-        for division in self.upsl_data.get("Division", {}).values():
-            if "Conference" in division:
-                conferences.extend(division["Conference"].keys())
-        return conferences
+        return list(self._header['conferences'])
+
+    def get_division_name(self, conference_name):
+        """Retrieve the name of the division a conference belongs to."""
+        return self._get_conference(conference_name)['division']
+
+    def get_seasons(self, conference_name):
+        """Retrieve the seasons with matches listed for any team of a conference."""
+        seasons = {}
+        for team_matches in self._get_conference(conference_name)['matches'].values():
+            seasons.update(dict.fromkeys(team_matches))
+        return list(seasons)
 
     def get_team_names(self, conference_name):
         """Extract all team names from the UPSL data structure for a selected conference."""
-        teams = []
-        for division in self.upsl_data.get("Division", {}).values():
-            if "Conference" in division and conference_name in division['Conference']:
-                teams.extend(division['Conference'][conference_name].get("Teams", []))
-            return teams
+        return list(self._get_conference(conference_name)['teams'])
 
     def get_team_roster(self, conference_name, team_name):
         """Retrieve player names"""
-        player_names = []
-        # Access the specified conference
-        conference = self.upsl_data.get("Division", {}).get("Premier", {}).get("Conference", {}).get(conference_name, {})
-        # Access the specified team
-        team = conference.get("Teams", {}).get(team_name, {})
-        # Extract player names from the roster
-        for player in team.get("Roster", []):
-            player_names.append(player["Player"])
-        return player_names
+        return [player["Player"] for player in self._get_conference(conference_name)['rosters'].get(team_name, [])]
 
     def get_player_data(self, conference_name, team_name):
         """Retrieve the team roster as a DataFrame with Player, Position, and Appearances."""
-        # Access the specified conference
-        conference = self.upsl_data.get("Division", {}).get("Premier", {}).get("Conference", {}).get(conference_name, {})
-        # Access the specified team
-        team = conference.get("Teams", {}).get(team_name, {})
-        
-        # Create a list to hold player data
-        roster_data = []
-        # Extract player data from the roster
-        for player in team.get("Roster", []):
-            roster_data.append({
-                "Player": player["Player"],
-                "Position": player["Position"],
-                "Appearances": player["Appearances"]
-            })
-        
-        # Convert the list to a DataFrame
+        roster_data = self._get_conference(conference_name)['rosters'].get(team_name, [])
         return pd.DataFrame(roster_data)
 
+    def get_league_rosters(self, division_name=None):
+        """Retrieve the rosters of every team, optionally of one division, as a DataFrame with Conference and Team columns."""
+        rosters = [
+            {"Conference": conference_name, "Team": team_name, **player}
+            for conference_name in self.get_conference_names()
+            if division_name is None or self.get_division_name(conference_name) == division_name
+            for team_name, roster in self._get_conference(conference_name)['rosters'].items()
+            for player in roster
+        ]
+        return pd.DataFrame(rosters, columns=["Conference", "Team", "Player", "Position", "Appearances"])
+
+    def get_player_teams(self, player_name):
+        """Retrieve the (conference, team) pairs whose roster lists a player."""
+        return list(self._get_player_teams().get(player_name, []))
+
     def get_match_data(self, conference_name, team_name, season):
         """Retrieve match details for a specific team in a given conference."""
-        match_data = []
-        # Access the specified conference
-        conference = self.upsl_data.get("Division", {}).get("Premier", {}).get("Conference", {}).get(conference_name, {})
-        # Access the specified team
-        team = conference.get("Teams", {}).get(team_name, {})
-        
-        # Check if the team has matches
-        if f"Matches {season}" in team:
-            for match in team[f"Matches {season}"]:
-                match_id = str(match["Date"].replace("/", ""))  # Format the date as MMDDYY
-                opponent = match["Away Team"] if match["Home Team"] == team_name else match["Home Team"]
-                home_away = "Home" if match["Home Team"] == team_name else "Away"
-
-                # Append the match data to the list
-                match_data.append({
-                    "MatchId": match_id,
-                    "Opponent": opponent,
-                    "H_A": home_away
-                })
-
-        return match_data
+        matches = self._get_conference(conference_name)['matches'].get(team_name, {}).get(season, [])
+        return [dict(match) for match in matches]
+
+    def get_fixtures(self, conference_name, season):
+        """Retrieve the distinct matches of a conference's season with their home and away teams and scores."""
+        fixtures = {}
+        for team_matches in self._get_conference(conference_name)['matches'].values():
+            for match in team_matches.get(season, []):
+                key = (match["MatchId"], match["Home Team"], match["Away Team"])
+                if key not in fixtures:
+                    fixtures[key] = {name: match[name] for name in ["MatchId", "Home Team", "Away Team", "Home Score", "Away Score"]}
+        return list(fixtures.values())
 
     def get_match_by_id(self, match_id, competition, season):
         """Retrieve match details by match ID."""
         matches = self.load_matches(competition, season)
         return matches[matches["MatchId"] == match_id]
-
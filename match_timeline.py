@@ -0,0 +1,99 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+###################################################################
+
+# Minute buckets of the season tables; the last one holds stoppage and extra time
+MINUTE_BUCKETS = [0, 15, 30, 45, 60, 75, 90, np.inf]
+MINUTE_LABELS = ['0-15', '15-30', '30-45', '45-60', '60-75', '75-90', '90+']
+
+# Score of the shooting team against its opponent just before the shot
+GAME_STATES = ['Losing', 'Drawing', 'Winning']
+
+# Summed columns of timeline_totals
+TIMELINE_TOTAL_COLUMNS = ['Shots For', 'Shots Against', 'xG For', 'xG Against', 'Goals For', 'Goals Against']
+
+
+def match_timeline(total_shots, teams=None):
+    """Order the scored shots of one match by time and add both teams' running xG and the score at every shot."""
+    teams = list(teams) if teams is not None else sorted(pd.unique(total_shots['Team'].astype(str)))
+    minute = (total_shots['Mins'].to_numpy(dtype=np.float64) + total_shots['Secs'].to_numpy(dtype=np.float64) / 60)
+    order = np.argsort(minute, kind='stable')
+    minute = minute[order]
+    shots = total_shots.iloc[order]
+
+    # One column per team, so both running totals come out of a single cumsum each
+    codes = pd.Index(teams).get_indexer(shots['Team'].astype(str)).astype(np.int64)
+
+    # A team left out of teams has code -1, which would silently index the last team's column
+    if (codes < 0).any():
+        missing = sorted(set(shots['Team'].astype(str).to_numpy()[codes < 0]))
+        raise ValueError(f"Shots by teams not in {teams}: {missing}")
+    xg = shots['xG'].to_numpy(dtype=np.float64)
+    is_goal = shots['isGoal'].to_numpy() == 1
+    team_columns = np.arange(len(teams))
+    xg_cum = np.cumsum((codes[:, None] == team_columns) * xg[:, None], axis=0)
+
+    # An own goal counts for the other team of the match
+    own_goal = shots['isOwnGoal'].to_numpy() == 1 if 'isOwnGoal' in shots.columns else np.zeros(len(shots), dtype=bool)
+    scorer = np.where(own_goal & (len(teams) == 2), 1 - codes, codes)
+    goals = (scorer[:, None] == team_columns) & is_goal[:, None]
+    goals_before = np.cumsum(goals, axis=0) - goals
+
+    rows = np.arange(len(shots))
+    goals_for = goals_before[rows, codes]
+    goals_against = goals_before.sum(axis=1) - goals_for
+    xg_for = xg_cum[rows, codes]
+    xg_against = xg_cum.sum(axis=1) - xg_for
+    state = np.sign(goals_for - goals_against) + 1
+
+    return pd.DataFrame({
+        'MatchId': shots['MatchId'].array,
+        'Minute': minute.astype(np.float32),
+        'Team': shots['Team'].array,
+        'Player': shots['Player'].array,
+        'xG': xg.astype(np.float32),
+        'isGoal': is_goal.astype(np.int8),
+        'Scoring Team': pd.Categorical.from_codes(scorer, categories=teams),
+        'xG For': xg_for.astype(np.float32),
+        'xG Against': xg_against.astype(np.float32),
+        'Goals For': goals_for.astype(np.int16),
+        'Goals Against': goals_against.astype(np.int16),
+        'Game State': pd.Categorical.from_codes(state, categories=GAME_STATES),
+    })
+
+
+def team_perspective(timelines, team):
+    """Restate stacked match timelines from one team's side: its shots count for it and the opponents' against it."""
+    own = (timelines['Team'] == team).to_numpy()
+    xg = timelines['xG'].to_numpy(dtype=np.float64)
+    goal = timelines['isGoal'].to_numpy() == 1
+    scored = (timelines['Scoring Team'] == team).to_numpy()
+
+    # The game state of an opponent's shot is the reverse of the team's
+    state = timelines['Game State'].cat.codes.to_numpy()
+    state = np.where(own, state, len(GAME_STATES) - 1 - state)
+
+    return pd.DataFrame({
+        'MatchId': timelines['MatchId'].to_numpy(),
+        'Minutes': pd.cut(timelines['Minute'], MINUTE_BUCKETS, labels=MINUTE_LABELS, right=False),
+        'Game State': pd.Categorical.from_codes(state, categories=GAME_STATES),
+        'Shots For': own.astype(np.int64),
+        'Shots Against': (~own).astype(np.int64),
+        'xG For': np.where(own, xg, 0.0),
+        'xG Against': np.where(own, 0.0, xg),
+        'Goals For': (goal & scored).astype(np.int64),
+        'Goals Against': (goal & ~scored).astype(np.int64),
+    })
+
+
+def timeline_totals(timelines, team, by=('Minutes',)):
+    """Sum a team's shots, xG and goals for and against over stacked match timelines per minute bucket and/or game state."""
+    return (
+        team_perspective(timelines, team)
+        .groupby(list(by), observed=False, sort=True)[TIMELINE_TOTAL_COLUMNS]
+        .sum()
+        .reset_index()
+    )
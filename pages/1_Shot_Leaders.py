@@ -1,7 +1,4 @@
 ###################################################################
-# File reading packages
-import os
-
 # Data visualization packages
 import streamlit as st
 
@@ -10,35 +7,130 @@ import pandas as pd
 import numpy as np
 
 # External Packages
-from data_processing import DataProcessing
-from match_data import MatchData
+from caching import get_match_data, get_player_totals, get_player_data, get_data_processor
+from xg_scorer import resolve_model
 
-###################################################################
-def shot_leaders():
-    """Function to display shot leaders"""
+# Instrumentation and error handling
+from developer_panel import begin_page, end_page, show_error
 
-    # Define instances
-    match_data = MatchData() # Create instance once at the start
+###################################################################
+# Display names of the shot leaders columns
+COLUMN_NAMES = {
+    "total_shots": "Shots",
+    "non_penalty_shots": "Non-Penalty Shots",
+    "openplay_shots": "Open Play Shots",
+    "goals": "Goals",
+    "goals_per_shot": "Shooting Accuracy (Goals per Shot)",
+    "xG": "Expected Goals (xG)",
+    "xG_per_shot": "Shooting Efficiency (xG per Shot)",
+    "non_penalty_xG": "Non-Penalty xG",
+    "non_penalty_xG_per_shot": "Non-Penalty xG per Shot",
+    "goals_minus_xG": "Finishing (Goals minus xG)",
+}
+
+def prepare_player_data(player_data):
+    """Clean the roster Appearances and Position columns."""
+    # Change NA values in Appearances to 0
+    player_data['Appearances'] = player_data['Appearances'].replace("N/A", 0)
+
+    # Change Appearances to int data type
+    player_data['Appearances'] = player_data['Appearances'].astype(int)
+
+    # Format Position to have only the first letter capitalized and the rest lower case
+    player_data['Position'] = player_data['Position'].str.capitalize()
+    return player_data
+
+def display_summary(summary_df):
+    """Format and display the shot leaders table."""
+    # Convert specific columns to int
+    for column in ["Shots", "Non-Penalty Shots", "Open Play Shots", "Goals"]:
+        summary_df[column] = summary_df[column].fillna(0).astype(int)
+    # Replace all None values in summary_df with 0
+    summary_df = summary_df.fillna(0)
+
+    # Apply formatting to ensure two decimal places are shown, even for zero
+    summary_df = summary_df.style.format({
+        "Shooting Accuracy (Goals per Shot)": "{:.2f}",
+        "Expected Goals (xG)": "{:.2f}",
+        "Shooting Efficiency (xG per Shot)": "{:.2f}",
+        "Non-Penalty xG": "{:.2f}",
+        "Non-Penalty xG per Shot": "{:.2f}",
+        "Finishing (Goals minus xG)": "{:.2f}"
+    })
+
+    st.dataframe(summary_df, use_container_width=True, hide_index=True)
+
+def league_leaders(match_data, data_processor, competition, division, model_path):
+    """Function to display shot leaders across every team of a division."""
+    # Selector for conference, defaulting to the whole division
+    conference_names = match_data.get_conference_names()
+    conference = st.sidebar.selectbox(
+        "Conference",
+        options=["All Conferences"] + conference_names
+    )
+
+    # Selector for season
+    season = st.sidebar.selectbox(
+        "Season:", ("All Seasons", "2024 Fall", "2025 Spring")
+        )
 
-    # Define model paths for DataProcessing
-    model_paths = {
-        'op': 'Models/expected_goals_model_lr.sav',
-        'non_op': 'Models/expected_goals_model_lr_v2.sav'
-    }
+    # Selectors for ranking
+    sort_by = st.selectbox("Sort By:", options=list(COLUMN_NAMES.values()), index=5)
+    top_n = st.number_input("Top Players:", min_value=1, value=25, step=5)
+
+    # Maintained season totals of the selection, updated only for new or corrected matches
+    player_totals = get_player_totals(competition, division,
+                                      conference=None if conference == "All Conferences" else conference,
+                                      season=None if season == "All Seasons" else season,
+                                      model_path=model_path)
+    if player_totals.empty:
+        st.write("No Data Available")
+        return
+
+    # Sum the totals over seasons, then rank
+    sort_column = {name: column for column, name in COLUMN_NAMES.items()}[sort_by]
+    summary_df = data_processor.leaders_from_totals(player_totals.rename(columns={"conference": "Conference"}),
+                                                    group_by=("Player", "Team", "Conference"),
+                                                    sort_by=sort_column, top_n=int(top_n))
+    summary_df = summary_df.rename(columns=COLUMN_NAMES)
+
+    # Join the rosters of the ranked players' teams
+    rosters = [
+        get_player_data(conference_name, team_name).assign(Team=team_name, Conference=conference_name)
+        for conference_name, team_name in summary_df[["Conference", "Team"]].drop_duplicates().itertuples(index=False)
+    ]
+    rosters = [roster for roster in rosters if not roster.empty]
+    if rosters:
+        player_data = prepare_player_data(pd.concat(rosters, ignore_index=True))
+        summary_df = pd.merge(summary_df, player_data, on=["Player", "Team", "Conference"], how="left")
+        summary_df = summary_df[["Player", "Team", "Conference", "Position", "Appearances"] + list(COLUMN_NAMES.values())]
+
+        # Players missing from their team's roster keep a blank position
+        summary_df["Position"] = summary_df["Position"].fillna("")
+        summary_df["Appearances"] = summary_df["Appearances"].fillna(0).astype(int)
+
+    display_summary(summary_df)
 
-    # Define instances for processing
-    data_processor = DataProcessing(model_paths)
+def shot_leaders():
+    """Function to display shot leaders"""
 
     # Create Title
     st.title(f"UPSL Stats Dashboard")
 
-    # Define global file paths
-    current_dir = os.path.dirname(__file__) # Get the current directory of the script
-
     ###################################################################
 
+    # Time every stage of this rerun for the logs and the developer panel
+    trace = begin_page("Shot Leaders")
+
     # Error Handling
     try:
+        # Shared league metadata instance and xG model, loaded once per process
+        match_data = get_match_data()
+
+        # Current xG model version
+        model_path = resolve_model()
+        data_processor = get_data_processor(model_path)
+
         # create header
         st.header("Shot Leaders")
 
@@ -52,6 +144,14 @@ def shot_leaders():
             "Division:", ("Premier") # Add more divisions if avaialble
         )
 
+        # Selector for a single team or the whole division
+        scope = st.sidebar.radio(
+            "Leaders:", ("Team", "League")
+        )
+        if scope == "League":
+            league_leaders(match_data, data_processor, competition, division, model_path)
+            return
+
         # Selector for conference
         conference_names = match_data.get_conference_names()
         default_conference = "Midwest Central"
@@ -76,119 +176,30 @@ def shot_leaders():
             index=team_names.index(default_team) if default_team in team_names else 0 # Set default index
         )
 
-        # Create a DataFrame of the match
-        match_df = match_data.get_match_data(conference_name=conference, team_name=team, season=season)
-        match_df = pd.DataFrame(match_df)
-
-            # Read and combine data for selected matches
-        dfs_list = []
-        for _, row in match_df.iterrows():
-            opponent = row["Opponent"]
-            match_id = row["MatchId"]
-            # Construct the relative path to the CSV file
-            file_path = os.path.join(current_dir, '..', 'Competitions', competition, division, conference, season, team, f"{match_id}_{opponent}", 'Raw Data', f'{team} Shots.csv')
-
-            # Check if the file exists before reading
-            if os.path.exists(file_path):
-                # Attempt to read the file
-                df = pd.read_csv(file_path)
-                df = df.rename(columns={'Team': "H_A"})
-                df['Team'] = team
-                df['MatchId'] = match_id
-                dfs_list.append(df)
-            # else:
-                # st.warning(f'File not found: {file_path}. Skipping this match') # Notify that the file is missing
-
-        # Combine into a single DataFrame
-        shot_events = pd.concat(dfs_list, ignore_index=True)
-
-        # calc xG from imported file
-        total_shots = data_processor.calc_xg(shot_events)
-
-        # Compute metrics
-        total_shots["non_penalty_xG"] = total_shots.apply(
-            lambda row: row["xG"] if not row["isPenalty"] else 0, axis=1
-        )
+        # Maintained season totals of the team, updated only for new or corrected matches
+        player_totals = get_player_totals(competition, division, conference, season, team, model_path=model_path)
+        if player_totals.empty:
+            st.write("No Data Available")
+            return
 
-        summary_df = (
-            total_shots.groupby("Player")
-            .agg(
-                total_shots=("Player", "count"),
-                non_penalty_shots=("isPenalty", lambda x: len(x) - x.sum()),
-                openplay_shots=("isRegularPlay", "sum"),
-                goals=("isGoal", "sum"),
-                goals_per_shot=("isGoal", lambda x: x.sum() / len(x) if len(x) > 0 else 0),
-                xG=("xG", "sum"),
-                xG_per_shot=("xG", lambda x: x.sum() / len(x) if len(x) > 0 else 0),
-                non_penalty_xG=("non_penalty_xG", "sum"),
-                non_penalty_xG_per_shot=(
-                    "non_penalty_xG",
-                    lambda x: x.sum() / (len(x) - total_shots["isPenalty"].sum())
-                    if (len(x) - total_shots["isPenalty"].sum()) > 0
-                    else 0,
-                ),
-            )
-            .reset_index()
-        )
-
-        # Adding 'Goals - xG' column
-        summary_df["goals_minus_xG"] = summary_df["goals"] - summary_df["xG"]
-
-        # reset index and drop index column
-        summary_df = summary_df.reset_index(drop=True)
-
-        # Rename columns
-        summary_df = summary_df.rename(
-            columns={
-                "total_shots": "Shots",
-                "non_penalty_shots": "Non-Penalty Shots",
-                "openplay_shots": "Open Play Shots",
-                "goals": "Goals",
-                "goals_per_shot": "Shooting Accuracy (Goals per Shot)",
-                "xG": "Expected Goals (xG)",
-                "xG_per_shot": "Shooting Efficiency (xG per Shot)",
-                "non_penalty_xG": "Non-Penalty xG",
-                "non_penalty_xG_per_shot": "Non-Penalty xG per Shot",
-                "goals_minus_xG": "Finishing (Goals minus xG)",
-            }
-        )
+        # Read each player's totals directly instead of re-grouping the shots
+        summary_df = data_processor.leaders_from_totals(player_totals, sort_by=None)
+        summary_df = summary_df.rename(columns=COLUMN_NAMES)
 
         # Create a df with player data and concatenate with summary_df
-        player_data = match_data.get_player_data(conference_name=conference, team_name=team)
-
-        # Change NA values in Appearances to 0
-        player_data['Appearances'] = player_data['Appearances'].replace("N/A", 0)
-
-        # Change Appearances to int data type
-        player_data['Appearances'] = player_data['Appearances'].astype(int)
-
-        # Format Position to have only the first letter capitalized and the rest lower case
-        player_data['Position'] = player_data['Position'].str.capitalize()
+        player_data = get_player_data(conference, team)
+        player_data = prepare_player_data(player_data)
 
         # Merge player data with summary_df based on Player
         summary_df = pd.merge(player_data, summary_df, on="Player", how="left")
-        # Convert specific columns to int
-        summary_df['Shots'] = summary_df['Shots'].fillna(0).astype(int)
-        summary_df['Non-Penalty Shots'] = summary_df['Non-Penalty Shots'].fillna(0).astype(int)
-        summary_df['Open Play Shots'] = summary_df['Open Play Shots'].fillna(0).astype(int)
-        summary_df['Goals'] = summary_df['Goals'].fillna(0).astype(int)
-        # Replace all None values in summary_df with 0
-        summary_df = summary_df.fillna(0)
-
-        # Apply formatting to ensure two decimal places are shown, even for zero
-        summary_df = summary_df.style.format({
-            "Shooting Accuracy (Goals per Shot)": "{:.2f}",
-            "Expected Goals (xG)": "{:.2f}",
-            "Shooting Efficiency (xG per Shot)": "{:.2f}",
-            "Non-Penalty xG": "{:.2f}",
-            "Non-Penalty xG per Shot": "{:.2f}",
-            "Finishing (Goals minus xG)": "{:.2f}"
-        })
-
-        st.dataframe(summary_df, use_container_width=True, hide_index=True)
+        display_summary(summary_df)
 
+    # Show the failure and log it with its traceback
     except Exception as e:
-        st.write(f"No Data Available")
+        show_error(e)
+
+    finally:
+        end_page(trace)
 
 def main():
     """Main function to run shot leaders tab."""
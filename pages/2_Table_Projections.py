@@ -0,0 +1,135 @@
+###################################################################
+# Data visualization packages
+import streamlit as st
+
+# Data maninpulation packages
+import pandas as pd
+
+# External Packages
+from caching import get_match_data, get_season_projection
+from simulation import SOURCES
+from xg_scorer import resolve_model
+
+# Instrumentation and error handling
+from developer_panel import begin_page, end_page, show_error
+
+###################################################################
+
+def display_table(table, positions):
+    """Format and display the projected conference table and finishing positions."""
+    table = table.rename(columns={
+        "xPts": "Expected Points",
+        "xGF": "Expected Goals For",
+        "xGA": "Expected Goals Against",
+        "xGD": "Expected Goal Difference",
+        "P(1st)": "Chance of 1st"
+    })
+    table.insert(0, "Rank", range(1, len(table) + 1))
+
+    st.dataframe(table.style.format({
+        "Expected Points": "{:.1f}",
+        "Expected Goals For": "{:.1f}",
+        "Expected Goals Against": "{:.1f}",
+        "Expected Goal Difference": "{:+.1f}",
+        "Avg Position": "{:.2f}",
+        "Chance of 1st": "{:.1%}"
+    }), use_container_width=True, hide_index=True)
+
+    # Share of simulations finishing in each position
+    st.subheader("Finishing Positions")
+    st.dataframe(positions.style.format("{:.1%}"), use_container_width=True)
+
+def display_matches(matches):
+    """Format and display the win, draw and loss probabilities of every fixture."""
+    matches = matches.drop(columns=["MatchId"]).assign(Source=matches["Source"].map(SOURCES))
+    st.dataframe(matches.style.format({
+        "Home Score": "{:.0f}",
+        "Away Score": "{:.0f}",
+        "Home xG": "{:.2f}",
+        "Away xG": "{:.2f}",
+        "P(Home Win)": "{:.1%}",
+        "P(Draw)": "{:.1%}",
+        "P(Away Win)": "{:.1%}",
+        "Home xPts": "{:.2f}",
+        "Away xPts": "{:.2f}"
+    }, na_rep="-"), use_container_width=True, hide_index=True)
+
+def table_projections():
+    """Function to display simulated conference tables"""
+
+    # Create Title
+    st.title("UPSL Stats Dashboard")
+
+    ###################################################################
+
+    # Time every stage of this rerun for the logs and the developer panel
+    trace = begin_page("Table Projections")
+
+    # Error Handling
+    try:
+        # Shared league metadata instance, loaded once per process
+        match_data = get_match_data()
+
+        # Current xG model version
+        model_path = resolve_model()
+
+        # create header
+        st.header("Table Projections")
+
+        # Selector for competition
+        competition = st.sidebar.selectbox(
+            "Competition:", ("UPSL")
+            )
+
+        # Selector for division
+        division = st.sidebar.selectbox(
+            "Division:", ("Premier")
+        )
+
+        # Selector for conference
+        conference_names = match_data.get_conference_names()
+        default_conference = "Midwest Central"
+        default_index = conference_names.index(default_conference) if default_conference in conference_names else 0
+        conference = st.sidebar.selectbox(
+            "Conference:",
+            options=conference_names,
+            index=default_index
+        )
+
+        # Selector for season
+        season = st.sidebar.selectbox(
+            "Season:", ("2024 Fall", "2025 Spring")
+        )
+
+        # Selectors for the simulation size and seed
+        n_sims = st.sidebar.select_slider(
+            "Simulations:", options=[1000, 10000, 100000], value=100000
+        )
+        seed = st.sidebar.number_input("Random Seed:", min_value=0, value=0, step=1)
+
+        # Simulated seasons, reused while the fixtures and shots are unchanged
+        projection = get_season_projection(competition, division, conference, season, n_sims=n_sims, seed=int(seed), model_path=model_path)
+        if projection is None:
+            st.write("No Data Available")
+            return
+
+        st.caption("Matches with shot data are simulated from each side's shot xG; the others keep their final score "
+                   "or, if not yet played, are projected from the teams' scoring rates.")
+        display_table(projection['table'], projection['positions'])
+
+        st.subheader("Match Probabilities")
+        display_matches(projection['matches'])
+
+    # Show the failure and log it with its traceback
+    except Exception as e:
+        show_error(e)
+
+    finally:
+        end_page(trace)
+
+def main():
+    """Main function to run table projections tab."""
+    table_projections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+###################################################################
+# Data visualization packages
+import streamlit as st
+
+# External Packages
+# visuals is imported when a radar is drawn, so matplotlib and mplsoccer stay out of cold start
+from caching import get_match_data, get_player_comparison
+from player_comparison import COMPARISON_METRICS, DEFAULT_NEIGHBOURS, MIN_APPEARANCES
+from xg_scorer import resolve_model
+
+# Instrumentation and error handling
+from developer_panel import begin_page, end_page, show_error
+
+###################################################################
+
+def plot_radar(radar, player, team, position, competition, model_path):
+    """Render and display a player's percentile radar."""
+    from visuals import FootballVisuals
+
+    visuals = FootballVisuals(model_path=model_path)
+    png = visuals.renderPlayerRadar(radar, player, team, position, competition, fontfamily='Segoe UI')
+    st.image(png)
+
+def display_similar(similar):
+    """Format and display the nearest players and their metrics."""
+    similar = similar[["Player", "Team", "Conference", "Position", "Distance", "Appearances"] + list(COMPARISON_METRICS)]
+    similar = similar.assign(Position=similar["Position"].astype(str).str.capitalize()).rename(columns=COMPARISON_METRICS)
+    st.dataframe(similar.style.format({"Distance": "{:.2f}", **{name: "{:.2f}" for name in COMPARISON_METRICS.values()}}),
+                 use_container_width=True, hide_index=True)
+
+def display_percentiles(percentiles, position):
+    """Format and display the percentile table of every ranked player of a position."""
+    percentiles = percentiles[percentiles["Position"] == position].drop(columns=["Position"])
+    percentiles = percentiles.rename(columns=COMPARISON_METRICS).sort_values(COMPARISON_METRICS["non_penalty_xG_per_90"], ascending=False)
+    st.dataframe(percentiles.style.format({name: "{:.0f}" for name in COMPARISON_METRICS.values()}),
+                 use_container_width=True, hide_index=True)
+
+def player_comparison():
+    """Function to display league-wide percentiles and similar players"""
+
+    # Create Title
+    st.title("UPSL Stats Dashboard")
+
+    ###################################################################
+
+    # Time every stage of this rerun for the logs and the developer panel
+    trace = begin_page("Player Comparison")
+
+    # Error Handling
+    try:
+        # Shared league metadata instance, loaded once per process
+        match_data = get_match_data()
+
+        # create header
+        st.header("Player Comparison")
+
+        # Selector for competition
+        competition = st.sidebar.selectbox(
+            "Competition:", ("UPSL")
+            )
+
+        # Selector for division
+        division = st.sidebar.selectbox(
+            "Division:", ("Premier")
+        )
+
+        # League-wide ranks and neighbour indexes of the current xG model version, rebuilt only when new matches are ingested
+        model_path = resolve_model()
+        comparison = get_player_comparison(competition, division, model_path=model_path)
+        if not len(comparison):
+            st.write("No Data Available")
+            return
+        st.caption(f"Players of teams with shot data and at least {MIN_APPEARANCES} appearances, ranked within their position. "
+                   "Per-90 rates count each appearance as 90 minutes.")
+
+        # Selectors for conference, team and player, limited to the ranked players
+        players = comparison.players()
+        conference_names = [name for name in match_data.get_conference_names() if name in set(players["Conference"])]
+        default_conference = "Midwest Central"
+        conference = st.sidebar.selectbox(
+            "Conference:",
+            options=conference_names,
+            index=conference_names.index(default_conference) if default_conference in conference_names else 0
+        )
+        team_names = sorted(comparison.players(conference=conference)["Team"].unique())
+        team = st.selectbox(
+            "Select Team:",
+            options=team_names,
+            index=team_names.index("United SC") if "United SC" in team_names else 0
+        )
+        player = st.selectbox(
+            "Select Player:", options=comparison.players(team=team)["Player"]
+        )
+
+        # Selectors for the similar players lookup
+        same_position = st.sidebar.checkbox("Same Position Only", value=True)
+        n_similar = st.sidebar.number_input("Similar Players:", min_value=1, max_value=25, value=DEFAULT_NEIGHBOURS, step=1)
+
+        position = comparison.metrics.loc[comparison.metrics["Player"].eq(player) & comparison.metrics["Team"].eq(team), "Position"].iloc[0]
+        plot_radar(comparison.radar(player, team), player, team, position, f'{competition} {division}', model_path)
+
+        st.subheader("Similar Players")
+        display_similar(comparison.similar_players(player, team, n=int(n_similar), same_position=same_position))
+
+        st.subheader(f"{position.capitalize()} Percentiles")
+        display_percentiles(comparison.percentiles, position)
+
+    # Show the failure and log it with its traceback
+    except Exception as e:
+        show_error(e)
+
+    finally:
+        end_page(trace)
+
+def main():
+    """Main function to run player comparison tab."""
+    player_comparison()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# External Packages
+from data_processing import SHOT_TOTAL_COLUMNS
+from instrumentation import count, stage, timed
+
+###################################################################
+
+# Per-90 and per-shot metrics of the comparison, with their display names
+COMPARISON_METRICS = {
+    'shots_per_90': 'Shots per 90',
+    'goals_per_90': 'Goals per 90',
+    'non_penalty_xG_per_90': 'Non-Penalty xG per 90',
+    'goals_minus_xG_per_90': 'Goals minus xG per 90',
+    'goals_per_shot': 'Goals per Shot',
+    'xG_per_shot': 'xG per Shot',
+    'non_penalty_xG_per_shot': 'Non-Penalty xG per Shot',
+}
+
+# Roster positions ranked against each other; translated entries map to their English position and staff are left out
+POSITIONS = ['GOALKEEPER', 'DEFENSE', 'MIDFIELD', 'FORWARD']
+POSITION_ALIASES = {
+    'PORTERO': 'GOALKEEPER', 'ゴールキーパー': 'GOALKEEPER',
+    'DEFENSA': 'DEFENSE',
+    'CENTRO DEL CAMPO': 'MIDFIELD', 'MEIO-CAMPO': 'MIDFIELD',
+    'ADELANTE': 'FORWARD', 'AVANÇAR': 'FORWARD', 'AVANT': 'FORWARD',
+}
+
+# Players with fewer appearances have too little exposure to rank
+MIN_APPEARANCES = 3
+
+# Similar players returned by default
+DEFAULT_NEIGHBOURS = 5
+
+
+def player_metrics(player_totals, rosters, min_appearances=MIN_APPEARANCES):
+    """Join season shot totals to the league rosters and compute every player's per-90 and per-shot metrics."""
+    # Sum the seasons of each player, keyed like the rosters
+    totals = (
+        player_totals.rename(columns={'conference': 'Conference'})
+        .groupby(['Conference', 'Team', 'Player'], observed=True, sort=False)[SHOT_TOTAL_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+
+    # Rosters list every player with exposure, including those without a recorded shot, of the teams with shot data
+    teams = pd.MultiIndex.from_frame(totals[['Conference', 'Team']].astype(str))
+    rosters = rosters[pd.MultiIndex.from_frame(rosters[['Conference', 'Team']]).isin(teams)]
+    rosters = rosters.assign(
+        Position=rosters['Position'].str.strip().str.upper().replace(POSITION_ALIASES),
+        Appearances=pd.to_numeric(rosters['Appearances'], errors='coerce').fillna(0).astype(np.int64)
+    )
+    rosters = rosters[rosters['Position'].isin(POSITIONS) & (rosters['Appearances'] >= min_appearances)]
+    rosters = rosters.drop_duplicates(['Conference', 'Team', 'Player'])
+    df = rosters.merge(totals, on=['Conference', 'Team', 'Player'], how='left')
+    df[SHOT_TOTAL_COLUMNS] = df[SHOT_TOTAL_COLUMNS].fillna(0)
+
+    # Appearances are the only exposure recorded, so each counts as 90 minutes
+    appearances = df['Appearances'].to_numpy(dtype=np.float64)
+    shots = df['total_shots'].to_numpy(dtype=np.float64)
+    non_penalty_shots = df['non_penalty_shots'].to_numpy(dtype=np.float64)
+
+    def rate(numerator, denominator):
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+    goals = df['goals'].to_numpy(dtype=np.float64)
+    xg = df['xG'].to_numpy(dtype=np.float64)
+    non_penalty_xg = df['non_penalty_xG'].to_numpy(dtype=np.float64)
+    metrics = pd.DataFrame({
+        'shots_per_90': rate(shots, appearances),
+        'goals_per_90': rate(goals, appearances),
+        'non_penalty_xG_per_90': rate(non_penalty_xg, appearances),
+        'goals_minus_xG_per_90': rate(goals - xg, appearances),
+        'goals_per_shot': rate(goals, shots),
+        'xG_per_shot': rate(xg, shots),
+        'non_penalty_xG_per_shot': rate(non_penalty_xg, non_penalty_shots),
+    })
+
+    df = pd.concat([df[['Player', 'Team', 'Conference', 'Position', 'Appearances'] + SHOT_TOTAL_COLUMNS], metrics], axis=1)
+    df['Position'] = pd.Categorical(df['Position'], categories=POSITIONS)
+    return df
+
+
+def percentile_ranks(metrics):
+    """Rank every metric within each position as a 0-100 percentile, all metrics and positions in one grouped rank."""
+    ranks = metrics.groupby('Position', observed=True)[list(COMPARISON_METRICS)].rank(method='average', pct=True) * 100
+    return pd.concat([metrics[['Player', 'Team', 'Conference', 'Position', 'Appearances']], ranks], axis=1)
+
+
+class PlayerComparison:
+    def __init__(self, metrics):
+        """Initialize the PlayerComparison class with the league's player metrics, ranking them and indexing them once."""
+        self.metrics = metrics.reset_index(drop=True)
+        with stage('player_comparison.rank'):
+            self.percentiles = percentile_ranks(self.metrics)
+        self._rows = {key: row for row, key in enumerate(zip(self.metrics['Team'], self.metrics['Player']))}
+
+        # Metrics are standardized so each one weighs the same in the distance
+        values = self.metrics[list(COMPARISON_METRICS)].to_numpy(dtype=np.float64)
+        spread = values.std(axis=0)
+        self._vectors = (values - values.mean(axis=0)) / np.where(spread > 0, spread, 1.0)
+        with stage('player_comparison.index'):
+            self._indexes = {None: self._build_index(np.arange(len(self.metrics)))}
+            positions = self.metrics['Position'].cat.codes.to_numpy()
+            for code, position in enumerate(self.metrics['Position'].cat.categories):
+                self._indexes[position] = self._build_index(np.flatnonzero(positions == code))
+
+    def _build_index(self, rows):
+        """Fit a nearest-neighbour index over the standardized metric vectors of some rows (private method)."""
+        if len(rows) == 0:
+            return rows, None
+
+        # scikit-learn is only loaded once a comparison is built
+        from sklearn.neighbors import NearestNeighbors
+
+        return rows, NearestNeighbors(algorithm='kd_tree').fit(self._vectors[rows])
+
+    def __len__(self):
+        """Return the number of ranked players."""
+        return len(self.metrics)
+
+    def has_player(self, player, team):
+        """Check whether a player of a team is ranked in the comparison."""
+        return (team, player) in self._rows
+
+    def players(self, conference=None, team=None):
+        """List the ranked players, optionally of one conference or team, as a Player, Team, Conference and Position DataFrame."""
+        mask = np.ones(len(self.metrics), dtype=bool)
+        for column, value in [('Conference', conference), ('Team', team)]:
+            if value is not None:
+                mask &= (self.metrics[column] == value).to_numpy()
+        return self.metrics.loc[mask, ['Player', 'Team', 'Conference', 'Position']].reset_index(drop=True)
+
+    def radar(self, player, team):
+        """Return each metric's display name, value and position percentile for one player."""
+        row = self._rows[(team, player)]
+        return pd.DataFrame({
+            'Metric': list(COMPARISON_METRICS.values()),
+            'Value': self.metrics.loc[row, list(COMPARISON_METRICS)].to_numpy(dtype=np.float64),
+            'Percentile': self.percentiles.loc[row, list(COMPARISON_METRICS)].to_numpy(dtype=np.float64),
+        })
+
+    @timed('similar_players')
+    def similar_players(self, player, team, n=DEFAULT_NEIGHBOURS, same_position=True):
+        """Return the players nearest to one player's metric vector, closest first, with their distance and metrics."""
+        row = self._rows[(team, player)]
+        rows, index = self._indexes[self.metrics.loc[row, 'Position'] if same_position else None]
+        n = min(n, len(rows) - 1)
+        if n <= 0:
+            count('similar_players.empty')
+            return self.metrics.iloc[0:0].assign(Distance=pd.Series(dtype=np.float64))
+
+        # Ask for one extra neighbour, since the player is its own nearest
+        distances, positions = index.kneighbors(self._vectors[[row]], n_neighbors=n + 1)
+        neighbours = rows[positions[0]]
+        keep = neighbours != row
+        result = self.metrics.iloc[neighbours[keep][:n]].reset_index(drop=True)
+        result.insert(4, 'Distance', distances[0][keep][:n])
+        return result
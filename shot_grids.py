@@ -0,0 +1,59 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+###################################################################
+
+# Binned area in StatsBomb pitch coordinates: the attacking half drawn on the half VerticalPitch
+GRID_X_RANGE = (60.0, 120.0)
+GRID_Y_RANGE = (0.0, 80.0)
+
+# Bins along the pitch length and across its width: 5 x 10 unit cells
+DEFAULT_BINS = (12, 8)
+
+# Layers of every grid, in order
+GRID_STATISTICS = ['shots', 'goals', 'xG']
+
+
+def statsbomb_coordinates(x, y):
+    """Convert 100 x 100 event coordinates to the StatsBomb coordinates used by the shot maps."""
+    return x * 1.2, (100 - y) * 0.8
+
+
+def grid_edges(bins=DEFAULT_BINS):
+    """Return the bin edges along the pitch length and width."""
+    return np.linspace(*GRID_X_RANGE, bins[0] + 1), np.linspace(*GRID_Y_RANGE, bins[1] + 1)
+
+
+def bin_shots(total_shots, bins=DEFAULT_BINS):
+    """Bin scored shots into one shots, goals and xG grid per shooting team and player in a single vectorized pass."""
+    nx, ny = bins
+    if total_shots.empty:
+        return pd.DataFrame(columns=['Team', 'Player']), np.zeros((0, len(GRID_STATISTICS), ny, nx))
+
+    # Bin the plotted shot positions; shots outside the attacking half count in the nearest edge cell
+    x, y = statsbomb_coordinates(total_shots['x'].to_numpy(dtype=np.float64), total_shots['y'].to_numpy(dtype=np.float64))
+    y = 80 - y
+    col = np.clip(((x - GRID_X_RANGE[0]) / (GRID_X_RANGE[1] - GRID_X_RANGE[0]) * nx).astype(np.int64), 0, nx - 1)
+    row = np.clip(((y - GRID_Y_RANGE[0]) / (GRID_Y_RANGE[1] - GRID_Y_RANGE[0]) * ny).astype(np.int64), 0, ny - 1)
+
+    # One flat bin per (team and player, cell), counted and summed with bincount
+    codes, labels = pd.MultiIndex.from_frame(total_shots[['Team', 'Player']].astype(str)).factorize()
+    flat = codes * (nx * ny) + row * nx + col
+    size = len(labels) * nx * ny
+    grids = np.stack([
+        np.bincount(flat, minlength=size),
+        np.bincount(flat, weights=total_shots['isGoal'].to_numpy(dtype=np.float64), minlength=size),
+        np.bincount(flat, weights=total_shots['xG'].to_numpy(dtype=np.float64), minlength=size)
+    ]).astype(np.float64)
+    grids = grids.reshape(len(GRID_STATISTICS), len(labels), ny, nx).transpose(1, 0, 2, 3)
+    return labels.to_frame(index=False, name=['Team', 'Player']), grids
+
+
+def heatmap_stats(grid, statistic='xG', bins=DEFAULT_BINS):
+    """Return one layer of a summed grid in the bin_statistic format drawn by VerticalPitch.heatmap."""
+    x_edges, y_edges = grid_edges(bins)
+    x_grid, y_grid = np.meshgrid(x_edges, y_edges)
+    cx, cy = np.meshgrid((x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2)
+    return {'statistic': grid[GRID_STATISTICS.index(statistic)], 'x_grid': x_grid, 'y_grid': y_grid, 'cx': cx, 'cy': cy}
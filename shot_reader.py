@@ -0,0 +1,228 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# File handling packages
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# External Packages
+from instrumentation import count, timed
+
+###################################################################
+
+# Columns of a match shot CSV, in file order, and the dtypes they are parsed to
+SHOT_CSV_COLUMNS = ['Team', 'Player', 'Event', 'Mins', 'Secs', 'X', 'Y', 'X2', 'Y2']
+SHOT_CSV_DTYPES = {
+    'Team': 'category',
+    'Player': 'category',
+    'Event': 'category',
+    'Mins': np.int16,
+    'Secs': np.int16,
+    'X': np.float32,
+    'Y': np.float32,
+    'X2': np.float32,
+    'Y2': np.float32,
+}
+NUMERIC_COLUMNS = ['Mins', 'Secs', 'X', 'Y', 'X2', 'Y2']
+INTEGER_COLUMNS = ['Mins', 'Secs']
+
+# Placeholder logged for the pass coordinates of a shot without a recorded pass
+MISSING_VALUES = ['-']
+OPTIONAL_COLUMNS = ['X2', 'Y2']
+
+# Valid sides, and the ranges of the clock and of the 100 x 100 event coordinates
+SIDES = ['Home', 'Away']
+RANGES = {'Mins': (0, 150), 'Secs': (0, 59), 'X': (0, 100), 'Y': (0, 100), 'X2': (0, 100), 'Y2': (0, 100)}
+
+# Parse engines: pyarrow.csv, which parses straight to dictionary and numeric arrays, or pandas' C parser
+ENGINES = ['pyarrow', 'c']
+DEFAULT_ENGINE = 'pyarrow'
+
+# Problems reported per file before the rest are summarized
+MAX_PROBLEMS = 5
+
+
+def _read_c(path):
+    """Parse a shot CSV with pandas' C parser, leaving the names as strings until the batch is combined (private method)."""
+    dtypes = {column: str if dtype == 'category' else dtype for column, dtype in SHOT_CSV_DTYPES.items()}
+    return pd.read_csv(path, dtype=dtypes, keep_default_na=False,
+                       na_values={column: MISSING_VALUES for column in OPTIONAL_COLUMNS})[SHOT_CSV_COLUMNS]
+
+
+def _combine_c(frames):
+    """Concatenate parsed DataFrames and encode their names as categoricals once for the batch (private method)."""
+    return pd.concat(frames, ignore_index=True).astype(SHOT_CSV_DTYPES)
+
+
+def _read_pyarrow(path):
+    """Parse a shot CSV with pyarrow.csv into an Arrow table of the shot dtypes (private method)."""
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    # Files are read on the batch's thread pool, so each parse stays single-threaded
+    name = pa.dictionary(pa.int32(), pa.string())
+    column_types = {'Team': name, 'Player': name, 'Event': name, 'Mins': pa.int16(), 'Secs': pa.int16(),
+                    'X': pa.float32(), 'Y': pa.float32(), 'X2': pa.float32(), 'Y2': pa.float32()}
+    convert_options = pv.ConvertOptions(column_types=column_types, null_values=MISSING_VALUES, strings_can_be_null=False)
+    read_options = pv.ReadOptions(use_threads=False)
+    return pv.read_csv(path, read_options=read_options, convert_options=convert_options).select(SHOT_CSV_COLUMNS)
+
+
+def _combine_pyarrow(tables):
+    """Concatenate parsed Arrow tables and convert them to one DataFrame, unifying their dictionaries (private method)."""
+    import pyarrow as pa
+
+    return pa.concat_tables(tables).to_pandas()
+
+
+# Per engine: parse one file, and combine the parsed files of a batch into one DataFrame
+READERS = {'c': _read_c, 'pyarrow': _read_pyarrow}
+COMBINERS = {'c': _combine_c, 'pyarrow': _combine_pyarrow}
+
+
+def _line(row):
+    """Return the file line number of a data row, counting the header (private method)."""
+    return int(row) + 2
+
+
+def _summarize(problems):
+    """Join the problems of one file, reporting only the first few (private method)."""
+    if len(problems) > MAX_PROBLEMS:
+        problems = problems[:MAX_PROBLEMS] + [f"... and {len(problems) - MAX_PROBLEMS} more"]
+    return '; '.join(problems)
+
+
+def _check_header(path):
+    """Return the problems with a shot CSV's header line (private method)."""
+    with open(path, 'r', newline='') as f:
+        header = [column.strip() for column in f.readline().rstrip('\r\n').split(',')]
+    missing = [column for column in SHOT_CSV_COLUMNS if column not in header]
+    unexpected = [column for column in header if column not in SHOT_CSV_COLUMNS]
+
+    problems = []
+    if missing:
+        problems.append(f"missing columns {', '.join(missing)}")
+    if unexpected:
+        problems.append(f"unexpected columns {', '.join(unexpected)}")
+    return problems
+
+
+def _check_parse(path):
+    """Locate the values that failed the typed parse by re-reading the file as text (private method)."""
+    text = pd.read_csv(path, dtype=str, keep_default_na=False)
+    problems = []
+    for column in NUMERIC_COLUMNS:
+        values = text[column].str.strip()
+        allowed = values.isin(MISSING_VALUES).to_numpy() if column in OPTIONAL_COLUMNS else np.zeros(len(values), dtype=bool)
+        parsed = pd.to_numeric(values.where(~allowed), errors='coerce')
+        if column in INTEGER_COLUMNS:
+            parsed = parsed.where(parsed == np.floor(parsed))
+        for row in np.flatnonzero(parsed.isna().to_numpy() & ~allowed):
+            problems.append(f"line {_line(row)}: {column} {values.iloc[row]!r} is not a valid number")
+    return problems
+
+
+def _parse(path, engine):
+    """Check the header of one file and parse it, returning (parsed shots, problems) (private method)."""
+    try:
+        problems = _check_header(path)
+        if problems:
+            return None, problems
+        try:
+            return READERS[engine](path), []
+        except (ValueError, TypeError, OverflowError) as e:
+            return None, _check_parse(path) or [str(e).strip().splitlines()[0]]
+    except (OSError, UnicodeDecodeError) as e:
+        return None, [str(e)]
+
+
+def _bad_names(values, allowed=None):
+    """Flag the rows of a categorical column that are missing, blank or not one of the allowed names (private method)."""
+    bad = np.array([not name.strip() or (allowed is not None and name not in allowed)
+                    for name in values.cat.categories.tolist()], dtype=bool)
+
+    # Missing values have code -1, which picks the trailing flag
+    return np.append(bad, True)[values.cat.codes.to_numpy()]
+
+
+def validate_shots(df):
+    """Return a (row position, problem) pair for every invalid value of parsed shots, checking every row at once."""
+    problems = []
+
+    # Names are checked once per distinct value rather than per row
+    team = df['Team']
+    problems += [(row, f"Team {team.iloc[row]!r} is not {' or '.join(SIDES)}") for row in np.flatnonzero(_bad_names(team, SIDES))]
+    for column in ['Player', 'Event']:
+        problems += [(row, f"{column} is empty") for row in np.flatnonzero(_bad_names(df[column]))]
+
+    # Pass coordinates may be missing, every other value must be in range
+    for column, (low, high) in RANGES.items():
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        bad = ~((values >= low) & (values <= high))
+        if column in OPTIONAL_COLUMNS:
+            bad &= ~np.isnan(values)
+        problems += [(row, f"{column} {values[row]:g} is outside {low}-{high}") for row in np.flatnonzero(bad)]
+    one_pass_coordinate = np.isnan(df['X2'].to_numpy(dtype=np.float64)) != np.isnan(df['Y2'].to_numpy(dtype=np.float64))
+    problems += [(row, "only one of X2 and Y2 is set") for row in np.flatnonzero(one_pass_coordinate)]
+    return problems
+
+
+@timed('read_shot_files')
+def read_shot_files(paths, engine=DEFAULT_ENGINE, workers=None):
+    """Read and validate a batch of match shot CSVs, returning ({path: shots}, {path: error}) for the valid and invalid files."""
+    if engine not in READERS:
+        raise ValueError(f"Unknown CSV engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    paths = list(paths)
+    if not paths:
+        return {}, {}
+
+    # Parse the files on a thread pool; the parsers release the GIL
+    with ThreadPoolExecutor(max_workers=workers or min(8, len(paths))) as executor:
+        results = list(executor.map(lambda path: _parse(path, engine), paths))
+    problems = {path: file_problems for path, (_, file_problems) in zip(paths, results) if file_problems}
+    parsed = [(path, shots) for path, (shots, _) in zip(paths, results) if shots is not None]
+
+    # Convert and validate the parsed files as one frame, then map each invalid row back to its file and line
+    frames = {}
+    if parsed:
+        combined = COMBINERS[engine]([shots for _, shots in parsed])
+        starts = np.cumsum([0] + [len(shots) for _, shots in parsed])
+        for row, problem in validate_shots(combined):
+            index = np.searchsorted(starts, row, side='right') - 1
+            problems.setdefault(parsed[index][0], []).append(f"line {_line(row - starts[index])}: {problem}")
+
+        # Slices share the batch's categories, so the valid files concatenate without recoding
+        for index, (path, _) in enumerate(parsed):
+            if path not in problems:
+                frames[path] = combined.iloc[starts[index]:starts[index + 1]].reset_index(drop=True)
+
+    errors = {path: f"{Path(path).name}: {_summarize(problems[path])}" for path in paths if path in problems}
+    count('read_shot_files.files', len(frames))
+    count('read_shot_files.errors', len(errors))
+    return frames, errors
+
+
+def main():
+    """Validate every shot CSV under a directory and report the files that fail."""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Read and validate the match shot CSVs of the Competitions tree.")
+    parser.add_argument('source', nargs='?', default=str(Path(__file__).parent / 'Competitions'))
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE, help="CSV parse engine.")
+    parser.add_argument('--workers', type=int, default=None, help="Reader threads (default: up to 8).")
+    args = parser.parse_args()
+
+    paths = sorted(Path(args.source).glob('**/Raw Data/* Shots.csv'))
+    start = time.perf_counter()
+    frames, errors = read_shot_files(paths, engine=args.engine, workers=args.workers)
+    rows = sum(len(df) for df in frames.values())
+    print(f"Read {len(frames)} files ({rows} shots) with the {args.engine} engine in {time.perf_counter() - start:.3f}s | Errors: {len(errors)}")
+    for path, error in errors.items():
+        print(f"Warning: {Path(path).parent.parent}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,671 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+
+# File handling packages
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+# Columnar storage packages
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Array packages
+import numpy as np
+
+# External Packages
+from data_processing import DataProcessing, SHOT_TOTAL_COLUMNS, compact_shots, concat_shots
+from shot_grids import DEFAULT_BINS, bin_shots
+from shot_reader import DEFAULT_ENGINE, ENGINES, read_shot_files
+from instrumentation import count, timed
+
+###################################################################
+
+# Order of the directory levels below Competitions/ and of the store partitions
+PARTITION_KEYS = ['competition', 'division', 'conference', 'season', 'team', 'match']
+
+# Columns of a raw shot CSV after the pages' Team -> H_A rename, in the compact dtypes of data_processing
+NAME = pa.dictionary(pa.int32(), pa.string())
+SHOT_SCHEMA = pa.schema([
+    ('H_A', NAME),
+    ('Player', NAME),
+    ('Event', NAME),
+    ('Mins', pa.int16()),
+    ('Secs', pa.int16()),
+    ('X', pa.float32()),
+    ('Y', pa.float32()),
+    ('X2', pa.float32()),
+    ('Y2', pa.float32()),
+    ('Team', NAME),
+    ('MatchId', NAME),
+    ('Opponent', NAME),
+])
+
+# Layout of the stored shot tables; a store written in another layout is rebuilt on the next ingest
+STORE_FORMAT = '2'
+
+SHOTS_SUFFIX = ' Shots.csv'
+
+# File names inside each match partition
+SHOTS_FILE = 'shots.parquet'
+SCORED_FILE = 'scored.parquet'
+GRIDS_FILE = 'grids_{}x{}.npz'
+
+# Layout of the scored tables; older tables are rescored, so stores written before the compact schema are rewritten once
+SCORED_FORMAT = '2'
+
+# Season totals per shooting team and player, maintained as matches are scored, replaced or removed
+TOTALS_KEYS = ['competition', 'division', 'conference', 'season', 'Team', 'Player']
+TOTALS_GROUP_KEYS = TOTALS_KEYS[:5]
+CONTRIBUTION_COLUMNS = ['rel_path', 'folder', 'MatchId'] + TOTALS_KEYS + SHOT_TOTAL_COLUMNS
+
+# One side's shots of a match; both teams' folders may store them
+MATCH_SIDE_KEYS = PARTITION_KEYS[:4] + ['MatchId', 'Team']
+
+
+def _temporary_path(path):
+    """Return a hidden path beside a file, unique to this process and call, to write it before swapping it in with os.replace (private method)."""
+    return path.with_name(f'.{path.name}.{os.getpid()}.{uuid.uuid4().hex[:12]}.tmp')
+
+
+def folder_priority(folder, team):
+    """Rank a team folder storing a side's shots of a match: the lowest key owns them, the side's own folder first, then the others by name."""
+    return (folder != team, folder)
+
+
+def owning_folder_mask(frame, folder_column='folder'):
+    """Mark the rows of a frame read from the folder owning each side's shots of a match, so a match stored by both teams counts once."""
+    folders = frame[folder_column].astype(str).to_numpy()
+    teams = frame['Team'].astype(str).to_numpy()
+
+    # Sorted in folder_priority order, so the first folder of each side is its owner
+    ranked = frame[MATCH_SIDE_KEYS].reset_index(drop=True).assign(not_own=folders != teams, folder_name=folders)
+    ranked = ranked.sort_values(['not_own', 'folder_name'], kind='stable')
+    owner = ranked.groupby(MATCH_SIDE_KEYS, observed=True, sort=False)['folder_name'].transform('first').sort_index()
+    return folders == owner.to_numpy()
+
+
+class ShotStore:
+    def __init__(self, source_dir=None, store_dir=None, csv_engine=DEFAULT_ENGINE):
+        """Initialize the ShotStore class with the Competitions tree, the store location and the shot CSV parse engine."""
+        root = Path(__file__).parent
+        self.source_dir = Path(source_dir) if source_dir else root / 'Competitions'
+        self.store_dir = Path(store_dir) if store_dir else root / 'Shot Store'
+        self.csv_engine = csv_engine
+        self.manifest_path = self.store_dir / '_manifest.json'
+        self.format_path = self.store_dir / '_format'
+        self._manifest_cache = (None, {})
+        self._index_cache = (None, {})
+
+        # Validation errors of the match folders that could not be ingested, by relative path
+        self.ingest_errors = {}
+
+        # Per-match contributions, the totals summed from them and the index of folded-in matches
+        self.contributions_path = self.store_dir / '_player_contributions.parquet'
+        self.totals_path = self.store_dir / '_player_totals.parquet'
+        self.totals_index_path = self.store_dir / '_player_totals.json'
+        self._totals_cache = (None, None)
+        self._totals_lock = threading.RLock()
+
+    def _load_manifest(self):
+        """Load the ingest manifest recording the file signatures of every stored match (private method)."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _cached_manifest(self):
+        """Return the manifest, re-reading it only when the file has been rewritten (private method)."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self._manifest_cache[0] != mtime:
+            self._manifest_cache = (mtime, self._load_manifest())
+        return self._manifest_cache[1]
+
+    def _match_index(self):
+        """Return {(competition, division, conference, season, team): {match id: (rel path, opponent, files)}} of the manifest (private method)."""
+        manifest = self._cached_manifest()
+        if self._index_cache[0] is not manifest:
+            index = {}
+            for rel_path, files in manifest.items():
+                keys = rel_path.split('/')
+                match_id, _, opponent = keys[-1].partition('_')
+                index.setdefault(tuple(keys[:-1]), {})[match_id] = (rel_path, opponent, files)
+            self._index_cache = (manifest, index)
+        return self._index_cache[1]
+
+    def _indexed(self):
+        """Return the match index, ingesting the Competitions tree first when the store has no manifest yet (private method)."""
+        index = self._match_index()
+        if not index and not self.manifest_path.exists():
+            self.ingest()
+            index = self._match_index()
+        return index
+
+    def _save_manifest(self, manifest):
+        """Write the ingest manifest atomically (private method)."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = _temporary_path(self.manifest_path)
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _scan_match_folders(self):
+        """Walk the Competitions tree and return the shot file signatures of each match folder (private method)."""
+        folders = {}
+        if not self.source_dir.is_dir():
+            return folders
+
+        def walk(path, keys):
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    if len(keys) < len(PARTITION_KEYS) - 1:
+                        walk(entry.path, keys + [entry.name])
+                        continue
+                    raw_dir = Path(entry.path) / 'Raw Data'
+                    if not raw_dir.is_dir():
+                        continue
+                    files = {}
+                    with os.scandir(raw_dir) as raw_entries:
+                        for raw in raw_entries:
+                            if raw.is_file() and raw.name.endswith(SHOTS_SUFFIX):
+                                stat = raw.stat()
+                                files[raw.name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                    if files:
+                        folders['/'.join(keys + [entry.name])] = files
+
+        walk(self.source_dir, [])
+        return folders
+
+    def _partition_dir(self, keys):
+        """Return the hive-style store directory for a list of partition values (private method)."""
+        path = self.store_dir
+        for name, value in zip(PARTITION_KEYS, keys):
+            path = path / f'{name}={quote(value, safe="")}'
+        return path
+
+    def _is_unchanged(self, stored, scanned):
+        """Check whether a stored match folder still has the same files, sizes and mtimes (private method)."""
+        if not isinstance(stored, dict) or stored.keys() != scanned.keys():
+            return False
+        return all(isinstance(stored[name], dict) and stored[name].get('size') == sig['size']
+                   and stored[name].get('mtime_ns') == sig['mtime_ns'] for name, sig in scanned.items())
+
+    def _shot_paths(self, rel_path, files):
+        """Return the raw shot CSV paths of one match folder by file name (private method)."""
+        raw_dir = self.source_dir / rel_path / 'Raw Data'
+        return {file_name: raw_dir / file_name for file_name in sorted(files)}
+
+    def _match_table(self, rel_path, files, frames):
+        """Combine the parsed shot CSVs of one match folder into a single Arrow table and checksum each file (private method)."""
+        match = rel_path.split('/')[-1]
+        match_id, _, opponent = match.partition('_')
+
+        tables = []
+        for file_name, path in self._shot_paths(rel_path, files).items():
+            files[file_name]['sha256'] = hashlib.sha256(path.read_bytes()).hexdigest()
+            df = frames[path].rename(columns={'Team': 'H_A'})
+            df['Team'] = file_name[:-len(SHOTS_SUFFIX)]
+            df['MatchId'] = match_id
+            df['Opponent'] = opponent
+            tables.append(pa.Table.from_pandas(df[SHOT_SCHEMA.names], schema=SHOT_SCHEMA, preserve_index=False))
+        return pa.concat_tables(tables)
+
+    def _stored_format(self):
+        """Return the layout version the store was written in, or None for a new or older store (private method)."""
+        try:
+            return self.format_path.read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    @timed('shot_store.ingest')
+    def ingest(self, full=False):
+        """Compact new or changed match folders into the store and drop folders that no longer exist."""
+        # A store in an older layout is rebuilt rather than read back with the wrong dtypes
+        full = full or self._stored_format() != STORE_FORMAT
+        manifest = {} if full else self._load_manifest()
+        if full and self.store_dir.exists():
+            shutil.rmtree(self.store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.format_path.write_text(STORE_FORMAT)
+
+        folders = self._scan_match_folders()
+        summary = {'written': [], 'removed': [], 'unchanged': 0, 'errors': {}}
+
+        for rel_path in sorted(set(manifest) - set(folders)):
+            shutil.rmtree(self._partition_dir(rel_path.split('/')), ignore_errors=True)
+            del manifest[rel_path]
+            summary['removed'].append(rel_path)
+
+        changed = {}
+        for rel_path, files in sorted(folders.items()):
+            if self._is_unchanged(manifest.get(rel_path), files):
+                summary['unchanged'] += 1
+            else:
+                changed[rel_path] = files
+
+        # Parse and validate every new or changed shot CSV in one batch; a folder with an invalid file is not stored
+        frames, errors = read_shot_files([path for rel_path, files in changed.items() for path in self._shot_paths(rel_path, files).values()],
+                                         engine=self.csv_engine)
+        for rel_path, files in changed.items():
+            folder_errors = [errors[path] for path in self._shot_paths(rel_path, files).values() if path in errors]
+            if folder_errors:
+                summary['errors'][rel_path] = '; '.join(folder_errors)
+                continue
+            try:
+                table = self._match_table(rel_path, files, frames)
+            except (OSError, ValueError, KeyError, pa.ArrowException) as e:
+                summary['errors'][rel_path] = str(e)
+                continue
+            part_dir = self._partition_dir(rel_path.split('/'))
+            part_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = _temporary_path(part_dir / SHOTS_FILE)
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, part_dir / SHOTS_FILE)
+            manifest[rel_path] = files
+            summary['written'].append(rel_path)
+
+        self._save_manifest(manifest)
+        self.ingest_errors = summary['errors']
+
+        # Replaced and removed matches leave the season totals until they are scored again
+        if summary['written'] or summary['removed']:
+            self.update_player_totals(removed=summary['written'] + summary['removed'])
+        return summary
+
+    def _team_matches(self, competition, division, conference, season, team, match_ids=None):
+        """Return {match id: (rel path, opponent, files)} for a team's stored matches (private method)."""
+        matches = self._indexed().get((competition, division, conference, season, team), {})
+        match_ids = None if match_ids is None else set(match_ids)
+        return {match_id: match for match_id, match in matches.items() if match_ids is None or match_id in match_ids}
+
+    def teams(self, competition=None, division=None, conference=None, season=None):
+        """List the (competition, division, conference, season, team) keys with stored matches, optionally filtered."""
+        wanted = [competition, division, conference, season]
+        return sorted(keys for keys in self._indexed() if all(value is None or value == key for value, key in zip(wanted, keys)))
+
+    def match_errors(self, competition, division, conference, season, team):
+        """Return {match id: validation error} for a team's match folders that the last ingest could not store."""
+        prefix = '/'.join([competition, division, conference, season, team]) + '/'
+        return {rel_path[len(prefix):].partition('_')[0]: error for rel_path, error in self.ingest_errors.items() if rel_path.startswith(prefix)}
+
+    @timed('shot_store.fixture_coverage')
+    def fixture_coverage(self, match_data, competition, division, conference=None, season=None):
+        """Compare the fixtures listed in upsl_data.json with the stored match folders, returning (fixtures, unmatched folders)."""
+        index = self._indexed()
+        rows = []
+        listed = set()
+        for conference_name in match_data.get_conference_names():
+            if conference not in (None, conference_name) or match_data.get_division_name(conference_name) != division:
+                continue
+            for season_name in match_data.get_seasons(conference_name):
+                if season not in (None, season_name):
+                    continue
+                for fixture in match_data.get_fixtures(conference_name, season_name):
+                    # Either team's folder may hold the match, with one shot file per shooting team
+                    keys = (competition, division, conference_name, season_name)
+                    folders = {}
+                    for team in [fixture["Home Team"], fixture["Away Team"]]:
+                        listed.add(keys + (team, fixture["MatchId"]))
+                        match = index.get(keys + (team,), {}).get(fixture["MatchId"])
+                        if match is not None:
+                            folders[match[0]] = match[2]
+                    shot_files = {file_name for files in folders.values() for file_name in files}
+                    home = f'{fixture["Home Team"]}{SHOTS_SUFFIX}' in shot_files
+                    away = f'{fixture["Away Team"]}{SHOTS_SUFFIX}' in shot_files
+                    rows.append({'conference': conference_name, 'season': season_name, **fixture,
+                                 'Played': fixture["Home Score"] not in ("", None), 'Home Shots': home, 'Away Shots': away,
+                                 'Status': 'complete' if home and away else 'partial' if home or away else 'missing',
+                                 'Folders': sorted(folders)})
+
+        # Stored folders that no listed fixture points to, such as a misnamed date or team
+        unmatched = [
+            {'rel_path': rel_path, 'MatchId': match_id, 'Opponent': opponent}
+            for keys, matches in sorted(index.items())
+            if keys[:2] == (competition, division) and conference in (None, keys[2]) and season in (None, keys[3])
+            for match_id, (rel_path, opponent, _) in sorted(matches.items()) if keys + (match_id,) not in listed
+        ]
+        return pd.DataFrame(rows), pd.DataFrame(unmatched, columns=['rel_path', 'MatchId', 'Opponent'])
+
+    def _view_filter(self, team, view):
+        """Return the row filter selecting the shots for or against a team, or None for both (private method)."""
+        if view is None:
+            return None
+        return ds.field('Team') == team if view == "Shots For" else ds.field('Team') != team
+
+    def match_files(self, competition, division, conference, season, team, match_ids=None, view="Shots For"):
+        """List the stored shot files of a team's matches with their content checksums, without opening them."""
+        listing = []
+        for match_id, (rel_path, opponent, files) in self._team_matches(competition, division, conference, season, team, match_ids).items():
+            for file_name, signature in sorted(files.items()):
+                shooting_team = file_name[:-len(SHOTS_SUFFIX)]
+                if view is None or (shooting_team == team) == (view == "Shots For"):
+                    listing.append({'MatchId': match_id, 'Opponent': opponent, 'Team': shooting_team,
+                                    'sha256': signature.get('sha256'), 'rel_path': rel_path})
+        return listing
+
+    @timed('shot_store.read')
+    def read(self, competition, division, conference, season, team, match_ids=None, view="Shots For"):
+        """Read the shots of a team's matches, opening only the partitions of the requested matches."""
+        matches = self._team_matches(competition, division, conference, season, team, match_ids)
+        columns = SHOT_SCHEMA.names
+        if not matches:
+            return SHOT_SCHEMA.empty_table().to_pandas()
+
+        paths = [str(self._partition_dir(rel_path.split('/')) / SHOTS_FILE) for rel_path, _, _ in matches.values()]
+        dataset = ds.dataset(paths, format='parquet')
+        table = dataset.to_table(columns=columns, filter=self._view_filter(team, view))
+        count('shot_store.rows_read', table.num_rows)
+
+        # Stores ingested before the compact schema are cast on read
+        return compact_shots(table.to_pandas())
+
+    def _sources(self, files):
+        """Return the {file name: sha256} tag of a match folder's shot files (private method)."""
+        return {file_name: signature.get('sha256') for file_name, signature in sorted(files.items())}
+
+    def _is_scored(self, rel_path, files, model_version):
+        """Check whether a match has a scored table for this model version and these source files (private method)."""
+        try:
+            metadata = pq.read_schema(self._partition_dir(rel_path.split('/')) / SCORED_FILE).metadata or {}
+        except (FileNotFoundError, pa.ArrowException):
+            return False
+        return (metadata.get(b'model_version', b'').decode() == model_version
+                and metadata.get(b'format', b'').decode() == SCORED_FORMAT
+                and json.loads(metadata.get(b'sources', b'{}')) == self._sources(files))
+
+    @timed('shot_store.read_scored')
+    def read_scored(self, competition, division, conference, season, team, model_version, match_ids=None, view="Shots For"):
+        """Read materialized xG for a team's matches, returning the fresh shots and the ids of stale or missing matches."""
+        matches = self._team_matches(competition, division, conference, season, team, match_ids)
+        tables = []
+        stale = []
+        for match_id, (rel_path, _, files) in matches.items():
+            if self._is_scored(rel_path, files, model_version):
+                tables.append(pq.read_table(self._partition_dir(rel_path.split('/')) / SCORED_FILE))
+            else:
+                stale.append(match_id)
+
+        scored = concat_shots([compact_shots(table.to_pandas()) for table in tables])
+        if view is not None and not scored.empty:
+            scored = scored[(scored['Team'] == team) == (view == "Shots For")].reset_index(drop=True)
+        return scored, stale
+
+    @timed('shot_store.write_scored')
+    def write_scored(self, competition, division, conference, season, team, total_shots, model_version, update_totals=True):
+        """Materialize the scored shots of a team's matches, tagged with the model version and source checksums."""
+        matches = self._team_matches(competition, division, conference, season, team, total_shots['MatchId'].unique())
+        scored = {}
+        for match_id, match_shots in total_shots.groupby('MatchId', observed=True, sort=False):
+            rel_path, _, files = matches[match_id]
+            table = pa.Table.from_pandas(match_shots.reset_index(drop=True), preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                b'model_version': model_version.encode(),
+                b'format': SCORED_FORMAT.encode(),
+                b'sources': json.dumps(self._sources(files)).encode()
+            })
+            part_dir = self._partition_dir(rel_path.split('/'))
+            tmp_path = _temporary_path(part_dir / SCORED_FILE)
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, part_dir / SCORED_FILE)
+            scored[rel_path] = match_shots
+
+        if update_totals:
+            self.update_player_totals(scored=scored, model_version=model_version)
+
+    def matches(self):
+        """List the relative paths of every stored match folder."""
+        if not self.manifest_path.exists():
+            self.ingest()
+        return sorted(self._cached_manifest())
+
+    def stale_matches(self, model_version, full=False):
+        """List the stored match folders whose materialized xG is stale or missing for a model version."""
+        manifest = self._cached_manifest()
+        return [rel_path for rel_path in self.matches() if full or not self._is_scored(rel_path, manifest[rel_path], model_version)]
+
+    def read_match_scored(self, rel_path):
+        """Read the materialized xG of one stored match folder."""
+        return compact_shots(pq.read_table(self._partition_dir(rel_path.split('/')) / SCORED_FILE).to_pandas())
+
+    def score_match(self, rel_path, data_processor, update_totals=True):
+        """Score both sides of one stored match folder and materialize the result."""
+        keys = rel_path.split('/')
+        match_id = keys[-1].partition('_')[0]
+        shot_events = self.read(*keys[:-1], match_ids=[match_id], view=None)
+        total_shots = data_processor.calc_xg(shot_events.drop(columns=['Opponent']))
+        self.write_scored(*keys[:-1], total_shots, data_processor.scorer.model_version, update_totals=update_totals)
+        return total_shots
+
+    def match_grids(self, rel_path, data_processor, bins=DEFAULT_BINS):
+        """Return the per team and player shot grids of one match folder, binning and caching them when stale or missing."""
+        model_version = data_processor.scorer.model_version
+        sources = json.dumps(self._sources(self._cached_manifest()[rel_path]))
+        part_dir = self._partition_dir(rel_path.split('/'))
+        path = part_dir / GRIDS_FILE.format(*bins)
+
+        # Grids are tagged like the scored table, so a new model or changed source file rebins the match
+        try:
+            with np.load(path) as cached:
+                if str(cached['model_version']) == model_version and str(cached['sources']) == sources:
+                    count('shot_store.grids_read')
+                    return pd.DataFrame({'Team': cached['teams'], 'Player': cached['players']}), cached['grids']
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            pass
+
+        if self._is_scored(rel_path, self._cached_manifest()[rel_path], model_version):
+            total_shots = self.read_match_scored(rel_path)
+        else:
+            total_shots = self.score_match(rel_path, data_processor)
+        labels, grids = bin_shots(total_shots, bins)
+
+        tmp_path = _temporary_path(path)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, teams=labels['Team'].to_numpy(dtype=str), players=labels['Player'].to_numpy(dtype=str), grids=grids,
+                     model_version=np.array(model_version), sources=np.array(sources))
+        os.replace(tmp_path, path)
+        count('shot_store.grids_binned')
+        return labels, grids
+
+    def materialize(self, data_processor, full=False):
+        """Score every match whose materialized xG is stale or missing for the data processor's model."""
+        teams = {}
+        for rel_path in self.stale_matches(data_processor.scorer.model_version, full=full):
+            keys = rel_path.split('/')
+            teams.setdefault(tuple(keys[:-1]), []).append(keys[-1].partition('_')[0])
+
+        scored = 0
+        for keys, match_ids in sorted(teams.items()):
+            shot_events = self.read(*keys, match_ids=match_ids, view=None)
+            self.write_scored(*keys, data_processor.calc_xg(shot_events.drop(columns=['Opponent'])), data_processor.scorer.model_version)
+            scored += len(match_ids)
+        return scored
+
+    def _load_totals(self):
+        """Return the totals index, contributions and totals, re-reading them only when rewritten (private method)."""
+        try:
+            mtime = self.totals_index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}, pd.DataFrame(), pd.DataFrame(columns=TOTALS_KEYS + SHOT_TOTAL_COLUMNS)
+        if self._totals_cache[0] != mtime:
+            with open(self.totals_index_path, 'r') as f:
+                index = json.load(f)
+            contributions = pd.read_parquet(self.contributions_path)
+
+            # Totals summed over other columns are folded in again from scratch
+            if set(contributions.columns) != set(CONTRIBUTION_COLUMNS):
+                self._totals_cache = (mtime, ({}, pd.DataFrame(), pd.DataFrame(columns=TOTALS_KEYS + SHOT_TOTAL_COLUMNS)))
+            else:
+                self._totals_cache = (mtime, (index, contributions, pd.read_parquet(self.totals_path)))
+        index, contributions, totals = self._totals_cache[1]
+        return dict(index), contributions, totals
+
+    def _save_totals(self, index, contributions, totals):
+        """Write the contributions and totals, then the index that marks them complete (private method)."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        for path, frame in [(self.contributions_path, contributions), (self.totals_path, totals)]:
+            tmp_path = _temporary_path(path)
+            frame.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        tmp_path = _temporary_path(self.totals_index_path)
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.totals_index_path)
+
+    @timed('shot_store.update_player_totals')
+    def update_player_totals(self, removed=(), scored=None, model_version=None):
+        """Fold newly scored matches into the season totals and drop removed ones, re-summing only the affected teams."""
+        scored = scored or {}
+        changed = set(removed) | set(scored)
+        if not changed:
+            return
+
+        with self._totals_lock:
+            index, contributions, totals = self._load_totals()
+            manifest = self._cached_manifest()
+
+            # Drop the old contribution of every changed match
+            affected = set()
+            if not contributions.empty:
+                is_changed = contributions['rel_path'].isin(changed)
+                affected.update(contributions.loc[is_changed, TOTALS_GROUP_KEYS].itertuples(index=False, name=None))
+                contributions = contributions[~is_changed]
+            for rel_path in changed:
+                index.pop(rel_path, None)
+
+            # Add the per-match totals of the newly scored matches
+            parts = [contributions] if not contributions.empty else []
+            for rel_path, total_shots in scored.items():
+                keys = rel_path.split('/')
+                part = DataProcessing.shot_totals(total_shots, group_by=('MatchId', 'Team', 'Player'))
+                part = part.assign(rel_path=rel_path, folder=keys[4], **dict(zip(PARTITION_KEYS[:4], keys[:4])))
+                affected.update(part[TOTALS_GROUP_KEYS].itertuples(index=False, name=None))
+                parts.append(part)
+                index[rel_path] = {'model_version': model_version, 'sources': self._sources(manifest.get(rel_path, {}))}
+            contributions = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=CONTRIBUTION_COLUMNS)
+
+            # Re-sum the affected teams, counting a match stored by both teams once, preferring the shooting team's folder
+            def in_affected(frame):
+                return pd.MultiIndex.from_frame(frame[TOTALS_GROUP_KEYS]).isin(list(affected))
+
+            subset = contributions[in_affected(contributions)]
+            new_totals = subset[owning_folder_mask(subset)].groupby(TOTALS_KEYS, observed=True, sort=False)[SHOT_TOTAL_COLUMNS].sum().reset_index()
+
+            frames = [frame for frame in [totals[~in_affected(totals)], new_totals] if not frame.empty]
+            totals = pd.concat(frames, ignore_index=True) if frames else new_totals
+            self._save_totals(index, contributions.reset_index(drop=True), totals.reset_index(drop=True))
+
+    def _in_scope(self, rel_path, competition, division, conference=None, season=None, team=None):
+        """Check whether a match folder belongs to a competition, division and optional conference, season and team (private method)."""
+        wanted = [competition, division, conference, season, team]
+        return all(value is None or value == key for value, key in zip(wanted, rel_path.split('/')))
+
+    def match_sources(self, competition=None, division=None, conference=None, season=None, team=None):
+        """Return {rel path: {file name: sha256}} of the stored match folders in scope, without opening them."""
+        rel_paths = self.matches()
+        manifest = self._cached_manifest()
+        return {rel_path: self._sources(manifest[rel_path]) for rel_path in rel_paths
+                if self._in_scope(rel_path, competition, division, conference, season, team)}
+
+    def stale_totals(self, model_version, competition, division, conference=None, season=None):
+        """List the match folders in scope missing from the season totals or folded in from other files or another model."""
+        # Listing the matches first ingests a store without a manifest yet
+        rel_paths = self.matches()
+        index = self._load_totals()[0]
+        manifest = self._cached_manifest()
+        return [
+            rel_path for rel_path in rel_paths
+            if self._in_scope(rel_path, competition, division, conference, season)
+            and index.get(rel_path) != {'model_version': model_version, 'sources': self._sources(manifest[rel_path])}
+        ]
+
+    @timed('shot_store.refresh_player_totals')
+    def refresh_player_totals(self, data_processor, competition, division, conference=None, season=None):
+        """Bring the season totals in scope up to date, scoring only matches without fresh materialized xG."""
+        model_version = data_processor.scorer.model_version
+        with self._totals_lock:
+            stale = self.stale_totals(model_version, competition, division, conference, season)
+            manifest = self._cached_manifest()
+            scored = {}
+            for rel_path in stale:
+                if self._is_scored(rel_path, manifest[rel_path], model_version):
+                    scored[rel_path] = self.read_match_scored(rel_path)
+                else:
+                    scored[rel_path] = self.score_match(rel_path, data_processor, update_totals=False)
+            self.update_player_totals(scored=scored, model_version=model_version)
+        return len(stale)
+
+    def totals_version(self):
+        """Return a token that changes whenever the season totals are rewritten, or None before they exist."""
+        try:
+            return self.totals_index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def player_totals(self, competition, division, conference=None, season=None, team=None):
+        """Read the maintained season totals per shooting team and player, optionally filtered."""
+        totals = self._load_totals()[2]
+        mask = (totals['competition'] == competition) & (totals['division'] == division)
+        for column, value in [('conference', conference), ('season', season), ('Team', team)]:
+            if value is not None:
+                mask &= totals[column] == value
+        return totals[mask].reset_index(drop=True)
+
+def main():
+    """Incrementally ingest the Competitions tree into the shot store and optionally materialize xG."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact the Competitions shot CSVs into the columnar shot store.")
+    parser.add_argument('--full', action='store_true', help="Rebuild the store from scratch instead of incrementally.")
+    parser.add_argument('--score', action='store_true', help="Materialize xG for matches that are stale or missing for the current model.")
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE, help="Shot CSV parse engine.")
+    parser.add_argument('--coverage', action='store_true', help="Report the fixtures in upsl_data.json without shot data and the unmatched match folders.")
+    parser.add_argument('--competition', default='UPSL', help="Competition of the coverage report.")
+    parser.add_argument('--division', default='Premier', help="Division of the coverage report.")
+    parser.add_argument('--model', default=None, help="Exported xG model file of --score (default: the current model version).")
+    args = parser.parse_args()
+
+    shot_store = ShotStore(csv_engine=args.engine)
+    summary = shot_store.ingest(full=args.full)
+    print(f"Written: {len(summary['written'])} | Removed: {len(summary['removed'])} | Unchanged: {summary['unchanged']}")
+    for rel_path, error in summary['errors'].items():
+        print(f"Warning: could not ingest {rel_path}: {error}")
+
+    if args.score:
+        from data_processing import DataProcessing
+        from xg_scorer import resolve_model
+        data_processor = DataProcessing(args.model or resolve_model())
+        scored = shot_store.materialize(data_processor)
+        print(f"Scored: {scored} matches with xG model {data_processor.scorer.model_version}")
+
+    if args.coverage:
+        from match_data import MatchData
+        fixtures, unmatched = shot_store.fixture_coverage(MatchData(), args.competition, args.division)
+        if fixtures.empty:
+            print(f"No fixtures listed for {args.competition} {args.division}")
+        else:
+            played = fixtures[fixtures['Played']]
+            print(f"Fixtures: {len(fixtures)} | Played: {len(played)} | " +
+                  ' | '.join(f"{status.capitalize()}: {(played['Status'] == status).sum()}" for status in ['complete', 'partial', 'missing']))
+            for fixture in played[played['Status'] != 'complete'].to_dict('records'):
+                print(f"Missing shots: {fixture['conference']} {fixture['season']} {fixture['MatchId']} {fixture['Home Team']} v {fixture['Away Team']}"
+                      f" (home {'found' if fixture['Home Shots'] else 'missing'}, away {'found' if fixture['Away Shots'] else 'missing'})")
+        for folder in unmatched.to_dict('records'):
+            print(f"Warning: no fixture in upsl_data.json for {folder['rel_path']}")
+
+
+if __name__ == "__main__":
+    main()
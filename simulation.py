@@ -0,0 +1,269 @@
+###################################################################
+# Monte Carlo match and season simulator driven by per-shot xG, run
+# from the repository root:
+#
+#   python simulation.py --conference "Midwest Central" --season "2024 Fall" --sims 100000
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# External Packages
+from instrumentation import timed
+
+###################################################################
+
+# League points for a win and a draw
+WIN_POINTS = 3
+DRAW_POINTS = 1
+
+# Simulations drawn per batch, bounding memory to batch size x fixtures
+DEFAULT_BATCH_SIZE = 20000
+
+# Goal counts above this are folded into the last bucket of projected fixtures
+MAX_PROJECTED_GOALS = 15
+
+# How each fixture's goals are drawn
+SOURCES = {
+    'xG': "Simulated from each side's shot xG",
+    'result': "Final score, no shot data",
+    'projected': "Projected from the teams' scoring rates"
+}
+
+
+def shot_goal_distributions(shot_xg):
+    """Return the exact goal count distribution of each side from its shot xG, one Poisson-binomial per row."""
+    lengths = np.array([len(xg) for xg in shot_xg], dtype=np.int64)
+    max_shots = int(lengths.max(initial=0))
+
+    # Pad every side's shots with 0 xG so all sides are convolved together, one shot at a time
+    xg = np.zeros((len(shot_xg), max_shots))
+    if max_shots:
+        xg[np.arange(max_shots) < lengths[:, None]] = np.concatenate([np.asarray(side, dtype=np.float64) for side in shot_xg])
+    pmf = np.zeros((len(shot_xg), max_shots + 1))
+    pmf[:, 0] = 1.0
+    for shot in range(max_shots):
+        p = xg[:, shot:shot + 1]
+        pmf[:, 1:] = pmf[:, 1:] * (1 - p) + pmf[:, :-1] * p
+        pmf[:, :1] *= 1 - p
+    return pmf
+
+
+def poisson_goal_distributions(rates, max_goals=MAX_PROJECTED_GOALS):
+    """Return the Poisson goal count distribution of each side, with the tail above max_goals in the last bucket."""
+    rates = np.asarray(rates, dtype=np.float64)[:, None]
+    goals = np.arange(max_goals + 1)
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(goals[1:]))])
+    pmf = np.exp(goals * np.log(np.maximum(rates, 1e-12)) - rates - log_factorial)
+    pmf[:, -1] += 1 - pmf.sum(axis=1)
+    return pmf
+
+
+def sample_goals(pmf, n_sims, rng):
+    """Draw n_sims goal counts for every side from its distribution with one searchsorted call."""
+    n_sides, n_goals = pmf.shape
+    cdf = np.cumsum(pmf, axis=1)
+    cdf[:, -1] = 1.0
+
+    # Shift each side's CDF into its own interval so all sides are searched at once
+    offsets = 2.0 * np.arange(n_sides)
+    flat = (cdf + offsets[:, None]).ravel()
+    draws = rng.random((n_sims, n_sides)) + offsets
+    return np.searchsorted(flat, draws, side='right') - np.arange(n_sides) * n_goals
+
+
+def _pad(distributions):
+    """Stack goal distributions of different lengths into one zero-padded array (private method)."""
+    width = max((len(pmf) for pmf in distributions), default=1)
+    padded = np.zeros((len(distributions), width))
+    for row, pmf in enumerate(distributions):
+        padded[row, :len(pmf)] = pmf
+    return padded
+
+
+def goal_distributions(fixtures):
+    """Return the (home, away) goal distributions of every fixture from its shots, its final score or the teams' scoring rates."""
+    is_result = fixtures['Home Score'].notna() & fixtures['Away Score'].notna()
+
+    # Scoring rates from the known results, used for fixtures without shots or a score
+    played = fixtures[is_result]
+    scored = pd.concat([played.set_index('Home Team')['Home Score'], played.set_index('Away Team')['Away Score']])
+    conceded = pd.concat([played.set_index('Home Team')['Away Score'], played.set_index('Away Team')['Home Score']])
+    average = float(scored.mean()) if len(scored) else 1.5
+    attack = scored.groupby(level=0).mean()
+    defense = conceded.groupby(level=0).mean()
+
+    def rate(team, opponent):
+        return (attack.get(team, average) + defense.get(opponent, average)) / 2
+
+    home, away = [], []
+    columns = ['Source', 'Home Team', 'Away Team', 'Home Score', 'Away Score', 'home_xG', 'away_xG']
+    for source, home_team, away_team, home_score, away_score, home_xg, away_xg in fixtures[columns].itertuples(index=False):
+        if source == 'xG':
+            pmfs = shot_goal_distributions([home_xg, away_xg])
+        elif source == 'result':
+            pmfs = [np.eye(int(home_score) + 1)[-1], np.eye(int(away_score) + 1)[-1]]
+        else:
+            pmfs = poisson_goal_distributions([rate(home_team, away_team), rate(away_team, home_team)])
+        home.append(pmfs[0])
+        away.append(pmfs[1])
+    return _pad(home), _pad(away)
+
+
+@timed('simulate_season')
+def simulate_season(fixtures, n_sims=100000, seed=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Simulate a season n_sims times, batched over simulations and fixtures, and return the match and table projections."""
+    rng = np.random.default_rng(seed)
+    teams = sorted(set(fixtures['Home Team']) | set(fixtures['Away Team']))
+    n_teams = len(teams)
+    home_pmf, away_pmf = goal_distributions(fixtures)
+
+    # One-hot fixture to team maps, so per-team totals of every simulation are matrix products
+    team_index = {team: i for i, team in enumerate(teams)}
+    home_map = np.zeros((len(fixtures), n_teams))
+    away_map = np.zeros((len(fixtures), n_teams))
+    home_map[np.arange(len(fixtures)), fixtures['Home Team'].map(team_index).to_numpy()] = 1
+    away_map[np.arange(len(fixtures)), fixtures['Away Team'].map(team_index).to_numpy()] = 1
+
+    home_wins = np.zeros(len(fixtures))
+    draws = np.zeros(len(fixtures))
+    points_total = np.zeros(n_teams)
+    goals_for_total = np.zeros(n_teams)
+    goals_against_total = np.zeros(n_teams)
+    position_counts = np.zeros(n_teams * n_teams, dtype=np.int64)
+
+    for start in range(0, n_sims, batch_size):
+        n = min(batch_size, n_sims - start)
+        home_goals = sample_goals(home_pmf, n, rng)
+        away_goals = sample_goals(away_pmf, n, rng)
+
+        home_win = home_goals > away_goals
+        draw = home_goals == away_goals
+        home_wins += home_win.sum(axis=0)
+        draws += draw.sum(axis=0)
+
+        home_points = np.where(home_win, WIN_POINTS, np.where(draw, DRAW_POINTS, 0))
+        away_points = np.where(home_win, 0, np.where(draw, DRAW_POINTS, WIN_POINTS))
+        points = home_points @ home_map + away_points @ away_map
+        goals_for = home_goals @ home_map + away_goals @ away_map
+        goals_against = away_goals @ home_map + home_goals @ away_map
+        points_total += points.sum(axis=0)
+        goals_for_total += goals_for.sum(axis=0)
+        goals_against_total += goals_against.sum(axis=0)
+
+        # Rank on points, goal difference and goals for, breaking remaining ties at random
+        order = np.lexsort((rng.random((n, n_teams)), -goals_for, -(goals_for - goals_against), -points), axis=-1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+        position_counts += np.bincount((np.arange(n_teams) * n_teams + positions).ravel(), minlength=n_teams * n_teams)
+
+    # Match projections
+    p_home = home_wins / n_sims
+    p_draw = draws / n_sims
+    p_away = 1 - p_home - p_draw
+    matches = fixtures[['MatchId', 'Home Team', 'Away Team', 'Home Score', 'Away Score', 'Source']].copy()
+    matches['Home xG'] = [np.sum(xg) if xg is not None else np.nan for xg in fixtures['home_xG']]
+    matches['Away xG'] = [np.sum(xg) if xg is not None else np.nan for xg in fixtures['away_xG']]
+    matches['P(Home Win)'] = p_home
+    matches['P(Draw)'] = p_draw
+    matches['P(Away Win)'] = p_away
+    matches['Home xPts'] = WIN_POINTS * p_home + DRAW_POINTS * p_draw
+    matches['Away xPts'] = WIN_POINTS * p_away + DRAW_POINTS * p_draw
+
+    # Table projections, sorted by expected points
+    position_share = position_counts.reshape(n_teams, n_teams) / n_sims
+    positions = pd.DataFrame(position_share, index=teams, columns=np.arange(1, n_teams + 1)).rename_axis('Team')
+    table = pd.DataFrame({
+        'Team': teams,
+        'Matches': (home_map + away_map).sum(axis=0).astype(int),
+        'xPts': points_total / n_sims,
+        'xGF': goals_for_total / n_sims,
+        'xGA': goals_against_total / n_sims,
+        'Avg Position': position_share @ np.arange(1, n_teams + 1),
+        'P(1st)': position_share[:, 0]
+    })
+    table.insert(table.columns.get_loc('xGA') + 1, 'xGD', table['xGF'] - table['xGA'])
+    table = table.sort_values(['xPts', 'Avg Position'], ascending=[False, True], kind='stable').reset_index(drop=True)
+    return {'matches': matches, 'table': table, 'positions': positions.loc[table['Team']]}
+
+
+def simulate_match(home_xg, away_xg, n_sims=100000, seed=None):
+    """Simulate one match from each side's shot xG and return the win, draw and loss probabilities and expected points."""
+    rng = np.random.default_rng(seed)
+    goals = sample_goals(shot_goal_distributions([home_xg, away_xg]), n_sims, rng)
+    home_goals, away_goals = goals[:, 0], goals[:, 1]
+    p_home = float(np.mean(home_goals > away_goals))
+    p_draw = float(np.mean(home_goals == away_goals))
+    return {
+        'P(Home Win)': p_home,
+        'P(Draw)': p_draw,
+        'P(Away Win)': 1 - p_home - p_draw,
+        'Home xPts': WIN_POINTS * p_home + DRAW_POINTS * p_draw,
+        'Away xPts': WIN_POINTS * (1 - p_home - p_draw) + DRAW_POINTS * p_draw
+    }
+
+
+def conference_fixtures(match_data, shot_store, data_processor, competition, division, conference, season):
+    """List a conference season's fixtures with each side's shot xG where the match is in the shot store."""
+    from shot_store import folder_priority
+
+    # Shots of every stored match, taking each side from the folder owning it when both teams stored it
+    owners = {}
+    stored = set()
+    for keys in shot_store.teams(competition, division, conference, season):
+        team_shots = data_processor.load_xg(shot_store, *keys, view=None)
+        stored.update((file['MatchId'], keys[4]) for file in shot_store.match_files(*keys, view=None))
+        for (match_id, team), side in team_shots.groupby(['MatchId', 'Team'], observed=True, sort=False):
+            previous = owners.get((match_id, team))
+            if previous is None or folder_priority(keys[4], team) < folder_priority(previous[0], team):
+                owners[(match_id, team)] = (keys[4], side['xG'].to_numpy(dtype=np.float64))
+    shots = {side: xg for side, (_, xg) in owners.items()}
+
+    fixtures = pd.DataFrame(match_data.get_fixtures(conference, season),
+                            columns=['MatchId', 'Home Team', 'Away Team', 'Home Score', 'Away Score'])
+    for column in ['Home Score', 'Away Score']:
+        fixtures[column] = pd.to_numeric(fixtures[column], errors='coerce')
+
+    is_stored = [(match_id, home) in stored or (match_id, away) in stored
+                 for match_id, home, away in fixtures[['MatchId', 'Home Team', 'Away Team']].itertuples(index=False)]
+    fixtures['Source'] = np.where(is_stored, 'xG', np.where(fixtures['Home Score'].notna() & fixtures['Away Score'].notna(), 'result', 'projected'))
+
+    # Stored sides without a shot get an empty array, so they are simulated as scoring none
+    fixtures['home_xG'] = [shots.get((match_id, home), np.zeros(0)) if source == 'xG' else None
+                           for match_id, home, source in fixtures[['MatchId', 'Home Team', 'Source']].itertuples(index=False)]
+    fixtures['away_xG'] = [shots.get((match_id, away), np.zeros(0)) if source == 'xG' else None
+                           for match_id, away, source in fixtures[['MatchId', 'Away Team', 'Source']].itertuples(index=False)]
+    return fixtures
+
+
+def main():
+    """Project a conference table by simulating its season from shot xG."""
+    import argparse
+    import time
+
+    from data_processing import DataProcessing
+    from match_data import MatchData
+    from shot_store import ShotStore
+    from xg_scorer import resolve_model
+
+    parser = argparse.ArgumentParser(description="Simulate a conference season from shot xG and print the projected table.")
+    parser.add_argument('--competition', default="UPSL")
+    parser.add_argument('--division', default="Premier")
+    parser.add_argument('--conference', default="Midwest Central")
+    parser.add_argument('--season', default="2024 Fall")
+    parser.add_argument('--sims', type=int, default=100000, help="Number of simulated seasons.")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible projections.")
+    parser.add_argument('--model', default=None, help="Exported xG model file (default: the current model version).")
+    args = parser.parse_args()
+
+    fixtures = conference_fixtures(MatchData(), ShotStore(), DataProcessing(args.model or resolve_model()),
+                                   args.competition, args.division, args.conference, args.season)
+    start = time.perf_counter()
+    projection = simulate_season(fixtures, n_sims=args.sims, seed=args.seed)
+    print(f"{len(fixtures)} fixtures ({fixtures['Source'].value_counts().to_dict()}), {args.sims} simulations in {time.perf_counter() - start:.2f}s\n")
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.float_format', '{:.2f}'.format):
+        print(projection['table'].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+###################################################################
+# Test configuration: the modules live at the repository root, so
+# it is put on the import path before the tests import them.
+###################################################################
+# System packages
+import sys
+from pathlib import Path
+
+# Test packages
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope='session')
+def shot_store(tmp_path_factory):
+    """Return a shot store of the Competitions tree, ingested once into a temporary directory."""
+    from shot_store import ShotStore
+
+    shot_store = ShotStore(store_dir=tmp_path_factory.mktemp('store') / 'Shot Store')
+    shot_store.ingest()
+    return shot_store
+
+
+@pytest.fixture(scope='session')
+def match_data():
+    """Return the league indexes of upsl_data.json."""
+    from match_data import MatchData
+
+    return MatchData()
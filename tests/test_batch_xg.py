@@ -0,0 +1,17 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+
+# External Packages
+from batch_xg import _tag_match
+
+###################################################################
+
+
+def test_tag_match_sets_each_side_its_own_opponent():
+    """The folder team's shots are against the folder's opponent, and the opponent's shots against the folder team."""
+    total_shots = pd.DataFrame({'Team': pd.Categorical(['United SC', 'Chicago Strikers', 'United SC']), 'xG': [0.1, 0.2, 0.3]})
+    tagged = _tag_match(total_shots, 'UPSL/Premier/Midwest Central/2024 Fall/United SC/08172024_Chicago Strikers')
+    assert tagged['Opponent'].astype(str).tolist() == ['Chicago Strikers', 'United SC', 'Chicago Strikers']
+    assert (tagged['Team'].astype(str) != tagged['Opponent'].astype(str)).all()
+    assert tagged['Folder'].eq('United SC').all()
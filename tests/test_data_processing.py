@@ -0,0 +1,37 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# External Packages
+from conftest import ROOT
+from data_processing import DataProcessing
+
+###################################################################
+
+SHOT_FILES = sorted((ROOT / 'Competitions').glob('**/Raw Data/* Shots.csv'))
+
+
+def test_calc_xg_scores_raw_csv_frames():
+    """calc_xg accepts a plain pd.read_csv frame, whose pass coordinates still hold the '-' placeholder."""
+    raw = pd.concat([pd.read_csv(path) for path in SHOT_FILES], ignore_index=True)
+    assert (raw['X2'].astype(str) == '-').any()
+
+    data_processor = DataProcessing()
+    total_shots = data_processor.calc_xg(raw)
+    assert total_shots['X2'].dtype == np.float32 and total_shots['Y2'].dtype == np.float32
+    assert total_shots['X2'].isna().to_numpy().tolist() == (raw['X2'].astype(str) == '-').tolist()
+    assert np.isfinite(total_shots['xG'].to_numpy()).all()
+
+    # The same shots read with the placeholder already parsed score identically
+    parsed = data_processor.calc_xg(pd.concat([pd.read_csv(path, na_values='-') for path in SHOT_FILES], ignore_index=True))
+    np.testing.assert_array_equal(total_shots['xG'].to_numpy(), parsed['xG'].to_numpy())
+    np.testing.assert_array_equal(total_shots['xA'].to_numpy(), parsed['xA'].to_numpy())
+
+
+def test_xa_stays_on_the_shot_rows():
+    """xA rates the pass before a shot, whose passer is not recorded, so it is never summed into a shooter's totals."""
+    data_processor = DataProcessing()
+    total_shots = data_processor.calc_xg(pd.read_csv(SHOT_FILES[0]))
+    assert 'xA' in total_shots.columns
+    assert 'xA' not in data_processor.shot_leaders(total_shots).columns
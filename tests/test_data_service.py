@@ -0,0 +1,41 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+
+# External Packages
+from data_processing import DataProcessing
+from data_service import CURRENT_FILE, DEFAULT_PUBLISH_DIR, DataService, publish
+from match_data import MatchData
+from shot_store import ShotStore
+
+###################################################################
+
+
+def test_default_publish_dir_is_outside_the_store():
+    """The default published versions do not live under the directory a store rebuild wipes."""
+    store_dir = ShotStore().store_dir.resolve()
+    assert store_dir not in DEFAULT_PUBLISH_DIR.resolve().parents
+
+
+def test_published_version_survives_store_rebuild(tmp_path):
+    """A full ingest after a publish leaves the current pointer and the mapped tables of attached readers in place."""
+    shot_store = ShotStore(store_dir=tmp_path / 'Shot Store')
+    shot_store.ingest()
+    data_processor = DataProcessing()
+    match_data = MatchData()
+    publish_dir = tmp_path / 'Published Data'
+    manifest = publish(shot_store, data_processor, match_data, publish_dir)
+
+    data_service = DataService(publish_dir)
+    published = data_service.current()
+    keys = shot_store.teams()[0]
+    before = published.scored_shots(*keys, view=None)
+    assert not before.empty
+
+    shot_store.ingest(full=True)
+    assert (publish_dir / CURRENT_FILE).read_text().strip() == manifest['version']
+    assert data_service.current() is published
+    pd.testing.assert_frame_equal(published.scored_shots(*keys, view=None), before)
+
+    # The rebuilt store holds the same files, so publishing again keeps the same version
+    assert publish(shot_store, data_processor, match_data, publish_dir)['version'] == manifest['version']
@@ -0,0 +1,35 @@
+###################################################################
+# Test packages
+from streamlit.testing.v1 import AppTest
+
+###################################################################
+
+
+def failing_page():
+    """Fail a profiled page rerun the way the pages do, with the developer panel switched on by the dev query parameter."""
+    import streamlit as st
+    from developer_panel import begin_page, end_page, show_error
+
+    st.session_state['dev_profile'] = True
+    trace = begin_page("Failing Page")
+    try:
+        raise RuntimeError("secret path /srv/upsl/Shot Store")
+    except Exception as e:
+        show_error(e)
+    finally:
+        end_page(trace)
+    st.session_state['profiler_stopped'] = trace._profiler is None
+
+
+def test_errors_show_details_only_in_developer_mode():
+    """Users get a generic message; the exception is only shown with the developer panel on, and the profiler is stopped."""
+    app = AppTest.from_function(failing_page).run()
+    assert len(app.error) == 1 and 'secret' not in app.error[0].value
+    assert len(app.exception) == 0
+
+    app = AppTest.from_function(failing_page)
+    app.query_params['dev'] = '1'
+    app.run()
+    assert 'secret' not in app.error[0].value
+    assert any('secret' in exception.message for exception in app.exception)
+    assert app.session_state['profiler_stopped']
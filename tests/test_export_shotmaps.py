@@ -0,0 +1,26 @@
+###################################################################
+# File handling packages
+from pathlib import Path
+
+# External Packages
+from data_processing import DataProcessing
+from export_shotmaps import _init_worker, _render, plan_exports
+from xg_scorer import DEFAULT_SCORER_PATH
+
+###################################################################
+
+
+def test_player_names_with_dots_keep_their_own_files(shot_store, match_data, tmp_path):
+    """A player name containing a dot is exported under its whole name, and no two maps share a file."""
+    jobs = plan_exports(shot_store, match_data, DataProcessing(), tmp_path, formats=('png', 'pdf'))
+    files = [path for job in jobs for path in job['files']]
+    assert len(files) == len(set(files))
+
+    job = next(job for job in jobs if '.' in job['player'])
+    assert [Path(path).name for path in job['files']] == [f"{job['player']}.png", f"{job['player']}.pdf"]
+
+    # Render the map in this process the way a pool worker does
+    _init_worker(str(shot_store.store_dir), str(DEFAULT_SCORER_PATH))
+    _render(job)
+    assert all(Path(path).stat().st_size > 0 for path in job['files'])
+    assert sorted(path.name for path in Path(job['files'][0]).parent.iterdir()) == sorted(Path(path).name for path in job['files'])
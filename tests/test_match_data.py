@@ -0,0 +1,35 @@
+###################################################################
+# File handling packages
+import json
+import os
+
+# External Packages
+from conftest import ROOT
+from match_data import MatchData
+
+###################################################################
+
+
+def test_reads_follow_a_snapshot_rebuilt_by_another_process(tmp_path):
+    """An instance whose snapshot is rebuilt underneath it reads the new snapshot rather than blobs at its stale offsets."""
+    with open(ROOT / 'upsl_data.json', 'r') as f:
+        upsl_data = json.load(f)
+    json_path = tmp_path / 'upsl_data.json'
+    json_path.write_text(json.dumps(upsl_data))
+
+    # The first instance writes the snapshot, so the reader only holds its header and reads blobs on demand
+    MatchData(json_path)
+    reader = MatchData(json_path)
+    conference_names = reader.get_conference_names()
+
+    # Renaming the first conference's teams shifts every later blob of the rebuilt snapshot
+    first = upsl_data['Division']['Premier']['Conference'][conference_names[0]]
+    first['Teams'] = {f'{team_name} Reserves': team for team_name, team in first['Teams'].items()}
+    json_path.write_text(json.dumps(upsl_data))
+    os.utime(json_path, ns=(0, 0))
+    writer = MatchData(json_path)
+
+    assert reader.get_team_names(conference_names[-1]) == writer.get_team_names(conference_names[-1])
+    assert reader.get_team_names(conference_names[0]) == writer.get_team_names(conference_names[0])
+    assert all(team_name.endswith(' Reserves') for team_name in reader.get_team_names(conference_names[0]))
+    assert reader.get_player_teams(writer.get_team_roster(conference_names[0], writer.get_team_names(conference_names[0])[0])[0])
@@ -0,0 +1,50 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# Test packages
+import pytest
+
+# External Packages
+from match_timeline import match_timeline, team_perspective
+
+###################################################################
+
+
+def match_shots():
+    """Return the shots of one match in which United SC's first goal is an own goal by a Chicago Strikers player."""
+    return pd.DataFrame({
+        'MatchId': '08172024',
+        'Mins': [50, 10, 30, 70],
+        'Secs': [0, 0, 0, 0],
+        'Team': pd.Categorical(['United SC', 'Chicago Strikers', 'United SC', 'Chicago Strikers']),
+        'Player': ['A. Forward', 'B. Defender', 'A. Forward', 'C. Striker'],
+        'xG': np.array([0.3, 0.05, 0.2, 0.4], dtype=np.float32),
+        'isGoal': np.array([1, 1, 0, 1], dtype=np.int8),
+        'isOwnGoal': np.array([0, 1, 0, 0], dtype=np.int8),
+    })
+
+
+def test_own_goal_counts_for_the_other_team():
+    """An own goal scores for the opponent of the shooting team in the running score and in each team's totals."""
+    timeline = match_timeline(match_shots(), teams=['United SC', 'Chicago Strikers'])
+    assert timeline['Minute'].tolist() == [10, 30, 50, 70]
+    assert timeline['Scoring Team'].astype(str).tolist() == ['United SC', 'United SC', 'United SC', 'Chicago Strikers']
+
+    # United SC lead from the own goal on, so the Strikers' last shot comes while losing 0-2
+    assert timeline['Goals For'].tolist() == [0, 1, 1, 0]
+    assert timeline['Goals Against'].tolist() == [0, 0, 0, 2]
+    assert timeline['Game State'].astype(str).tolist() == ['Drawing', 'Winning', 'Winning', 'Losing']
+
+    united = team_perspective(timeline, 'United SC')
+    strikers = team_perspective(timeline, 'Chicago Strikers')
+    assert (united['Goals For'].sum(), united['Goals Against'].sum()) == (2, 1)
+    assert (strikers['Goals For'].sum(), strikers['Goals Against'].sum()) == (1, 2)
+    assert united['Game State'].astype(str).tolist() == ['Drawing', 'Winning', 'Winning', 'Winning']
+
+
+def test_team_missing_from_teams_is_an_error():
+    """Shots by a team not listed in teams raise rather than being credited to the last listed team."""
+    with pytest.raises(ValueError, match='Chicago Strikers'):
+        match_timeline(match_shots(), teams=['United SC'])
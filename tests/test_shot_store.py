@@ -0,0 +1,142 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+
+# File handling packages
+import shutil
+from pathlib import Path
+
+# External Packages
+from conftest import ROOT
+from data_processing import DataProcessing, SHOT_TOTAL_COLUMNS
+from shot_store import TOTALS_KEYS, ShotStore, _temporary_path, folder_priority, owning_folder_mask
+
+###################################################################
+
+
+def test_owning_folder_prefers_the_shooting_teams_own_folder():
+    """A side stored by both teams is kept from its own folder even when the other folder sorts first, and from one folder only."""
+    keys = {'competition': 'UPSL', 'division': 'Premier', 'conference': 'Midwest Central', 'season': '2024 Fall', 'MatchId': '08172024'}
+    shots = pd.DataFrame({
+        'folder': ['Aurora FC', 'Aurora FC', 'Zeta FC', 'Zeta FC', 'Beta FC', 'Gamma FC'],
+        'Team': pd.Categorical(['Aurora FC', 'Zeta FC', 'Aurora FC', 'Zeta FC', 'Delta FC', 'Delta FC']),
+        **keys,
+    })
+    assert owning_folder_mask(shots).tolist() == [True, False, False, True, True, False]
+    assert folder_priority('Zeta FC', 'Zeta FC') < folder_priority('Aurora FC', 'Zeta FC')
+
+
+def test_temporary_paths_are_unique_per_write():
+    """Writers of the same file get their own hidden temporary file beside it, so concurrent writes never share one."""
+    path = Path('Shot Store') / 'UPSL' / 'scored.parquet'
+    first, second = _temporary_path(path), _temporary_path(path)
+    assert first != second
+    assert first.parent == path.parent and first.name.startswith('.scored.parquet.')
+
+
+def sorted_totals(totals):
+    """Order season totals by their keys, with plain string keys, to compare them across stores."""
+    totals = totals.astype({column: str for column in TOTALS_KEYS})
+    return totals.sort_values(TOTALS_KEYS).reset_index(drop=True)[TOTALS_KEYS + SHOT_TOTAL_COLUMNS]
+
+
+def test_player_totals_change_by_exactly_one_matchs_contribution(tmp_path):
+    """Folding a match into the season totals adds its own shot totals, and removing it again restores the earlier totals."""
+    shot_store = ShotStore(store_dir=tmp_path / 'Shot Store')
+    data_processor = DataProcessing()
+    model_version = data_processor.scorer.model_version
+    scored = {rel_path: shot_store.score_match(rel_path, data_processor, update_totals=False) for rel_path in shot_store.matches()}
+    rel_path = sorted(scored)[-1]
+    keys = rel_path.split('/')
+
+    shot_store.update_player_totals(scored={path: shots for path, shots in scored.items() if path != rel_path}, model_version=model_version)
+    before = sorted_totals(shot_store.player_totals(*keys[:2]))
+    shot_store.update_player_totals(scored={rel_path: scored[rel_path]}, model_version=model_version)
+    after = sorted_totals(shot_store.player_totals(*keys[:2]))
+
+    contribution = DataProcessing.shot_totals(scored[rel_path], group_by=('Team', 'Player'))
+    contribution = contribution.assign(competition=keys[0], division=keys[1], conference=keys[2], season=keys[3])
+    expected = pd.concat([before, sorted_totals(contribution)]).groupby(TOTALS_KEYS, sort=False)[SHOT_TOTAL_COLUMNS].sum().reset_index()
+    pd.testing.assert_frame_equal(after, sorted_totals(expected), check_dtype=False)
+
+    shot_store.update_player_totals(removed=[rel_path])
+    pd.testing.assert_frame_equal(sorted_totals(shot_store.player_totals(*keys[:2])), before, check_dtype=False)
+
+
+def test_match_stored_by_both_teams_is_counted_once(tmp_path):
+    """Storing a match again in the opponent's folder leaves the season totals unchanged."""
+    data_processor = DataProcessing()
+    source_dir = tmp_path / 'Competitions'
+    shutil.copytree(ROOT / 'Competitions', source_dir)
+    single = ShotStore(source_dir=source_dir, store_dir=tmp_path / 'Single Store')
+    single.refresh_player_totals(data_processor, 'UPSL', 'Premier')
+
+    # The opponent's folder names the match after the team whose folder stored it first
+    rel_path = single.matches()[0]
+    keys = rel_path.split('/')
+    match_id, _, opponent = keys[-1].partition('_')
+    shutil.copytree(source_dir.joinpath(*keys), source_dir.joinpath(*keys[:4], opponent, f'{match_id}_{keys[4]}'))
+    both = ShotStore(source_dir=source_dir, store_dir=tmp_path / 'Both Store')
+    both.refresh_player_totals(data_processor, 'UPSL', 'Premier')
+
+    assert len(both.matches()) == len(single.matches()) + 1
+    pd.testing.assert_frame_equal(sorted_totals(both.player_totals('UPSL', 'Premier')), sorted_totals(single.player_totals('UPSL', 'Premier')))
+
+
+def test_team_index_matches_manifest_prefix_scan(shot_store):
+    """The per-team match index finds the same folders as scanning every manifest path for the team's prefix."""
+    manifest = shot_store._cached_manifest()
+    assert shot_store.teams()
+    for keys in shot_store.teams():
+        prefix = '/'.join(keys) + '/'
+        scanned = {}
+        for rel_path, files in manifest.items():
+            if rel_path.startswith(prefix):
+                match_id, _, opponent = rel_path[len(prefix):].partition('_')
+                scanned[match_id] = (rel_path, opponent, files)
+        assert shot_store._team_matches(*keys) == scanned
+
+        match_id = sorted(scanned)[0]
+        assert shot_store._team_matches(*keys, match_ids=[match_id]) == {match_id: scanned[match_id]}
+
+
+def probe_shot_files(source_dir, fixture):
+    """Find a fixture's home and away shot files by probing both teams' match folder paths, as the pages once did."""
+    found = []
+    for shooter in [fixture['Home Team'], fixture['Away Team']]:
+        found.append(any(
+            (source_dir / 'UPSL' / 'Premier' / fixture['conference'] / fixture['season'] / team / f"{fixture['MatchId']}_{opponent}"
+             / 'Raw Data' / f'{shooter} Shots.csv').is_file()
+            for team, opponent in [(fixture['Home Team'], fixture['Away Team']), (fixture['Away Team'], fixture['Home Team'])]
+        ))
+    return found
+
+
+def test_fixture_coverage_matches_path_probing(shot_store, match_data):
+    """Every listed fixture's shot files are found exactly where probing the match folder paths finds them."""
+    fixtures, unmatched = shot_store.fixture_coverage(match_data, 'UPSL', 'Premier')
+    assert unmatched.empty
+    for fixture in fixtures.to_dict('records'):
+        assert [fixture['Home Shots'], fixture['Away Shots']] == probe_shot_files(shot_store.source_dir, fixture)
+
+    # Every stored match is a listed fixture, and the rest of the league's fixtures are reported without shot data
+    assert (fixtures['Status'] == 'complete').sum() == len(shot_store.matches())
+    missing = fixtures[fixtures['Status'] == 'missing']
+    assert len(missing) and not (missing['Home Shots'] | missing['Away Shots']).any()
+    assert (missing['Folders'].map(len) == 0).all()
+
+
+def test_fixture_coverage_reports_misnamed_folders(tmp_path, match_data):
+    """A match folder whose date matches no fixture is listed as unmatched and leaves its fixture without shot data."""
+    source_dir = tmp_path / 'Competitions'
+    shutil.copytree(ROOT / 'Competitions', source_dir)
+    team_dir = next(source_dir.glob('*/*/*/*/*'))
+    match_dir = sorted(team_dir.iterdir())[0]
+    match_id, _, opponent = match_dir.name.partition('_')
+    match_dir.rename(team_dir / f'01012000_{opponent}')
+
+    shot_store = ShotStore(source_dir=source_dir, store_dir=tmp_path / 'Shot Store')
+    fixtures, unmatched = shot_store.fixture_coverage(match_data, 'UPSL', 'Premier')
+    assert unmatched[['MatchId', 'Opponent']].values.tolist() == [['01012000', opponent]]
+    is_fixture = (fixtures['MatchId'] == match_id) & ((fixtures['Home Team'] == team_dir.name) | (fixtures['Away Team'] == team_dir.name))
+    assert fixtures.loc[is_fixture, 'Status'].tolist() == ['missing']
@@ -0,0 +1,71 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# System packages
+import itertools
+
+# External Packages
+from simulation import poisson_goal_distributions, sample_goals, shot_goal_distributions, simulate_season
+
+###################################################################
+
+
+def brute_force_pmf(xg):
+    """Return the goal count distribution of a list of shots by enumerating every combination of goals and misses."""
+    pmf = np.zeros(len(xg) + 1)
+    for outcome in itertools.product([0, 1], repeat=len(xg)):
+        pmf[sum(outcome)] += np.prod([p if goal else 1 - p for p, goal in zip(xg, outcome)])
+    return pmf
+
+
+def test_shot_goal_distributions_match_enumeration():
+    """Each row is the Poisson-binomial of its side's shots, padded with zeros to the longest side."""
+    sides = [[0.1, 0.5], [0.2, 0.35, 0.7], [0.9], []]
+    pmf = shot_goal_distributions(sides)
+    assert pmf.shape == (len(sides), 4)
+    for row, xg in zip(pmf, sides):
+        np.testing.assert_allclose(row[:len(xg) + 1], brute_force_pmf(xg), rtol=0, atol=1e-12)
+        assert (row[len(xg) + 1:] == 0).all()
+
+
+def test_goal_distributions_sum_to_one():
+    """Shot and Poisson goal distributions are proper distributions, whatever the number of shots or the rate."""
+    rng = np.random.default_rng(7)
+    sides = [rng.random(n) * 0.6 for n in [0, 1, 5, 30]]
+    np.testing.assert_allclose(shot_goal_distributions(sides).sum(axis=1), 1, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(poisson_goal_distributions([0.0, 0.4, 1.7, 12.0]).sum(axis=1), 1, rtol=0, atol=1e-12)
+
+
+def test_sample_goals_follows_each_sides_distribution():
+    """Draws stay within each side's support and their frequencies approach its distribution."""
+    pmf = shot_goal_distributions([[0.1, 0.5], [0.2, 0.35, 0.7], [0.9], []])
+    goals = sample_goals(pmf, 200000, np.random.default_rng(0))
+    assert goals.min() >= 0 and (goals <= np.array([2, 3, 1, 0])).all()
+    for side in range(len(pmf)):
+        frequencies = np.bincount(goals[:, side], minlength=pmf.shape[1]) / len(goals)
+        np.testing.assert_allclose(frequencies, pmf[side], rtol=0, atol=0.005)
+
+
+def test_result_fixtures_always_give_their_recorded_score():
+    """Fixtures without shot data are played out at their final score in every simulation, next to simulated ones."""
+    fixtures = pd.DataFrame({
+        'MatchId': ['08172024', '08242024', '08312024'],
+        'Home Team': ['United SC', 'Chicago Strikers', 'Black Cat FC'],
+        'Away Team': ['Chicago Strikers', 'Black Cat FC', 'United SC'],
+        'Home Score': [3, 1, np.nan],
+        'Away Score': [1, 1, np.nan],
+        'Source': ['result', 'result', 'xG'],
+        'home_xG': [None, None, np.array([0.2, 0.4])],
+        'away_xG': [None, None, np.array([0.1, 0.3, 0.05])],
+    })
+    projection = simulate_season(fixtures, n_sims=5000, seed=1, batch_size=1500)
+    matches = projection['matches'].set_index('MatchId')
+    assert matches.loc['08172024', ['P(Home Win)', 'P(Draw)', 'P(Away Win)']].tolist() == [1, 0, 0]
+    assert matches.loc['08242024', ['P(Home Win)', 'P(Draw)', 'P(Away Win)']].tolist() == [0, 1, 0]
+    assert 0 < matches.loc['08312024', 'P(Home Win)'] < 1
+
+    # Chicago Strikers only played recorded fixtures, so their projection is their actual record
+    table = projection['table'].set_index('Team')
+    assert table.loc['Chicago Strikers', ['xPts', 'xGF', 'xGA']].tolist() == [1, 2, 4]
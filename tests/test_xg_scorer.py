@@ -0,0 +1,87 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# File handling packages
+import pickle
+import warnings
+
+# External Packages
+from conftest import ROOT
+from data_processing import DataProcessing
+from xg_scorer import DEFAULT_MODEL_PATHS, DEFAULT_SCORER_PATH, FEATURES, XGScorer, model_fingerprint
+
+###################################################################
+
+SHOT_FILES = sorted((ROOT / 'Competitions').glob('**/Raw Data/* Shots.csv'))
+
+# The scorer evaluates the same logistic regressions, so only floating point rounding separates them
+TOLERANCE = 1e-9
+
+
+def load_sklearn_models():
+    """Load the shipped pickled scikit-learn models."""
+    with warnings.catch_warnings():
+        # The models were pickled with an older scikit-learn
+        warnings.simplefilter('ignore')
+        return {key: pickle.load(open(path, 'rb')) for key, path in DEFAULT_MODEL_PATHS.items()}
+
+
+def shot_rows():
+    """Build the shot features of every real shot in the Competitions tree with the calc_xg feature builder."""
+    data_processor = DataProcessing()
+    raw = pd.concat([pd.read_csv(path) for path in SHOT_FILES], ignore_index=True)
+    total_shots, decoded, features = data_processor.shot_features(raw)
+
+    # The assisting pass runs from (X2, Y2) to the shot, as in calc_xg
+    x2 = data_processor.decode_coordinates(total_shots['X2'])
+    y2 = data_processor.decode_coordinates(total_shots['Y2'])
+    x = total_shots['x'].to_numpy(dtype=np.float64)
+    y = total_shots['y'].to_numpy(dtype=np.float64)
+    features['distance_of_pass'] = np.sqrt((x - x2)**2 + (y - y2)**2)
+    features['isOpenPlay'] = features['isRegularPlay']
+    features['isFreeKick'] = np.asarray(decoded['situation'].isin(['Freekick', 'DirectFreekick'])).astype(np.int8)
+    features['isCorner'] = np.asarray(decoded['situation'].isin(['Corner', 'FromCorner'])).astype(np.int8)
+    features['isThroughBall'] = np.zeros(len(x), dtype=np.int8)
+    return features, np.isfinite(x2) & np.isfinite(y2), x, y
+
+
+def test_exported_scorer_comes_from_the_shipped_models():
+    """The exported JSON is versioned by the pickled models it was exported from."""
+    assert XGScorer(DEFAULT_SCORER_PATH).model_version == model_fingerprint(DEFAULT_MODEL_PATHS)
+
+
+def test_score_matches_sklearn_on_real_shots():
+    """XGScorer.score matches predict_proba of the op and non-op models on every real open play and set-piece shot."""
+    models = load_sklearn_models()
+    features, _, _, _ = shot_rows()
+    is_open_play = np.asarray(features['isRegularPlay']) == 1
+    is_penalty = np.asarray(features['isPenalty']) == 1
+    finite = np.isfinite(np.asarray(features['angle'], dtype=np.float64))
+
+    scored = XGScorer(DEFAULT_SCORER_PATH).score(features, is_open_play, is_penalty)
+    for branch, mask in [('op', is_open_play & finite), ('non_op', ~is_open_play & ~is_penalty & finite)]:
+        assert mask.any()
+        X = np.column_stack([np.asarray(features[name], dtype=np.float64)[mask] for name in FEATURES[branch]])
+        np.testing.assert_allclose(scored[mask], models[branch].predict_proba(X)[:, 1], rtol=0, atol=TOLERANCE)
+
+
+def test_score_xa_matches_sklearn_on_real_passes():
+    """XGScorer.score_xa matches predict_proba of the xA model on real shots, and scores shots without a recorded pass 0."""
+    models = load_sklearn_models()
+    features, has_pass, x, y = shot_rows()
+    features['isFoot'] = np.ones(len(has_pass), dtype=np.int8)
+    features['isHead'] = np.zeros(len(has_pass), dtype=np.int8)
+    scorer = XGScorer(DEFAULT_SCORER_PATH)
+    assert (scorer.score_xa(features, has_pass)[~has_pass] == 0).all()
+
+    # The shot files log no pass origins or through balls, so every shot is also scored as if set up from the previous shot's location,
+    # every other one by a through ball
+    features['distance_of_pass'] = np.sqrt((x - np.roll(x, 1))**2 + (y - np.roll(y, 1))**2)
+    features['isThroughBall'] = (np.arange(len(x)) % 2).astype(np.int8)
+    has_pass = np.ones(len(x), dtype=bool)
+
+    scored = scorer.score_xa(features, has_pass)
+    X = np.column_stack([np.asarray(features[name], dtype=np.float64)[has_pass] for name in FEATURES['xa']])
+    np.testing.assert_allclose(scored[has_pass], models['xa'].predict_proba(X)[:, 1], rtol=0, atol=TOLERANCE)
@@ -0,0 +1,223 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# File handling packages
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# External Packages
+from data_processing import DataProcessing, concat_shots
+from instrumentation import count, stage, timed
+from xg_scorer import FEATURES, FORMAT_VERSION, MODEL_DIR, PENALTY_XG, register_model, resolve_model
+
+###################################################################
+
+# Inverse regularization strengths searched for each logistic regression
+PARAM_GRID = {'C': [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 100.0]}
+
+# Stratified folds of the search and of the out-of-fold calibration report
+CV_FOLDS = 5
+DEFAULT_SEED = 42
+
+# Equal-width probability bins of the calibration table
+CALIBRATION_BINS = 10
+
+
+def training_shots(shot_store, competition=None, division=None):
+    """Read the raw shot events of every stored match in scope, counting a match stored by both teams once."""
+    from shot_store import owning_folder_mask
+    teams = {}
+    for rel_path in shot_store.matches():
+        keys = rel_path.split('/')
+        if competition is not None and keys[0] != competition or division is not None and keys[1] != division:
+            continue
+        teams.setdefault(tuple(keys[:-1]), []).append(keys[-1].partition('_')[0])
+
+    frames = []
+    for keys, match_ids in sorted(teams.items()):
+        shot_events = shot_store.read(*keys, match_ids=match_ids, view=None)
+        frames.append(shot_events.assign(**dict(zip(['competition', 'division', 'conference', 'season', 'folder'], keys))))
+    if not frames:
+        return pd.DataFrame()
+    shot_events = concat_shots(frames)
+
+    # Keep each side's shots from the folder owning them
+    return shot_events[owning_folder_mask(shot_events)].reset_index(drop=True)
+
+
+def data_fingerprint(shot_store, competition=None, division=None):
+    """Return the number of match folders in scope and a short hash of their shot file checksums."""
+    files = sorted((file['rel_path'], file['Team'], file['sha256'] or '') for keys in shot_store.teams(competition, division)
+                   for file in shot_store.match_files(*keys, view=None))
+    digest = hashlib.sha256(json.dumps(files).encode())
+    return len({rel_path for rel_path, _, _ in files}), digest.hexdigest()[:12]
+
+
+def training_sets(data_processor, shot_events):
+    """Build the op and non-op feature matrices and goal labels with the same feature builder as calc_xg."""
+    _, _, features = data_processor.shot_features(shot_events)
+
+    # Own goals are not shots by the scoring side and penalties keep their fixed xG, so neither is trained on
+    is_open_play = features['isRegularPlay'] == 1
+    keep = (features['isOwnGoal'] == 0) & (features['isPenalty'] == 0) & np.isfinite(features['angle'])
+    y = features['isGoal'].astype(np.int64)
+
+    sets = {}
+    for branch, mask in [('op', keep & is_open_play), ('non_op', keep & ~is_open_play)]:
+        X = np.column_stack([np.asarray(features[name], dtype=np.float64)[mask] for name in FEATURES[branch]])
+        sets[branch] = (X, y[mask])
+    return sets
+
+
+def calibration_table(y, probabilities, bins=CALIBRATION_BINS):
+    """Compare the mean predicted xG with the observed goal rate in equal-width probability bins."""
+    edges = np.linspace(0, 1, bins + 1)
+    bin_index = np.clip(np.digitize(probabilities, edges[1:-1]), 0, bins - 1)
+    shots = np.bincount(bin_index, minlength=bins)
+    predicted = np.bincount(bin_index, weights=probabilities, minlength=bins)
+    goals = np.bincount(bin_index, weights=y, minlength=bins)
+    table = pd.DataFrame({
+        'bin': [f'{low:.1f}-{high:.1f}' for low, high in zip(edges[:-1], edges[1:])],
+        'shots': shots,
+        'mean_xG': np.divide(predicted, shots, out=np.zeros(bins), where=shots > 0),
+        'goal_rate': np.divide(goals, shots, out=np.zeros(bins), where=shots > 0),
+    })
+    return table[table['shots'] > 0].reset_index(drop=True)
+
+
+def scoring_report(y, probabilities):
+    """Return the log-loss, Brier score and ROC AUC of predicted probabilities."""
+    from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+
+    return {
+        'log_loss': float(log_loss(y, probabilities, labels=[0, 1])),
+        'brier': float(brier_score_loss(y, probabilities)),
+        'roc_auc': float(roc_auc_score(y, probabilities)) if 0 < y.sum() < len(y) else None,
+    }
+
+
+@timed('train_xg.fit_branch')
+def fit_branch(X, y, folds=CV_FOLDS, seed=DEFAULT_SEED, n_jobs=-1):
+    """Search the regularization of one logistic regression with parallel stratified cross-validation and refit the best."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold, cross_val_predict
+
+    cv = StratifiedKFold(n_splits=min(folds, int(y.sum()), int(len(y) - y.sum())), shuffle=True, random_state=seed)
+    search = GridSearchCV(LogisticRegression(max_iter=1000), PARAM_GRID, scoring='neg_log_loss', cv=cv, n_jobs=n_jobs, refit=True)
+    with stage('train_xg.search'):
+        search.fit(X, y)
+
+    # Out-of-fold probabilities of the chosen settings, so the report is not scored on the training shots
+    with stage('train_xg.out_of_fold'):
+        out_of_fold = cross_val_predict(search.best_estimator_, X, y, cv=cv, method='predict_proba', n_jobs=n_jobs)[:, 1]
+    report = {
+        'shots': int(len(y)),
+        'goals': int(y.sum()),
+        'C': float(search.best_params_['C']),
+        **scoring_report(y, out_of_fold),
+        'calibration': calibration_table(y, out_of_fold).to_dict('records'),
+    }
+    count('train_xg.shots', len(y))
+    return search.best_estimator_, report
+
+
+def build_spec(models, xa_model):
+    """Build the scorer spec of fitted op and non-op models, versioned by a hash of their coefficients."""
+    spec_models = {
+        branch: {
+            'source': 'train_xg',
+            'features': FEATURES[branch],
+            'coef': [float(c) for c in model.coef_.ravel()],
+            'intercept': float(model.intercept_[0])
+        }
+        for branch, model in models.items()
+    }
+
+    # Identical data and settings fit identical coefficients, so a retrain reproduces the version
+    digest = hashlib.sha256(json.dumps([spec_models, PENALTY_XG, xa_model], sort_keys=True).encode())
+    return {
+        'format_version': FORMAT_VERSION,
+        'model_version': digest.hexdigest()[:12],
+        'features': FEATURES['non_op'],
+        'penalty_xg': PENALTY_XG,
+        'models': spec_models,
+        'xa_model': xa_model
+    }
+
+
+@timed('train_xg')
+def train_models(shot_events, base_model_path=None, folds=CV_FOLDS, seed=DEFAULT_SEED, n_jobs=-1):
+    """Fit the op and non-op xG models on raw shot events and return the scorer spec with per-model reports against the base model, by default the current version."""
+    base_model_path = base_model_path or resolve_model()
+    data_processor = DataProcessing(base_model_path)
+    with open(base_model_path, 'r') as f:
+        base_spec = json.load(f)
+
+    models = {}
+    reports = {}
+    for branch, (X, y) in training_sets(data_processor, shot_events).items():
+        models[branch], reports[branch] = fit_branch(X, y, folds=folds, seed=seed, n_jobs=n_jobs)
+
+        # The model being replaced, scored on the same shots for comparison
+        base = data_processor.scorer
+        features = dict(zip(FEATURES[branch], X.T))
+        features.update({name: np.zeros(len(y)) for name in base.features if name not in features})
+        base_xg = base.score(features, np.full(len(y), branch == 'op'), np.zeros(len(y), dtype=bool))
+        reports[branch]['base_log_loss'] = scoring_report(y, base_xg)['log_loss']
+
+    # Shot files carry no pass outcomes to train xA on, so the base model's xA is kept
+    return build_spec(models, base_spec['xa_model']), reports
+
+
+def main():
+    """Retrain the xG models on the stored shot corpus and register the result as a new model version."""
+    import argparse
+    from shot_store import ShotStore
+
+    parser = argparse.ArgumentParser(description="Train the op and non-op xG models on the shot store and write a versioned model.")
+    parser.add_argument('--competition', default=None, help="Train on one competition only.")
+    parser.add_argument('--division', default=None, help="Train on one division only.")
+    parser.add_argument('--folds', type=int, default=CV_FOLDS, help="Cross-validation folds.")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Fold shuffling seed.")
+    parser.add_argument('--jobs', type=int, default=-1, help="Parallel search jobs (default: every core).")
+    parser.add_argument('--base', default=None, help="Model to compare against and take the xA model from (default: the current model version).")
+    parser.add_argument('--output-dir', default=str(MODEL_DIR), help="Directory of the versioned models and their manifest.")
+    parser.add_argument('--promote', action='store_true', help="Make the new version the default loaded by the dashboard.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    base_model_path = args.base or resolve_model(model_dir=args.output_dir)
+    shot_store = ShotStore()
+    shot_store.ingest()
+    shot_events = training_shots(shot_store, args.competition, args.division)
+    if shot_events.empty:
+        print("No stored shots to train on")
+        return
+    spec, reports = train_models(shot_events, base_model_path=base_model_path, folds=args.folds, seed=args.seed, n_jobs=args.jobs)
+
+    import sklearn
+    matches, fingerprint = data_fingerprint(shot_store, args.competition, args.division)
+    metadata = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data': {'competition': args.competition, 'division': args.division, 'matches': matches, 'fingerprint': fingerprint},
+        'settings': {'folds': args.folds, 'seed': args.seed, 'param_grid': PARAM_GRID, 'base_model': Path(base_model_path).name},
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__, 'scikit-learn': sklearn.__version__},
+        'features': {branch: FEATURES[branch] for branch in spec['models']},
+        'reports': reports,
+    }
+    path = register_model(spec, metadata, model_dir=args.output_dir, promote=args.promote)
+
+    for branch, report in reports.items():
+        print(f"{branch}: {report['shots']} shots, {report['goals']} goals | C={report['C']:g} | log-loss {report['log_loss']:.4f} "
+              f"(base {report['base_log_loss']:.4f}) | Brier {report['brier']:.4f} | AUC {report['roc_auc'] or float('nan'):.3f}")
+        print(pd.DataFrame(report['calibration']).to_string(index=False, float_format='{:.3f}'.format))
+    print(f"Wrote model {spec['model_version']} to {path}{' (current)' if args.promote else ''} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
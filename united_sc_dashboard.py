@@ -3,39 +3,78 @@
 import pandas as pd
 import numpy as np
 
-# File path
-import os
-
 # Data visualization packages
 import streamlit as st
-from mplsoccer import VerticalPitch  # Ensure this import is included
 
 # External Packages
-from data_processing import DataProcessing
-from visuals import FootballVisuals
-from match_data import MatchData
+# visuals is imported when a shot map is drawn, so matplotlib and mplsoccer stay out of cold start
+from caching import get_match_data, get_scored_shots, get_shot_grid, get_league_grid, get_shot_store, get_match_timelines, get_data_processor, get_team_matches, get_team_roster
+from match_timeline import timeline_totals
+from vector_shotmap import shotmap_payload, shotmap_spec
+from xg_scorer import model_versions, resolve_model
 
-# Error Handling
-import traceback
+# Instrumentation and error handling
+from developer_panel import begin_page, end_page, show_error
+from instrumentation import stage
 
 ####################################################################
 
-def plot_shot_maps(total_shots, team, view, competition, season, player):
+def plot_shot_maps(total_shots, team, view, competition, season, player, model_path, match_ids=None):
     """Function to plot shot maps."""
-    # Setup the pitch
-    pitch = VerticalPitch(pitch_type='statsbomb', pitch_color='#1d2849', line_color='w', half=True, pad_top=20, pad_right=20)
-    fig, ax = pitch.draw(figsize=(8, 10))
-
-    # Shot map method
-    visuals = FootballVisuals(model_paths={  # Assuming you have model paths defined
-        'op': 'Models/expected_goals_model_lr.sav',
-        'non_op': 'Models/expected_goals_model_lr_v2.sav'
-    })
-    visuals.createShotmap(total_shots, pitch=pitch, fig=fig, ax=ax, team=team, view=view, competition=competition, season_year=season, players=player,
-                          pitchcolor='#1d2849', shot_color='gray', titlecolor='w', team_color='w', fontfamily='Segoe UI')
+    from visuals import FootballVisuals
+
+    # Shot map method, rendered once per selection and reused from the render cache
+    visuals = FootballVisuals(model_path=model_path)
+    png = visuals.renderShotmap(total_shots, team=team, players=player, view=view, competition=competition, season_year=season,
+                                match_ids=match_ids, pitchcolor='#1d2849', shot_color='gray', fontfamily='Segoe UI')
 
     st.write("Viewing shots from matches vs selected opponent(s):")
-    st.pyplot(fig)
+    st.image(png)
+
+def plot_interactive_shot_map(total_shots, team, view, competition, season, model_path):
+    """Function to draw the shot map in the browser from its compact JSON payload."""
+    # Only the shot points and stats are sent; the player filter, tooltips and stats updates run client-side
+    payload = shotmap_payload(total_shots, team, "All Players", view, competition, season, get_data_processor(model_path).scorer.model_version)
+    st.write("Viewing shots from matches vs selected opponent(s):")
+    st.vega_lite_chart(shotmap_spec(payload), use_container_width=False)
+
+def plot_heatmap(grid, team, view, competition, season, player, statistic, model_path):
+    """Function to plot a zone heatmap of shots, goals or xG."""
+    from visuals import FootballVisuals
+
+    # Heatmaps are drawn from summed per-match grids, so their cost does not grow with the shot count
+    visuals = FootballVisuals(model_path=model_path)
+    png = visuals.renderHeatmap(grid, team=team, players=player, view=view, competition=competition, season_year=season,
+                                statistic=statistic, pitchcolor='#1d2849', fontfamily='Segoe UI')
+    st.image(png)
+
+def plot_xg_race(timelines, team, competition, season, matches, model_path):
+    """Function to plot the cumulative xG race of one selected match and the xG tables of every selected match."""
+    from visuals import FootballVisuals
+
+    # Matches with shot data, labelled by opponent and date
+    labels = {
+        match["MatchId"]: f'{match["Opponent"]} ({match["MatchId"][0:2]}/{match["MatchId"][2:4]}/{match["MatchId"][4:]})'
+        for match in matches.to_dict('records') if match["MatchId"] in set(timelines["MatchId"])
+    }
+    if not labels:
+        st.write("No Data Available")
+        return
+    match_id = st.selectbox("Select Match:", options=list(labels), format_func=labels.get)
+    match = matches[matches["MatchId"] == match_id].iloc[0]
+
+    # Timelines are built once per match from its scored shots and reused from the timeline cache
+    visuals = FootballVisuals(model_path=model_path)
+    png = visuals.renderXGRace(timelines[timelines["MatchId"] == match_id], team=team, opponent=match["Opponent"], competition=competition,
+                               season_year=season, match_label=f'{match_id[0:2]}/{match_id[2:4]}/{match_id[4:]}', fontfamily='Segoe UI')
+    st.image(png)
+
+    # The selected matches stacked by minute bucket and by the score when each shot was taken
+    table_format = {"xG For": "{:.2f}", "xG Against": "{:.2f}"}
+    st.subheader("xG by Minute")
+    st.dataframe(timeline_totals(timelines, team, by=("Minutes",)).style.format(table_format), hide_index=True, use_container_width=True)
+    st.subheader("xG by Game State")
+    st.dataframe(timeline_totals(timelines, team, by=("Game State",)).style.format(table_format), hide_index=True, use_container_width=True)
 
 def display_filtered_shots(total_shots, view, player):
     """Function to display the filtered shots table."""
@@ -44,39 +83,38 @@ def display_filtered_shots(total_shots, view, player):
             filtered_shots = total_shots.copy()  # No filtering, show all players
         else:
             filtered_shots = total_shots[total_shots['Player'] == player]
-        filtered_shots = filtered_shots[['Player', 'Team', 'xG', 'outcome', 'shotType', 'situation']]
+        filtered_shots = filtered_shots[['Player', 'Team', 'xG', 'xA', 'outcome', 'shotType', 'situation']]
         filtered_shots.reset_index(drop=True, inplace=True)
     else:
         filtered_shots = total_shots.copy()
-        filtered_shots = filtered_shots[['Team', 'xG', 'outcome', 'shotType', 'situation']]
+        filtered_shots = filtered_shots[['Team', 'xG', 'xA', 'outcome', 'shotType', 'situation']]
         filtered_shots.reset_index(drop=True, inplace=True)
 
+    # xA rates the pass before the shot, whose passer is not recorded, so it is labelled per shot rather than as the shooter's
+    filtered_shots = filtered_shots.rename(columns={"xA": "xA of Assisting Pass"})
+
     # Apply formatting to ensure two decimal places are shown, even for zero
     filtered_shots = filtered_shots.style.format({
-        "xG": "{:.2f}"
+        "xG": "{:.2f}",
+        "xA of Assisting Pass": "{:.2f}"
     })
 
     st.write(filtered_shots)
 
 def run_dashboard():
-    # Define instances
-    match_data = MatchData()  # Create instance once at the start
-
-    # Define model paths for DataProcessing
-    model_paths = {
-        'op': 'Models/expected_goals_model_lr.sav',
-        'non_op': 'Models/expected_goals_model_lr_v2.sav'
-    }
-
-    # Define instances for processing and visuals
-    data_processor = DataProcessing(model_paths)
-
     # Create Title
     st.title("UPSL Stats Dashboard")
 
     ####################################################################
 
+    # Time every stage of this rerun for the logs and the developer panel
+    trace = begin_page("Shot Maps")
+
     try:
+        # Shared league metadata instance, loaded once per process
+        with stage('get_match_data'):
+            match_data = get_match_data()
+
         # Tab Header
         st.header("Shot Maps")
 
@@ -129,8 +167,31 @@ def run_dashboard():
             ("Shots For", "Shots Against")  # Options
         )
 
+        # Selector for the xG model version, defaulting to the current one
+        versions = {entry['version']: entry for entry in model_versions()}
+        current = resolve_model()
+        version = st.sidebar.selectbox(
+            "xG Model:",
+            options=list(versions),
+            index=[entry['path'] for entry in versions.values()].index(current),
+            format_func=lambda version: f"{version} ({versions[version]['source']}{', ' + versions[version]['created'][:10] if 'created' in versions[version] else ''})"
+        )
+        model_path = versions[version]['path']
+
+        # Selector for the scatter shot map or the binned zone heatmap
+        map_type = st.sidebar.selectbox(
+            "Map Type:", ("Shot Map", "Interactive Shot Map", "Heatmap", "xG Race")
+        )
+        if map_type == "Heatmap":
+            statistic = st.sidebar.selectbox(
+                "Heatmap Statistic:", ("xG", "shots", "goals"), format_func=lambda name: {"shots": "Shots", "goals": "Goals"}.get(name, name)
+            )
+            scope = st.sidebar.radio(
+                "Heatmap Scope:", ("Team", "League")
+            )
+
         # Create a DataFrame of the match
-        match_df = match_data.get_match_data(conference_name=conference, team_name=team, season=season)
+        match_df = get_team_matches(conference, team, season)
 
         # Extract opponent names into a list
         opponents = [match["Opponent"] for match in match_df]
@@ -142,10 +203,10 @@ def run_dashboard():
             default=opponents  # Default to nothing selected
         )
 
-        team_roster = match_data.get_team_roster(team_name=team, conference_name=conference)
+        team_roster = get_team_roster(conference, team)
 
-        # Create a selector to choose player to analyze
-        if view == "Shots For":
+        # Create a selector to choose player to analyze; the interactive shot map filters players in the browser
+        if view == "Shots For" and map_type != "Interactive Shot Map":
             player = st.selectbox(
                 "Select Player:",
                 (["All Players"] + team_roster)
@@ -159,57 +220,63 @@ def run_dashboard():
             match_df = pd.DataFrame(match_df)
             filtered_matches = match_df[match_df["Opponent"].isin(selected_matches)]
 
-            try:
-                # Read and combine data for selected matches
-                dfs_list = []
-                data_found = False  # Flag to check if data is found
-                for _, row in filtered_matches.iterrows():
-                    opponent = row["Opponent"]
-                    match_id = row["MatchId"]
-                    file_path = f'Competitions/{competition}/{division}/{conference}/{season}/{team}/{match_id}_{opponent}/Raw Data/{team if view == "Shots For" else opponent} Shots.csv'
-
-                    if os.path.exists(file_path):
-                        # Attempt to read the file
-                        df = pd.read_csv(file_path)
-                        df = df.rename(columns={'Team': "H_A"})
-                        df['Team'] = team if view == "Shots For" else opponent
-                        df['MatchId'] = match_id
-                        dfs_list.append(df)
-                        data_found = True  # Set flag to True if data is found
-                    else:
-                        st.warning(f'Missing data for: {opponent} match on {match_id[0:2]}/{match_id[2:4]}/{match_id[4:]}.')  # Notify that the file is missing
-
-                # Combine into a single DataFrame
-                if data_found:
-                    shot_events = pd.concat(dfs_list, ignore_index=True)
+            # Read and score the selected matches, reusing cached xG per match file
+            total_shots = get_scored_shots(competition, division, conference, season, team,
+                                           match_ids=filtered_matches["MatchId"], view=view, model_path=model_path)
+
+            # Notify about selected matches missing from the store, with the reason when their shot files failed validation
+            found_ids = set(total_shots["MatchId"]) if not total_shots.empty else set()
+            match_errors = get_shot_store().match_errors(competition, division, conference, season, team)
+            for _, row in filtered_matches[~filtered_matches["MatchId"].isin(found_ids)].iterrows():
+                match_id = row["MatchId"]
+                if match_id in match_errors:
+                    st.warning(f'Invalid data for: {row["Opponent"]} match on {match_id[0:2]}/{match_id[2:4]}/{match_id[4:]}: {match_errors[match_id]}')
                 else:
-                    st.write("No Data Available")  # No data found for selected matches
+                    st.warning(f'Missing data for: {row["Opponent"]} match on {match_id[0:2]}/{match_id[2:4]}/{match_id[4:]}.')  # Notify that the file is missing
+
+            if total_shots.empty:
+                st.write("No Data Available")  # No data found for selected matches
+                return
 
-            except FileNotFoundError as e:
-                st.error(f"No Data Available")  # Handle file not found error
-            except NameError as e:
-                st.error(f"A variable or name is not defined. Please verify your code or input: {e}")
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {e}")
+            # The selected player may have no shots in these matches
+            if player != "All Players" and not (total_shots["Player"] == player).any():
+                st.write("No Data Available")
+                return
 
         else:
             # Handle the case where no matches are selected
             st.write("No matches selected. Please select one or more matches to view data.")
+            return
 
         ####################################################################
 
-        # Calculate xG from imported file
-        total_shots = data_processor.calc_xg(shot_events)
-
-        # Plot the shot maps
-        plot_shot_maps(total_shots, team, view, competition, season, player)
+        # Plot the shot maps or the heatmap of the same selection, or of every team's shots in the division
+        if map_type == "Heatmap" and scope == "League":
+            grid = get_league_grid(competition, division, season=season, model_path=model_path)
+            plot_heatmap(grid, f'{competition} {division}', "Shots For", competition, season, "All Players", statistic, model_path)
+        elif map_type == "Heatmap":
+            grid = get_shot_grid(competition, division, conference, season, team, match_ids=filtered_matches["MatchId"],
+                                 view=view, player=player, model_path=model_path)
+            plot_heatmap(grid, team, view, competition, season, player, statistic, model_path)
+        elif map_type == "Interactive Shot Map":
+            plot_interactive_shot_map(total_shots, team, view, competition, season, model_path)
+        elif map_type == "xG Race":
+            timelines = get_match_timelines(competition, division, conference, season, team, match_ids=filtered_matches["MatchId"],
+                                            model_path=model_path)
+            plot_xg_race(timelines, team, competition, season, filtered_matches, model_path)
+        else:
+            plot_shot_maps(total_shots, team, view, competition, season, player, model_path, match_ids=filtered_matches["MatchId"])
 
         # Display the filtered shots table
-        display_filtered_shots(total_shots, view, player)
+        with stage('display_filtered_shots'):
+            display_filtered_shots(total_shots, view, player)
 
-    # Capture traceback and display it
+    # Show the failure and log it with its traceback
     except Exception as e:
-        st.write(f"No Data Available")
+        show_error(e)
+
+    finally:
+        end_page(trace)
 
 if __name__ == "__main__":
     run_dashboard()
\ No newline at end of file
@@ -0,0 +1,198 @@
+###################################################################
+# Data manipulation packages
+import pandas as pd
+import numpy as np
+
+# External Packages
+from instrumentation import count, timed
+from shot_grids import statsbomb_coordinates
+
+###################################################################
+
+# Bumped when the payload layout changes
+PAYLOAD_VERSION = 1
+
+# Columns of the payload's shot arrays; player, outcome, situation and body part hold indexes into the payload's name lists
+PAYLOAD_COLUMNS = ['x', 'y', 'xG', 'player', 'outcome', 'minute', 'situation', 'bodyPart', 'isPenalty', 'isOpenPlay']
+OUTCOMES = ['No Goal', 'Goal']
+
+# Decimals kept per float column; more than the maps can show only adds bytes
+PRECISION = {'x': 1, 'y': 1, 'xG': 3}
+
+# Pitch lines of the attacking half of the StatsBomb pitch as (x1, y1, x2, y2) segments
+PITCH_SEGMENTS = [
+    (0, 60, 80, 60), (0, 60, 0, 120), (80, 60, 80, 120), (0, 120, 80, 120),
+    (18, 102, 62, 102), (18, 102, 18, 120), (62, 102, 62, 120),
+    (30, 114, 50, 114), (30, 114, 30, 120), (50, 114, 50, 120),
+]
+
+# Arcs of the half pitch as (centre x, centre y, radius, start, end) in degrees from the goal direction
+PITCH_ARCS = [(40, 60, 10, -90, 90), (40, 108, 10, 126.87, 233.13)]
+ARC_SEGMENTS = 24
+
+
+def shot_summary(total_shots):
+    """Return the summary stats block of a shot map: goals, xG, non-penalty xG, shot counts and body parts."""
+    is_goal = total_shots['isGoal'].to_numpy() == 1
+    is_penalty = total_shots['isPenalty'].to_numpy() == 1
+    xg = total_shots['xG'].to_numpy(dtype=np.float64)
+
+    shots = len(total_shots)
+    penalties = int(is_penalty.sum())
+    total_xg = float(xg.sum())
+    np_xg = total_xg - float(xg[is_penalty].sum())
+    return {
+        'goals': int(is_goal.sum()),
+        'xG': round(total_xg, 2),
+        'npxG': round(np_xg, 2),
+        'npxG_per_shot': round(np_xg / (shots - penalties), 2) if shots > penalties else 0.0,
+        'shots': shots,
+        'penalties': penalties,
+        'right_foot': int((total_shots['isRightFooted'].to_numpy() == 1).sum()),
+        'left_foot': int((total_shots['isLeftFooted'].to_numpy() == 1).sum()),
+        'head': int((total_shots['isHead'].to_numpy() == 1).sum()),
+    }
+
+
+def _codes(values):
+    """Encode a column as integer codes into a list of its names (private method)."""
+    codes, names = pd.factorize(pd.Series(values).astype(str), sort=True)
+    return codes.tolist(), names.tolist()
+
+
+@timed('shotmap_payload')
+def shotmap_payload(total_shots, team, players, view, competition, season_year, model_version):
+    """Build the compact JSON payload of a shot map: columnar shot arrays in StatsBomb coordinates and the summary stats."""
+    x, y = statsbomb_coordinates(total_shots['x'].to_numpy(dtype=np.float64), total_shots['y'].to_numpy(dtype=np.float64))
+    player_codes, player_names = _codes(total_shots['Player'])
+    situation_codes, situations = _codes(total_shots['situation'])
+    body_part_codes, body_parts = _codes(total_shots['shotType'])
+
+    count('shotmap_payload.shots', len(total_shots))
+    return {
+        'version': PAYLOAD_VERSION,
+        'team': team,
+        'view': view,
+        'competition': competition,
+        'season': season_year,
+        'model_version': model_version,
+        'selected': players,
+        'players': player_names,
+        'outcomes': OUTCOMES,
+        'situations': situations,
+        'bodyParts': body_parts,
+        'shots': {
+            'x': np.round(x, PRECISION['x']).tolist(),
+            'y': np.round(y, PRECISION['y']).tolist(),
+            'xG': np.round(total_shots['xG'].to_numpy(dtype=np.float64), PRECISION['xG']).tolist(),
+            'player': player_codes,
+            'outcome': (total_shots['isGoal'].to_numpy() == 1).astype(int).tolist(),
+            'minute': total_shots['Mins'].to_numpy(dtype=np.int64).tolist(),
+            'situation': situation_codes,
+            'bodyPart': body_part_codes,
+            'isPenalty': (total_shots['isPenalty'].to_numpy() == 1).astype(int).tolist(),
+            'isOpenPlay': (total_shots['isRegularPlay'].to_numpy() == 1).astype(int).tolist(),
+        },
+        'summary': shot_summary(total_shots),
+    }
+
+
+def _pitch_lines():
+    """Return the half pitch lines, arcs included as short segments, as Vega-Lite data rows (private method)."""
+    segments = list(PITCH_SEGMENTS)
+    for cx, cy, radius, start, end in PITCH_ARCS:
+        angles = np.radians(np.linspace(start, end, ARC_SEGMENTS + 1))
+        across, along = cx + radius * np.sin(angles), cy + radius * np.cos(angles)
+        segments += list(zip(across[:-1], along[:-1], across[1:], along[1:]))
+    return [{'across': round(float(x1), 2), 'along': round(float(y1), 2), 'across2': round(float(x2), 2), 'along2': round(float(y2), 2)}
+            for x1, y1, x2, y2 in segments]
+
+
+def shotmap_spec(payload, pitchcolor='#1d2849', shot_color='gray', goal_color='red', width=480):
+    """Build a Vega-Lite spec drawing a shot map payload in the browser, with a player filter, hover tooltips and live stats."""
+    # The pitch is drawn vertically like the image maps: across the pitch left to right, the goal at the top
+    across = {'field': 'across', 'type': 'quantitative', 'scale': {'domain': [0, 80]}, 'axis': None}
+    along = {'field': 'x', 'type': 'quantitative', 'scale': {'domain': [60, 120]}, 'axis': None}
+    height = int(width * 60 / 80)
+
+    # Arrays are shipped columnar and flattened to rows client-side; names are looked up from their code lists
+    shots = {
+        'data': {'values': [payload['shots']]},
+        'transform': [
+            {'flatten': PAYLOAD_COLUMNS},
+            {'calculate': '80 - datum.y', 'as': 'across'},
+            {'calculate': 'players[datum.player]', 'as': 'Player'},
+            {'calculate': 'outcomes[datum.outcome]', 'as': 'Outcome'},
+            {'calculate': 'situations[datum.situation]', 'as': 'Situation'},
+            {'calculate': 'bodyParts[datum.bodyPart]', 'as': 'Body Part'},
+            {'filter': 'player_filter == "All Players" || datum.Player == player_filter'},
+        ],
+    }
+    shot_layer = {
+        **shots,
+        'mark': {'type': 'circle', 'stroke': 'white', 'strokeWidth': 2, 'opacity': 0.7},
+        'encoding': {
+            'x': across,
+            'y': along,
+            'size': {'field': 'xG', 'type': 'quantitative', 'scale': {'domain': [0, 1], 'range': [40, 1000]}, 'legend': None},
+            'color': {'field': 'Outcome', 'type': 'nominal', 'scale': {'domain': OUTCOMES, 'range': [shot_color, goal_color]},
+                      'legend': {'orient': 'top', 'title': None, 'labelColor': 'white'}},
+            'order': {'field': 'outcome'},
+            'tooltip': [
+                {'field': 'Player'},
+                {'field': 'minute', 'title': 'Minute'},
+                {'field': 'xG', 'format': '.2f'},
+                {'field': 'Outcome'},
+                {'field': 'Situation'},
+                {'field': 'Body Part'},
+            ],
+        },
+    }
+    pitch_layer = {
+        'data': {'values': _pitch_lines()},
+        'mark': {'type': 'rule', 'color': 'white', 'strokeWidth': 1.5},
+        'encoding': {'x': across, 'y': {**along, 'field': 'along'}, 'x2': {'field': 'across2'}, 'y2': {'field': 'along2'}},
+    }
+
+    # The stats block is summed client-side over the filtered shots, so it follows the player filter
+    stats = {
+        **shots,
+        'transform': shots['transform'] + [
+            {'calculate': 'datum.isPenalty ? 0 : datum.xG', 'as': 'npxG'},
+            {'aggregate': [
+                {'op': 'count', 'as': 'shots'},
+                {'op': 'sum', 'field': 'outcome', 'as': 'goals'},
+                {'op': 'sum', 'field': 'xG', 'as': 'xG'},
+                {'op': 'sum', 'field': 'npxG', 'as': 'npxG'},
+                {'op': 'sum', 'field': 'isPenalty', 'as': 'penalties'},
+            ]},
+            {'calculate': ("'Goals ' + datum.goals + '   |   xG / npxG ' + format(datum.xG, '.2f') + ' / ' + format(datum.npxG, '.2f')"
+                           " + '   |   npxG per Shot ' + format(datum.shots > datum.penalties ? datum.npxG / (datum.shots - datum.penalties) : 0, '.2f')"
+                           " + '   |   Shots ' + datum.shots + '   |   PK Shots ' + datum.penalties"), 'as': 'label'},
+        ],
+        'mark': {'type': 'text', 'color': '#72bcd4', 'fontSize': 13, 'fontWeight': 'bold'},
+        'encoding': {'text': {'field': 'label'}},
+        'width': width,
+        'height': 24,
+    }
+
+    title = payload['team'] if payload['selected'] == "All Players" else f"{payload['selected']} | {payload['team']}"
+    return {
+        '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+        'background': pitchcolor,
+        'title': {'text': title, 'subtitle': f"{payload['view']} - {payload['competition']} {payload['season']}",
+                  'color': 'white', 'subtitleColor': 'white', 'fontSize': 20, 'subtitleFontSize': 14},
+        'params': [
+            {'name': 'players', 'value': payload['players']},
+            {'name': 'outcomes', 'value': payload['outcomes']},
+            {'name': 'situations', 'value': payload['situations']},
+            {'name': 'bodyParts', 'value': payload['bodyParts']},
+            {'name': 'player_filter', 'value': payload['selected'],
+             'bind': {'input': 'select', 'options': ["All Players"] + payload['players'], 'name': 'Player: '}},
+        ],
+        'config': {'view': {'stroke': None}},
+        'vconcat': [
+            {'layer': [pitch_layer, shot_layer], 'width': width, 'height': height},
+            stats,
+        ],
+    }
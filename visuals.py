@@ -1,84 +1,63 @@
 # data manipulation and analysis
 import pandas as pd
 import numpy as np
-from data_processing import DataProcessing
+from caching import get_data_processor, render_cache
+from instrumentation import count, stage, timed
+from shot_grids import DEFAULT_BINS, GRID_STATISTICS, heatmap_stats, statsbomb_coordinates
+from vector_shotmap import shot_summary, shotmap_payload, shotmap_spec
 
 # data visualization
 import matplotlib as mpl
 import matplotlib.pyplot as plt
-import mplcursors
-from matplotlib.lines import Line2D
-from mplsoccer import Pitch, VerticalPitch, FontManager
-from highlight_text import fig_text, ax_text, HighlightText
-from matplotlib.patches import Circle
-import matplotlib.transforms as transforms
+from mplsoccer import VerticalPitch
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
 
-# machine learning
-import pickle
-import sklearn
+# rendering cache helpers
+import functools
+import io
+import threading
+
+LOGO_PATH = 'Logos/United SC Logo.png'
+
+@functools.lru_cache(maxsize=8)
+def _load_image(path):
+    """Read an image from disk once per process."""
+    return plt.imread(path)
 
 class FootballVisuals:
-    def __init__(self, model_paths):
+    # Pre-rendered pitch, legend and logo layers, keyed by style
+    _backgrounds = {}
+    _backgrounds_lock = threading.Lock()
+
+    def __init__(self, model_path):
         """Initialize the FootballVisuals class with default parameters."""
-        self.data_processing = DataProcessing(model_paths) # Create an instance of DataProcessing
+        self.data_processing = get_data_processor(model_path) # Shared DataProcessing instance
+        self.model_version = self.data_processing.scorer.model_version
 
-    def createShotmap(self, events_df, fig, ax, pitch, team, players, view, competition, season_year, pitchcolor, shot_color, titlecolor, team_color, fontfamily):
-        """Create a shot map visualization"""
-        # Prepate the data using DataProcessing instance
-        total_shots = self.data_processing.calc_xg(events_df)
+    def _pitch(self, pitchcolor):
+        """Create the half vertical pitch used by every shot map."""
+        return VerticalPitch(pitch_type='statsbomb', pitch_color=pitchcolor, line_color='w', half=True, pad_top=20, pad_right=20)
+
+    def _prepare_shots(self, events_df, players):
+        """Score the shots if needed, convert them to statsbomb coordinates and filter by player."""
+        # Prepate the data using DataProcessing instance, unless xG is already present
+        if 'xG' in events_df.columns:
+            total_shots = events_df.copy()
+        else:
+            total_shots = self.data_processing.calc_xg(events_df)
 
         # Convert coordinates to statsbomb
-        total_shots.x = total_shots.x * 1.2
-        total_shots.y = (100 - total_shots.y) * 0.8
+        total_shots.x, total_shots.y = statsbomb_coordinates(total_shots.x, total_shots.y)
 
         #Filter by Player
         if players != "All Players":
             total_shots = total_shots[total_shots['Player'] == players]
-        else:
-            pass
-        
-        # Create goal mask
-        mask_goal = total_shots['isGoal'] == True
-
-        pitch.scatter(total_shots.loc[mask_goal, 'x'], 80-total_shots.loc[mask_goal, 'y'], s=(total_shots.loc[mask_goal, 'xG'] * 1900) + 100,
-                    zorder=3, edgecolor='w', linewidths=2.5, c='red', label='Goal', alpha=0.6, ax=ax)
-        pitch.scatter(total_shots.loc[~mask_goal, 'x'], 80-total_shots.loc[~mask_goal, 'y'],
-                    edgecolor='w', linewidths=2.5, c=shot_color, s=(total_shots.loc[~mask_goal, 'xG'] * 1900) + 100, zorder=2,
-                    label='No Goal', ax=ax)
-        
-        # Add title and stats summary
-        if players != 'All Players':
-            ax.text(40, 135, f'{players} | {team}', fontsize=22, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
-        else:
-            ax.text(40, 135, f'{team}', fontsize=22, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
-        
-        ax.text(40, 131.25, f'{view} - {competition} {season_year}', fontsize=16, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
-        
-        goals = len(total_shots[total_shots["isGoal"] == True])
-        xg_sum = total_shots['xG'].sum()
-        num_chances = len(total_shots)
-        xg_per_chance = xg_sum / num_chances
-        penalties_scored = len(total_shots[(total_shots['isPenalty'] == 1) & (total_shots['isGoal'] == True)])
-        penalties_taken = len(total_shots[total_shots['isPenalty'] == 1])
-
-        op_shots = total_shots[total_shots['isRegularPlay'] == 1]
-        non_op_shots = total_shots[total_shots['isRegularPlay'] == 0]
-        pk_shots = total_shots[total_shots['isPenalty'] == 1]
-        
-        right_foot = len(total_shots[total_shots['isRightFooted'] == 1])
-        left_foot = len(total_shots[total_shots['isLeftFooted'] == 1])
-        head = len(total_shots[total_shots['isHead'] == 1])
-        goals = len(total_shots[mask_goal])
-        shots = len(total_shots[~mask_goal]) + goals
-        xg = round(total_shots['xG'].sum(), 2)
-        xg_op = round(op_shots['xG'].sum(), 2)
-        xg_sp = round(non_op_shots['xG'].sum() - pk_shots['xG'].sum(), 2)
-        xg_pk = round(pk_shots['xG'].sum(), 2)
-        xg_shot = round(xg / shots, 2)
-        np_xg = round(xg - xg_pk, 2)
-        np_shots = round(shots - penalties_taken, 2)
-        npxg_shot = round(np_xg / np_shots, 2)
+        return total_shots
 
+    def _draw_static_layers(self, fig, ax, fontfamily):
+        """Draw the legend, stat labels, credits and logo, which are the same on every shot map."""
         # add xG quality size
         ax.text(15, 127, 'Low-quality Chance', va='center', ha='center', color='w', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(65, 127, 'High-quality Chance', va='center', ha='center', color='w', fontsize=12, fontweight='bold', fontfamily=fontfamily)
@@ -86,23 +65,15 @@ class FootballVisuals:
         ax.text(45, 123, 'No Goal', va='center', ha='center', color='w', fontsize=10, fontweight='bold', fontfamily=fontfamily)
 
         ax.text(8, 77, 'Goals', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(8, 74.5, goals, va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)        
         ax.text(40, 77, 'xG / npxG', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(40, 74.5, f'{xg} / {round(xg-xg_pk,2)}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(70, 77, 'npxG per Shot', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(70, 74.5, f'{npxg_shot}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(90, 120, 'Total Shots', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(90, 117.5, f'{shots}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(90, 109, 'PK Shots', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(90, 106.5, f'{penalties_taken}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)     
-        ax.text(90, 96.5, f'{right_foot}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(90, 99, 'Right Foot', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
         ax.text(90, 88.1, 'Left Foot', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(90, 85.6, f'{left_foot}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(90, 77, 'Head', va='center', ha='center', color='w', fontsize=13, fontweight='bold', fontfamily=fontfamily)
-        ax.text(90, 74.5, f'{head}', va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
         ax.text(1, 64, f'Created by @egudi_analysis\nExpected goals model trained on ~10k\nshots from the 2021/2022 EPL season\nExcludes Own Goals.', va='center', ha='left', color='w', fontsize=8, fontweight='bold', fontfamily=fontfamily)
-            
+
         # Add xG quality size circles (corrected for aspect ratio)
         ax.add_patch(plt.Circle((30, 127), 0.25, color='w', transform=ax.transData))
         ax.add_patch(plt.Circle((35, 127), 0.5, color='w', transform=ax.transData))
@@ -113,11 +84,273 @@ class FootballVisuals:
         ax.add_patch(plt.Circle((40, 123), 0.9, color='gray', ec='w', lw=1.5, transform=ax.transData))
         ax.add_patch(plt.Circle((31, 123), 0.9, color='red',  ec='w', lw=1.5, alpha=0.6, transform=ax.transData))
 
-        path = f'Logos/United SC Logo.png'
         ax_team = fig.add_axes([0.825,.695,0.125,0.125])
         ax_team.axis('off')
-        im = plt.imread(path)
-        ax_team.imshow(im);
+        ax_team.imshow(_load_image(LOGO_PATH));
+
+    def _draw_dynamic_layers(self, total_shots, ax, pitch, team, players, view, competition, season_year, shot_color, fontfamily):
+        """Draw the shots, title and stat values, which change with the selection."""
+        # Create goal mask
+        mask_goal = total_shots['isGoal'] == True
+
+        pitch.scatter(total_shots.loc[mask_goal, 'x'], 80-total_shots.loc[mask_goal, 'y'], s=(total_shots.loc[mask_goal, 'xG'] * 1900) + 100,
+                    zorder=3, edgecolor='w', linewidths=2.5, c='red', label='Goal', alpha=0.6, ax=ax)
+        pitch.scatter(total_shots.loc[~mask_goal, 'x'], 80-total_shots.loc[~mask_goal, 'y'],
+                    edgecolor='w', linewidths=2.5, c=shot_color, s=(total_shots.loc[~mask_goal, 'xG'] * 1900) + 100, zorder=2,
+                    label='No Goal', ax=ax)
+
+        # Add title and stats summary
+        if players != 'All Players':
+            ax.text(40, 135, f'{players} | {team}', fontsize=22, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
+        else:
+            ax.text(40, 135, f'{team}', fontsize=22, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
+
+        ax.text(40, 131.25, f'{view} - {competition} {season_year}', fontsize=16, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
+
+        # Same stats block as the vector shot map payload
+        summary = shot_summary(total_shots)
+        ax.text(8, 74.5, summary['goals'], va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(40, 74.5, f"{summary['xG']} / {summary['npxG']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(70, 74.5, f"{summary['npxG_per_shot']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(90, 117.5, f"{summary['shots']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(90, 106.5, f"{summary['penalties']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(90, 96.5, f"{summary['right_foot']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(90, 85.6, f"{summary['left_foot']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+        ax.text(90, 74.5, f"{summary['head']}", va='center', ha='center', color='#72bcd4', fontsize=12, fontweight='bold', fontfamily=fontfamily)
+
+    @timed('create_shotmap')
+    def createShotmap(self, events_df, fig, ax, pitch, team, players, view, competition, season_year, pitchcolor, shot_color, titlecolor, team_color, fontfamily):
+        """Create a shot map visualization"""
+        total_shots = self._prepare_shots(events_df, players)
+        self._draw_dynamic_layers(total_shots, ax, pitch, team, players, view, competition, season_year, shot_color, fontfamily)
+        self._draw_static_layers(fig, ax, fontfamily)
 
         # save figure
-        #fig.savefig(f'{players}_xG_shotmap.png', dpi=None, bbox_inches="tight")
\ No newline at end of file
+        #fig.savefig(f'{players}_xG_shotmap.png', dpi=None, bbox_inches="tight")
+
+    @timed('shotmap_spec')
+    def shotmapSpec(self, events_df, team, players, view, competition, season_year, pitchcolor='#1d2849', shot_color='gray', width=480):
+        """Build the shot map as a Vega-Lite spec of its compact JSON payload, drawn and filtered in the browser instead of rasterized here."""
+        total_shots = events_df if 'xG' in events_df.columns else self.data_processing.calc_xg(events_df)
+        payload = shotmap_payload(total_shots, team, players, view, competition, season_year, self.model_version)
+        return shotmap_spec(payload, pitchcolor=pitchcolor, shot_color=shot_color, width=width)
+
+    def _background(self, pitchcolor, fontfamily, dpi):
+        """Pre-render the pitch and static layers once per style and record the pitch axes geometry."""
+        key = (pitchcolor, fontfamily, dpi)
+        with self._backgrounds_lock:
+            if key not in self._backgrounds:
+                pitch = self._pitch(pitchcolor)
+                fig, ax = pitch.draw(figsize=(8, 10))
+                fig.set_dpi(dpi)
+                self._draw_static_layers(fig, ax, fontfamily)
+                fig.canvas.draw()
+                renderer = fig.canvas.get_renderer()
+                self._backgrounds[key] = {
+                    'region': fig.canvas.copy_from_bbox(fig.bbox),
+                    'figsize': tuple(fig.get_size_inches()),
+                    'position': ax.get_position().bounds,
+                    'xlim': ax.get_xlim(),
+                    'ylim': ax.get_ylim(),
+                    'tightbbox': fig.get_tightbbox(renderer)
+                }
+                plt.close(fig)
+            return self._backgrounds[key]
+
+    @timed('render_shotmap')
+    def renderShotmap(self, events_df, team, players, view, competition, season_year, match_ids=None,
+                      pitchcolor='#1d2849', shot_color='gray', fontfamily='Segoe UI', dpi=200):
+        """Render a shot map to PNG bytes, reusing cached renders and the pre-rendered static layers."""
+        total_shots = self._prepare_shots(events_df, players)
+
+        # Cache key covers the selection, the model and the plotted shots themselves
+        shots_hash = int(pd.util.hash_pandas_object(total_shots[['Player', 'x', 'y', 'xG', 'isGoal']], index=False).sum())
+        key = (team, view, players, competition, season_year, tuple(sorted(match_ids)) if match_ids is not None else None,
+               self.model_version, shots_hash, pitchcolor, shot_color, fontfamily, dpi)
+        png = render_cache.get(key)
+        if png is not None:
+            count('render_cache.hits')
+            return png
+        count('render_cache.misses')
+
+        with stage('render_shotmap.draw'):
+            # Blit the pre-rendered background and draw only the dynamic layers over it on a pyplot-free figure
+            background = self._background(pitchcolor, fontfamily, dpi)
+            fig = Figure(figsize=background['figsize'], dpi=dpi)
+            canvas = FigureCanvasAgg(fig)
+            ax = fig.add_axes(background['position'])
+            ax.set_xlim(background['xlim'])
+            ax.set_ylim(background['ylim'])
+            ax.axis('off')
+
+            self._draw_dynamic_layers(total_shots, ax, self._pitch(pitchcolor), team, players, view, competition, season_year, shot_color, fontfamily)
+            renderer = canvas.get_renderer()
+            renderer.restore_region(background['region'])
+            for artist in sorted(ax.collections + ax.texts, key=lambda artist: artist.get_zorder()):
+                ax.draw_artist(artist)
+
+        # Crop like savefig(bbox_inches='tight') with the default padding
+        ax_bbox = ax.get_tightbbox(renderer).transformed(fig.dpi_scale_trans.inverted())
+        bbox = Bbox.union([background['tightbbox'], ax_bbox]).padded(mpl.rcParams['savefig.pad_inches'])
+        image = np.asarray(canvas.buffer_rgba())
+        height, width = image.shape[:2]
+        x0, x1 = max(int(bbox.x0 * dpi), 0), min(int(np.ceil(bbox.x1 * dpi)), width)
+        y0, y1 = max(int(bbox.y0 * dpi), 0), min(int(np.ceil(bbox.y1 * dpi)), height)
+
+        buffer = io.BytesIO()
+        with stage('render_shotmap.encode'):
+            mpl.image.imsave(buffer, image[height - y1:height - y0, x0:x1, :3], format='png', pil_kwargs={'compress_level': 1})
+        png = buffer.getvalue()
+        render_cache.put(key, png)
+        return png
+
+    @timed('render_heatmap')
+    def renderHeatmap(self, grid, team, players, view, competition, season_year, statistic='xG', bins=DEFAULT_BINS,
+                      pitchcolor='#1d2849', fontfamily='Segoe UI', dpi=200):
+        """Render one layer of a summed shots, goals and xG grid as a heatmap on the half pitch, in time independent of the shot count."""
+        key = ('heatmap', team, view, players, competition, season_year, statistic, tuple(bins),
+               hash(np.ascontiguousarray(grid).tobytes()), pitchcolor, fontfamily, dpi)
+        png = render_cache.get(key)
+        if png is not None:
+            count('render_cache.hits')
+            return png
+        count('render_cache.misses')
+
+        fig = Figure(figsize=(8, 10), dpi=dpi)
+        FigureCanvasAgg(fig)
+        fig.set_facecolor(pitchcolor)
+        ax = fig.add_subplot()
+        pitch = self._pitch(pitchcolor)
+        pitch.draw(ax=ax)
+
+        # Color the cells by the chosen statistic and label the non-empty ones
+        stats = heatmap_stats(grid, statistic, bins)
+        cmap = mpl.colors.LinearSegmentedColormap.from_list('heatmap', [pitchcolor, '#c8102e'])
+        pitch.heatmap(stats, ax=ax, cmap=cmap, edgecolors=pitchcolor, zorder=0.5, vmin=0, vmax=max(stats['statistic'].max(), 1e-9))
+        value_format = '{:.2f}' if statistic == 'xG' else '{:.0f}'
+        for value, cx, cy in zip(stats['statistic'].ravel(), stats['cx'].ravel(), stats['cy'].ravel()):
+            label = value_format.format(value)
+            if float(label) > 0:
+                pitch.annotate(label, (cx, cy), ax=ax, va='center', ha='center', color='w',
+                               fontsize=9, fontweight='bold', fontfamily=fontfamily)
+
+        title = f'{players} | {team}' if players != 'All Players' else f'{team}'
+        ax.text(40, 135, title, fontsize=22, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
+        ax.text(40, 131.25, f'{view} - {competition} {season_year}', fontsize=16, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
+        totals = dict(zip(GRID_STATISTICS, grid.sum(axis=(1, 2))))
+        ax.text(40, 126, f"{statistic} per zone  |  Shots {totals['shots']:.0f}  |  Goals {totals['goals']:.0f}  |  xG {totals['xG']:.2f}",
+                fontsize=12, color='w', ha='center', fontweight='bold', fontfamily=fontfamily)
+
+        buffer = io.BytesIO()
+        with stage('render_heatmap.encode'):
+            fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', facecolor=pitchcolor, pil_kwargs={'compress_level': 1})
+        png = buffer.getvalue()
+        render_cache.put(key, png)
+        return png
+
+    @timed('render_xg_race')
+    def renderXGRace(self, timeline, team, opponent, competition, season_year, match_label,
+                     pitchcolor='#1d2849', team_color='#c8102e', opponent_color='gray', fontfamily='Segoe UI', dpi=200):
+        """Render the cumulative xG of both teams of one match as a step chart with the goals marked, to PNG bytes."""
+        timeline_hash = int(pd.util.hash_pandas_object(timeline[['Minute', 'Team', 'xG', 'isGoal']], index=False).sum())
+        key = ('xg_race', team, opponent, competition, season_year, match_label, self.model_version, timeline_hash,
+               pitchcolor, team_color, opponent_color, fontfamily, dpi)
+        png = render_cache.get(key)
+        if png is not None:
+            count('render_cache.hits')
+            return png
+        count('render_cache.misses')
+
+        fig = Figure(figsize=(10, 6), dpi=dpi)
+        FigureCanvasAgg(fig)
+        fig.set_facecolor(pitchcolor)
+        ax = fig.add_subplot()
+        ax.set_facecolor(pitchcolor)
+
+        # Each line steps up at its team's shots and runs flat to full time; goals sit on the scoring team's line
+        end = max(90.0, float(timeline['Minute'].max()) if not timeline.empty else 90.0)
+        for name, color in [(opponent, opponent_color), (team, team_color)]:
+            own = (timeline['Team'] == name).to_numpy()
+            minutes = timeline['Minute'].to_numpy(dtype=np.float64)[own]
+            xg_for = timeline['xG For'].to_numpy(dtype=np.float64)[own]
+            total = xg_for[-1] if len(xg_for) else 0.0
+            ax.step(np.concatenate([[0.0], minutes, [end]]), np.concatenate([[0.0], xg_for, [total]]),
+                    where='post', color=color, linewidth=2.5, label=f'{name}  {total:.2f} xG')
+
+            scored = (timeline['Scoring Team'] == name).to_numpy() & (timeline['isGoal'].to_numpy() == 1)
+            running = np.where((timeline['Team'] == name).to_numpy(), timeline['xG For'], timeline['xG Against'])
+            ax.scatter(timeline['Minute'].to_numpy()[scored], running[scored], s=120, color=color, edgecolors='w', linewidths=1.5, zorder=3)
+
+        ax.axvline(45, color='w', alpha=0.3, linestyle='--', linewidth=1)
+        ax.set_xlim(0, end)
+        ax.set_ylim(bottom=0)
+        ax.set_xticks([0, 15, 30, 45, 60, 75, 90])
+        ax.set_xlabel('Minute', color='w', fontfamily=fontfamily)
+        ax.set_ylabel('Cumulative xG', color='w', fontfamily=fontfamily)
+        ax.tick_params(colors='w')
+        for spine in ax.spines.values():
+            spine.set_color('w')
+            spine.set_alpha(0.4)
+        ax.grid(axis='y', color='w', alpha=0.15)
+        legend = ax.legend(loc='lower right', frameon=False, prop={'family': fontfamily, 'size': 12})
+        for text in legend.get_texts():
+            text.set_color('w')
+
+        ax.set_title(f'{team} vs {opponent}\nxG Race - {competition} {season_year} | {match_label}', color='w', fontsize=16,
+                     fontweight='bold', fontfamily=fontfamily)
+
+        buffer = io.BytesIO()
+        with stage('render_xg_race.encode'):
+            fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', facecolor=pitchcolor, pil_kwargs={'compress_level': 1})
+        png = buffer.getvalue()
+        render_cache.put(key, png)
+        return png
+
+    @timed('render_player_radar')
+    def renderPlayerRadar(self, radar, player, team, position, competition, pitchcolor='#1d2849', player_color='#c8102e',
+                          fontfamily='Segoe UI', dpi=200):
+        """Render a player's position percentiles as a radar chart with each metric's value, to PNG bytes."""
+        radar_hash = int(pd.util.hash_pandas_object(radar, index=False).sum())
+        key = ('player_radar', player, team, position, competition, self.model_version, radar_hash, pitchcolor, player_color, fontfamily, dpi)
+        png = render_cache.get(key)
+        if png is not None:
+            count('render_cache.hits')
+            return png
+        count('render_cache.misses')
+
+        fig = Figure(figsize=(8, 8), dpi=dpi)
+        FigureCanvasAgg(fig)
+        fig.set_facecolor(pitchcolor)
+        ax = fig.add_subplot(projection='polar')
+        ax.set_facecolor(pitchcolor)
+
+        # One spoke per metric, clockwise from the top, closing the outline back on the first
+        angles = np.linspace(0, 2 * np.pi, len(radar), endpoint=False)
+        percentiles = radar['Percentile'].to_numpy(dtype=np.float64)
+        ax.set_theta_offset(np.pi / 2)
+        ax.set_theta_direction(-1)
+        ax.fill(np.append(angles, angles[0]), np.append(percentiles, percentiles[0]), color=player_color, alpha=0.35)
+        ax.plot(np.append(angles, angles[0]), np.append(percentiles, percentiles[0]), color=player_color, linewidth=2.5)
+        ax.scatter(angles, percentiles, s=40, color=player_color, edgecolors='w', linewidths=1, zorder=3)
+
+        ax.set_ylim(0, 100)
+        ax.set_yticks([25, 50, 75, 100])
+        ax.set_yticklabels([])
+        ax.set_xticks(angles)
+        ax.set_xticklabels([f'{metric}\n{value:.2f} ({percentile:.0f})' for metric, value, percentile
+                            in radar[['Metric', 'Value', 'Percentile']].itertuples(index=False)],
+                           color='w', fontfamily=fontfamily, fontsize=10)
+        ax.tick_params(axis='x', pad=26)
+        ax.grid(color='w', alpha=0.2)
+        ax.spines['polar'].set_color('w')
+        ax.spines['polar'].set_alpha(0.4)
+
+        ax.set_title(f'{player} ({team})\n{position.capitalize()} Percentiles - {competition}', color='w', fontsize=16,
+                     fontweight='bold', fontfamily=fontfamily, pad=30)
+
+        buffer = io.BytesIO()
+        with stage('render_player_radar.encode'):
+            fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight', facecolor=pitchcolor, pil_kwargs={'compress_level': 1})
+        png = buffer.getvalue()
+        render_cache.put(key, png)
+        return png
@@ -0,0 +1,229 @@
+###################################################################
+# Data manipulation packages
+import numpy as np
+
+# File handling packages
+import hashlib
+import json
+from pathlib import Path
+
+###################################################################
+
+# Version of the exported model file layout
+FORMAT_VERSION = 2
+
+# Feature order of each logistic regression, as used when the models were trained
+FEATURES = {
+    'op': ['distance_to_goal', 'angle', 'isFoot', 'isHead'],
+    'non_op': ['distance_to_goal', 'angle', 'isFoot', 'isHead', 'isDirectFree', 'isSetPiece', 'isFromCorner'],
+    'xa': ['distance_of_pass', 'isOpenPlay', 'isFoot', 'isHead', 'isFreeKick', 'isCorner', 'isThroughBall']
+}
+
+# Fixed xG assigned to every penalty
+PENALTY_XG = 0.79
+
+DEFAULT_MODEL_PATHS = {
+    'op': Path(__file__).parent / 'Models' / 'expected_goals_model_lr.sav',
+    'non_op': Path(__file__).parent / 'Models' / 'expected_goals_model_lr_v2.sav',
+    'xa': Path(__file__).parent / 'Models' / 'expected_assists_model_lr.sav'
+}
+DEFAULT_SCORER_PATH = Path(__file__).parent / 'Models' / 'expected_goals_model_lr.json'
+
+# Versioned models written by train_xg, and the manifest listing them and the version loaded by default
+MODEL_DIR = Path(__file__).parent / 'Models' / 'versions'
+MODEL_MANIFEST_NAME = 'manifest.json'
+
+
+class XGScorer:
+    def __init__(self, path=DEFAULT_SCORER_PATH):
+        """Initialize the XGScorer class from an exported model file."""
+        with open(path, 'r') as f:
+            spec = json.load(f)
+        if spec.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported xG model format {spec.get('format_version')} in {path}")
+
+        self.model_version = spec['model_version']
+        self.penalty_xg = spec['penalty_xg']
+
+        # Stack both models over the union of their features, zero-padding the ones a model does not use
+        self.features = spec['features']
+        self.branches = list(spec['models'])
+        self.coef = np.zeros((len(self.features), len(self.branches)))
+        self.intercept = np.zeros(len(self.branches))
+        for j, branch in enumerate(self.branches):
+            model = spec['models'][branch]
+            for name, coef in zip(model['features'], model['coef']):
+                self.coef[self.features.index(name), j] = coef
+            self.intercept[j] = model['intercept']
+
+        # Expected assists model of the pass that set up each shot
+        xa_model = spec['xa_model']
+        self.xa_features = xa_model['features']
+        self.xa_coef = np.asarray(xa_model['coef'], dtype=np.float64)
+        self.xa_intercept = xa_model['intercept']
+
+    def score(self, features, is_open_play, is_penalty):
+        """Score every shot in one batched pass, picking the op, non-op or penalty branch by mask."""
+        X = np.column_stack([np.asarray(features[name], dtype=np.float64) for name in self.features])
+        probabilities = 1 / (1 + np.exp(-(X @ self.coef + self.intercept)))
+
+        is_open_play = np.asarray(is_open_play, dtype=bool)
+        xg = np.where(is_open_play, probabilities[:, self.branches.index('op')], probabilities[:, self.branches.index('non_op')])
+        return np.where(np.asarray(is_penalty, dtype=bool), self.penalty_xg, xg)
+
+    def score_xa(self, features, has_pass):
+        """Score the assisting pass of every shot in one batched pass, 0 for shots without a recorded pass."""
+        X = np.column_stack([np.asarray(features[name], dtype=np.float64) for name in self.xa_features])
+        has_pass = np.asarray(has_pass, dtype=bool)
+        probabilities = 1 / (1 + np.exp(-(np.where(has_pass[:, None], X, 0.0) @ self.xa_coef + self.xa_intercept)))
+        return np.where(has_pass, probabilities, 0.0)
+
+
+def load_model_manifest(model_dir=MODEL_DIR):
+    """Load the manifest of versioned models, empty when none have been trained."""
+    try:
+        with open(Path(model_dir) / MODEL_MANIFEST_NAME, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'current': None, 'models': {}}
+
+
+def register_model(spec, metadata, model_dir=MODEL_DIR, promote=False):
+    """Write a scorer spec as a versioned model file and record it in the manifest, optionally as the default version."""
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    version = spec['model_version']
+    path = model_dir / f'{version}.json'
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(spec, f, indent=2)
+    tmp_path.replace(path)
+
+    # The manifest is written last, so a listed version always has its model file
+    manifest = load_model_manifest(model_dir)
+    manifest['models'][version] = {'file': path.name, **metadata}
+    if promote:
+        manifest['current'] = version
+    tmp_path = model_dir / f'{MODEL_MANIFEST_NAME}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(model_dir / MODEL_MANIFEST_NAME)
+    return path
+
+
+def model_versions(model_dir=MODEL_DIR):
+    """List the loadable model versions, the exported default first and then the trained ones newest first."""
+    with open(DEFAULT_SCORER_PATH, 'r') as f:
+        versions = [{'version': json.load(f)['model_version'], 'path': DEFAULT_SCORER_PATH, 'source': 'export'}]
+    manifest = load_model_manifest(model_dir)
+    trained = sorted(manifest['models'].items(), key=lambda item: item[1].get('created', ''), reverse=True)
+    versions += [{'version': version, 'path': Path(model_dir) / entry['file'], 'source': 'trained', **entry} for version, entry in trained]
+    return versions
+
+
+def resolve_model(version=None, model_dir=MODEL_DIR):
+    """Return the file of a model version, or of the manifest's current version, falling back to the exported default."""
+    manifest = load_model_manifest(model_dir)
+    version = version or manifest.get('current')
+    if version is None:
+        return DEFAULT_SCORER_PATH
+    for entry in model_versions(model_dir):
+        if entry['version'] == version:
+            return entry['path']
+    raise ValueError(f"Unknown xG model version {version!r}")
+
+
+def model_fingerprint(model_paths):
+    """Return a short hash of the pickled model files, used as the exported model version."""
+    digest = hashlib.sha256()
+    for key in sorted(model_paths):
+        digest.update(key.encode())
+        digest.update(Path(model_paths[key]).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def export_models(model_paths=DEFAULT_MODEL_PATHS, output_path=DEFAULT_SCORER_PATH, n_probe=10000, tolerance=1e-12):
+    """Export the pickled sklearn models to the scorer format after checking parity with predict_proba."""
+    import pickle
+    import warnings
+
+    models = {}
+    with warnings.catch_warnings():
+        # The models were pickled with an older scikit-learn; only their coefficients are read
+        warnings.simplefilter('ignore')
+        for key, path in model_paths.items():
+            models[key] = pickle.load(open(path, 'rb'))
+
+    spec = {
+        'format_version': FORMAT_VERSION,
+        'model_version': model_fingerprint(model_paths),
+        'features': FEATURES['non_op'],
+        'penalty_xg': PENALTY_XG,
+        'models': {
+            key: {
+                'source': Path(model_paths[key]).name,
+                'features': FEATURES[key],
+                'coef': [float(c) for c in models[key].coef_.ravel()],
+                'intercept': float(models[key].intercept_[0])
+            }
+            for key in ['op', 'non_op']
+        },
+        'xa_model': {
+            'source': Path(model_paths['xa']).name,
+            'features': FEATURES['xa'],
+            'coef': [float(c) for c in models['xa'].coef_.ravel()],
+            'intercept': float(models['xa'].intercept_[0])
+        }
+    }
+
+    tmp_path = Path(output_path).with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(spec, f, indent=2)
+
+    # Parity check against sklearn on random shots covering the whole event pitch
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 99.5, n_probe)
+    y = rng.uniform(0, 100, n_probe)
+    probe = {
+        'distance_to_goal': np.sqrt((100 - x)**2 + (y - 50)**2),
+        'angle': np.degrees(np.arctan(np.abs(y - 50) / (100 - x))),
+        'isFoot': rng.integers(0, 2, n_probe),
+        'isDirectFree': rng.integers(0, 2, n_probe),
+        'isSetPiece': rng.integers(0, 2, n_probe),
+        'isFromCorner': rng.integers(0, 2, n_probe)
+    }
+    probe['isHead'] = 1 - probe['isFoot']
+    is_open_play = rng.integers(0, 2, n_probe).astype(bool)
+    is_penalty = ~is_open_play & (rng.random(n_probe) < 0.1)
+
+    expected = np.full(n_probe, PENALTY_XG)
+    for key, mask in [('op', is_open_play), ('non_op', ~is_open_play & ~is_penalty)]:
+        X = np.column_stack([probe[name][mask] for name in FEATURES[key]])
+        expected[mask] = models[key].predict_proba(X)[:, 1]
+
+    # Same check for the xA model on random passes with random flags
+    probe['distance_of_pass'] = rng.uniform(0, 100, n_probe)
+    for name in ['isOpenPlay', 'isFreeKick', 'isCorner', 'isThroughBall']:
+        probe[name] = rng.integers(0, 2, n_probe)
+    expected_xa = models['xa'].predict_proba(np.column_stack([probe[name] for name in FEATURES['xa']]))[:, 1]
+
+    scorer = XGScorer(tmp_path)
+    scored = scorer.score(probe, is_open_play, is_penalty)
+    scored_xa = scorer.score_xa(probe, np.ones(n_probe, dtype=bool))
+    max_error = float(max(np.max(np.abs(scored - expected)), np.max(np.abs(scored_xa - expected_xa))))
+    if max_error > tolerance:
+        tmp_path.unlink()
+        raise ValueError(f"Exported scorer differs from sklearn by {max_error:.3g} (tolerance {tolerance:.0e})")
+
+    tmp_path.replace(output_path)
+    return spec['model_version'], max_error
+
+
+def main():
+    """Export the pickled xG and xA models to the scorer format."""
+    model_version, max_error = export_models()
+    print(f"Exported xG and xA models {model_version} to {DEFAULT_SCORER_PATH} (max parity error vs sklearn: {max_error:.3g})")
+
+
+if __name__ == "__main__":
+    main()